@@ -0,0 +1,86 @@
+"""
+Benchmark noisy augmentation (train_lob_model.augment_rows) across worker counts.
+
+Augments the deduplicated rows of a dataset with the given noise profiles for
+1..N workers, reports variants/sec and speedup per worker count, and checks that
+every worker count produces byte-identical output (same SHA-256 over the variants).
+
+Usage:
+    python3 ai/scripts/benchmark_augmentation.py [--dataset PATH] [--workers 4]
+                                                 [--profiles typo,heavy_typo,filler]
+                                                 [--per-label-limit 60] [--seed 42] [--output-json PATH]
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+
+from lob_artifact_cache import STARTUP_DATASET
+from train_lob_model import AUGMENT_PROFILES, NOISE_PROFILES, augment_rows, dedupe_rows, flatten_dataset
+
+
+def digest(rows):
+    return hashlib.sha256(json.dumps(rows, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Augmentation throughput and output stability across worker counts")
+    parser.add_argument("--dataset", type=str, default=None, help="Dataset JSON (default: the service's startup dataset)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Benchmark 1..N workers")
+    parser.add_argument("--profiles", type=str, default=",".join(AUGMENT_PROFILES),
+                        help=f"Comma-separated noise profiles ({', '.join(NOISE_PROFILES)})")
+    parser.add_argument("--per-label-limit", type=int, default=60)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output-json", type=str, default=None)
+    args = parser.parse_args()
+
+    profiles = tuple(p.strip() for p in args.profiles.split(",") if p.strip())
+    unknown = [p for p in profiles if p not in NOISE_PROFILES]
+    if unknown or not profiles:
+        print(f"Unknown noise profile(s): {', '.join(unknown) or '(none given)'}", file=sys.stderr)
+        return 1
+
+    ds_path = args.dataset or STARTUP_DATASET
+    with open(ds_path, "r", encoding="utf-8") as f:
+        rows = dedupe_rows(flatten_dataset(json.load(f)))
+
+    report = {
+        "dataset": os.path.basename(ds_path),
+        "rows": len(rows),
+        "profiles": list(profiles),
+        "perLabelLimit": args.per_label_limit,
+        "cpuCount": os.cpu_count(),
+        "runs": [],
+    }
+    for workers in range(1, args.workers + 1):
+        started = time.perf_counter()
+        out = augment_rows(rows, args.per_label_limit, args.seed, profiles, workers=workers, min_parallel_tasks=0)
+        elapsed = time.perf_counter() - started
+        rate = len(out) / elapsed if elapsed else 0.0
+        report["runs"].append({
+            "workers": workers,
+            "variants": len(out),
+            "seconds": round(elapsed, 3),
+            "variantsPerSec": round(rate, 1),
+            "sha256": digest(out),
+        })
+        print(f"  workers={workers:2d}  {len(out)} variants  {elapsed:7.2f}s  {rate:9.1f} variants/sec")
+    base = report["runs"][0]["variantsPerSec"]
+    for r in report["runs"]:
+        r["speedup"] = round(r["variantsPerSec"] / base, 2) if base else None
+    report["stableAcrossWorkers"] = len({r["sha256"] for r in report["runs"]}) == 1
+    print(f"Output identical across worker counts: {report['stableAcrossWorkers']}")
+
+    if args.output_json:
+        os.makedirs(os.path.dirname(args.output_json) or ".", exist_ok=True)
+        with open(args.output_json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nReport written to {args.output_json}")
+    return 0 if report["stableAcrossWorkers"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
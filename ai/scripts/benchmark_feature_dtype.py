@@ -0,0 +1,202 @@
+"""
+Benchmark float32 vs float64 TF-IDF features (train_lob_model.FEATURE_DTYPE).
+
+Runs train() once per dtype, each in a fresh process with LOB_FEATURE_DTYPE set
+so peak RSS is that run's own, and reports wall time, final-fit time, peak RSS,
+feature-matrix and artifact size. Both models then serve the test descriptions
+one request at a time (CachedTfidfFeaturizer + predict_proba, as /predict does)
+for per-request latency, and are compared for accuracy on the test set and the
+real-world holdout, top-1 agreement and the largest probability difference.
+
+Trains use --no-tune --no-cascade. Models go to a throwaway registry, never ai/models.
+
+Usage:
+    python3 ai/scripts/benchmark_feature_dtype.py [--dataset PATH] [--requests 500] [--output-json PATH]
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from queue import Empty
+
+import numpy as np
+
+import model_registry
+from lob_artifact_cache import STARTUP_DATASET
+from serving_featurizer import CachedTfidfFeaturizer
+from train_lob_model import REALWORLD_HOLDOUT_DATASET, flatten_dataset, load_bundle
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+AI_ROOT = os.path.dirname(SCRIPT_DIR)
+TEST_DATASET = os.path.join(AI_ROOT, "datasets", "lob_recommendation_test.json")
+DTYPES = ("float64", "float32")
+# How often the parent checks that a silent child (e.g. OOM-killed) is still alive
+CHILD_POLL_SECONDS = 5
+
+
+def _train_child(dataset_path, models_dir, queue):
+    # Runs in a spawned process: train_lob_model reads LOB_FEATURE_DTYPE when imported here.
+    # Always puts exactly one result, {"error": ...} if training raised.
+    try:
+        from train_lob_model import _peak_rss_mb, train
+
+        started = time.perf_counter()
+        version = train(dataset_path, skip_tune=True, build_cascade=False, promote=False, models_dir=models_dir)
+        seconds = time.perf_counter() - started
+        queue.put({
+            "version": version,
+            "seconds": seconds,
+            "peakRssMb": _peak_rss_mb(),
+        })
+    except Exception as exc:
+        queue.put({"error": repr(exc)})
+
+
+def _child_result(proc, queue):
+    """The child's result, or {"error": ...} if it dies without one (e.g. killed by the OOM killer)."""
+    while True:
+        try:
+            return queue.get(timeout=CHILD_POLL_SECONDS)
+        except Empty:
+            if proc.is_alive():
+                continue
+            try:
+                # It may have put its result just before exiting
+                return queue.get(timeout=1)
+            except Empty:
+                return {"error": f"child process exited with code {proc.exitcode} without a result"}
+
+
+def train_with_dtype(dtype, dataset_path, models_dir):
+    ctx = multiprocessing.get_context("spawn")
+    queue = ctx.Queue()
+    previous = os.environ.get("LOB_FEATURE_DTYPE")
+    os.environ["LOB_FEATURE_DTYPE"] = dtype
+    try:
+        proc = ctx.Process(target=_train_child, args=(dataset_path, models_dir, queue))
+        proc.start()
+        result = _child_result(proc, queue)
+        proc.join()
+    finally:
+        if previous is None:
+            os.environ.pop("LOB_FEATURE_DTYPE", None)
+        else:
+            os.environ["LOB_FEATURE_DTYPE"] = previous
+    if "error" in result:
+        raise RuntimeError(f"Training with {dtype} features failed (exit code {proc.exitcode}): {result['error']}")
+    if not result["version"]:
+        raise RuntimeError(f"Training failed with {dtype} features")
+    return result
+
+
+def _dir_bytes(path):
+    return sum(os.path.getsize(os.path.join(root, f)) for root, _, files in os.walk(path) for f in files)
+
+
+def _matrix_bytes(X):
+    return X.data.nbytes + X.indices.nbytes + X.indptr.nbytes
+
+
+def request_latencies_ms(bundles, texts):
+    """Per-request latency (ms) per bundle; requests alternate between bundles so drift hits all equally."""
+    served = {key: (CachedTfidfFeaturizer(b["vectorizer"]), b["model"]) for key, b in bundles.items()}
+    out = {key: [] for key in bundles}
+    for i, text in enumerate(texts[:50] + texts):
+        order = list(served) if i % 2 == 0 else list(reversed(list(served)))
+        for key in order:
+            featurizer, model = served[key]
+            started = time.perf_counter()
+            model.predict_proba(featurizer.transform([text]))
+            if i >= 50:  # the first 50 only warm the token caches and code paths
+                out[key].append((time.perf_counter() - started) * 1000)
+    return {key: np.array(v) for key, v in out.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="float32 vs float64 features: memory, time, latency, accuracy")
+    parser.add_argument("--dataset", type=str, default=None, help="Dataset JSON (default: the service's startup dataset)")
+    parser.add_argument("--requests", type=int, default=500, help="Single-description requests to time per model")
+    parser.add_argument("--output-json", type=str, default=None)
+    args = parser.parse_args()
+
+    ds_path = os.path.abspath(args.dataset or STARTUP_DATASET)
+    with open(ds_path, "r", encoding="utf-8") as f:
+        train_texts = [r["text"] for r in flatten_dataset(json.load(f))]
+    eval_sets = {}
+    for name, path in (("test", TEST_DATASET), ("holdout", REALWORLD_HOLDOUT_DATASET)):
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                eval_sets[name] = flatten_dataset(json.load(f))
+    request_texts = [r["text"] for r in eval_sets.get("test", [])][:args.requests] or train_texts[:args.requests]
+
+    runs, bundles, proba = {}, {}, {}
+    with tempfile.TemporaryDirectory(prefix="lob-dtype-bench-") as models_dir:
+        for dtype in DTYPES:
+            print(f"Training with {dtype} features...")
+            result = train_with_dtype(dtype, ds_path, models_dir)
+            version_dir = model_registry.version_dir(result["version"], models_dir)
+            bundle = bundles[dtype] = load_bundle(version_dir)
+            runs[dtype] = {
+                "trainSeconds": result["seconds"],
+                "finalFitSeconds": bundle["meta"].get("finalFit", {}).get("seconds"),
+                "peakRssMb": result["peakRssMb"],
+                "algorithm": bundle["meta"].get("algorithm"),
+                "featureMatrixBytes": _matrix_bytes(bundle["vectorizer"].transform(train_texts)),
+                "artifactBytes": _dir_bytes(version_dir),
+                "accuracy": {},
+            }
+            for name, rows in eval_sets.items():
+                X = bundle["vectorizer"].transform([r["text"] for r in rows])
+                proba[dtype, name] = bundle["model"].predict_proba(X)
+                pred = bundle["model"].classes_[proba[dtype, name].argmax(axis=1)]
+                runs[dtype]["accuracy"][name] = float(np.mean(pred == np.array([r["label"] for r in rows])))
+
+    for dtype, latencies in request_latencies_ms(bundles, request_texts).items():
+        runs[dtype]["requestLatencyMs"] = {
+            "p50": float(np.percentile(latencies, 50)),
+            "p95": float(np.percentile(latencies, 95)),
+            "mean": float(latencies.mean()),
+        }
+
+    parity = {}
+    for name in eval_sets:
+        a, b = proba["float64", name], proba["float32", name]
+        parity[name] = {
+            "top1Agreement": float(np.mean(a.argmax(axis=1) == b.argmax(axis=1))),
+            "maxProbaDiff": float(np.abs(a - b).max()),
+        }
+    report = {
+        "dataset": os.path.basename(ds_path),
+        "requests": len(request_texts),
+        "runs": runs,
+        "parity": parity,
+    }
+
+    print(f"\n{'':26s} {'float64':>12s} {'float32':>12s}")
+    rows = [
+        ("train() s", lambda r: f"{r['trainSeconds']:.1f}"),
+        ("final fit s", lambda r: f"{r['finalFitSeconds']:.2f}" if r["finalFitSeconds"] is not None else "n/a"),
+        ("peak RSS MB", lambda r: f"{r['peakRssMb']:.0f}" if r["peakRssMb"] is not None else "n/a"),
+        ("train features MB", lambda r: f"{r['featureMatrixBytes'] / 1e6:.1f}"),
+        ("artifacts MB", lambda r: f"{r['artifactBytes'] / 1e6:.1f}"),
+        ("request p50 / p95 ms", lambda r: f"{r['requestLatencyMs']['p50']:.2f}/{r['requestLatencyMs']['p95']:.2f}"),
+    ] + [(f"{name} accuracy", lambda r, n=name: f"{r['accuracy'][n]:.2%}") for name in eval_sets]
+    for label, cell in rows:
+        print(f"  {label:24s} {cell(runs['float64']):>12s} {cell(runs['float32']):>12s}")
+    for name, p in parity.items():
+        print(f"  {name}: top-1 agreement {p['top1Agreement']:.2%}, max |proba diff| {p['maxProbaDiff']:.1e}")
+
+    if args.output_json:
+        os.makedirs(os.path.dirname(args.output_json) or ".", exist_ok=True)
+        with open(args.output_json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nReport written to {args.output_json}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,123 @@
+"""
+Benchmark the cached serving featurizer against vectorizer.transform.
+
+Replays realistic traffic — held-out and real-world descriptions, one request
+at a time, in shuffled order with repeats — through both featurizers and
+reports per-request latency, cache hit rate and the maximum output difference.
+
+Usage:
+    python3 ai/scripts/benchmark_serving_featurizer.py [--requests 5000] [--cache-size 20000]
+                                                       [--output-json PATH]
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+import joblib
+import numpy as np
+
+from model_registry import active_model_dir
+from serving_featurizer import DEFAULT_CACHE_SIZE, CachedTfidfFeaturizer
+from train_lob_model import normalize_text
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+AI_ROOT = os.path.dirname(SCRIPT_DIR)
+MODELS_DIR = os.path.join(AI_ROOT, "models")
+TRAFFIC_DATASETS = [
+    os.path.join(AI_ROOT, "datasets", "lob_recommendation_test.json"),
+    os.path.join(AI_ROOT, "datasets", "lob_recommendation_realworld_holdout.json"),
+]
+
+
+def load_traffic(n_requests, seed):
+    descriptions = []
+    for path in TRAFFIC_DATASETS:
+        if not os.path.exists(path):
+            continue
+        with open(path, "r", encoding="utf-8") as f:
+            for entry in json.load(f):
+                desc = normalize_text(entry.get("businessDescription", ""))
+                if desc:
+                    descriptions.append(desc)
+    rng = random.Random(seed)
+    return [rng.choice(descriptions) for _ in range(n_requests)] if descriptions else []
+
+
+def time_requests(transform, texts):
+    timings = np.empty(len(texts))
+    for i, text in enumerate(texts):
+        t0 = time.perf_counter()
+        transform([text])
+        timings[i] = time.perf_counter() - t0
+    return {
+        "meanUs": float(timings.mean() * 1e6),
+        "p50Us": float(np.percentile(timings, 50) * 1e6),
+        "p95Us": float(np.percentile(timings, 95) * 1e6),
+        "p99Us": float(np.percentile(timings, 99) * 1e6),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark cached serving featurizer")
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--cache-size", type=int, default=DEFAULT_CACHE_SIZE)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output-json", type=str, default=None)
+    args = parser.parse_args()
+
+    vec_path = os.path.join(active_model_dir(MODELS_DIR), "lob_vectorizer.joblib")
+    if not os.path.exists(vec_path):
+        print(f"Vectorizer not found: {vec_path}. Train first with train_lob_model.py")
+        return 1
+
+    texts = load_traffic(args.requests, args.seed)
+    if not texts:
+        print("No traffic datasets found.")
+        return 1
+
+    vectorizer = joblib.load(vec_path)
+    featurizer = CachedTfidfFeaturizer(vectorizer, cache_size=args.cache_size)
+
+    diff = abs(vectorizer.transform(texts[:500]) - featurizer.transform(texts[:500]))
+    max_abs_diff = float(diff.max()) if diff.nnz else 0.0
+    featurizer.cache_clear()
+
+    baseline = time_requests(vectorizer.transform, texts)
+    cold = time_requests(featurizer.transform, texts)
+    cold_cache = featurizer.cache_info()
+    warm = time_requests(featurizer.transform, texts)
+
+    report = {
+        "requests": len(texts),
+        "uniqueDescriptions": len(set(texts)),
+        "cacheSize": args.cache_size,
+        "vectorizerTransform": baseline,
+        "cachedFirstPass": cold,
+        "cachedWarm": warm,
+        "firstPassHitRate": cold_cache["hits"] / max(1, cold_cache["hits"] + cold_cache["misses"]),
+        "cachedTokens": cold_cache["size"],
+        "speedupWarmMean": baseline["meanUs"] / warm["meanUs"] if warm["meanUs"] else None,
+        "maxAbsDiff": max_abs_diff,
+    }
+
+    print(f"Requests: {report['requests']} ({report['uniqueDescriptions']} unique descriptions)")
+    for name, key in (("vectorizer.transform", "vectorizerTransform"), ("cached (first pass)", "cachedFirstPass"), ("cached (warm)", "cachedWarm")):
+        r = report[key]
+        print(f"  {name:22s} mean={r['meanUs']:.1f}us  p50={r['p50Us']:.1f}us  p95={r['p95Us']:.1f}us  p99={r['p99Us']:.1f}us")
+    print(f"  First-pass token hit rate: {report['firstPassHitRate']:.1%} ({report['cachedTokens']} tokens cached)")
+    print(f"  Warm speedup: {report['speedupWarmMean']:.2f}x   max |diff| vs vectorizer: {max_abs_diff:.2e}")
+
+    if args.output_json:
+        os.makedirs(os.path.dirname(args.output_json) or ".", exist_ok=True)
+        with open(args.output_json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nReport written to {args.output_json}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
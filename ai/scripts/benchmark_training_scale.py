@@ -0,0 +1,176 @@
+"""
+Benchmark train() on synthetic corpora 10x / 50x / 100x the size of a base corpus.
+
+For each scale, a fresh process streams a balanced bilingual corpus of
+base x scale entries per language to NDJSON (generate_balanced_bilingual_dataset.iter_dataset),
+then trains on it, reading the file lazily, and publishes to a throwaway
+registry. The JSON report has, per scale: generation time and file size,
+train() wall time and peak RSS per stage (training_meta.json "stages",
+publishing derived from the total), overall peak RSS, and the size of each
+published artifact. A scale whose training raises or whose process dies (e.g.
+out of memory) is recorded with its error and exit code, and the run moves on.
+
+The default base is the 2000-per-language corpus behind
+lob_recommendation_dataset_balanced_4000.json; use --base-per-language to scale
+from something smaller. Trains use --no-tune --no-cascade unless --tune/--cascade.
+The JSON report goes to stdout unless --output-json is given (that file is
+rewritten after every scale, so a long run leaves partial results behind).
+
+Usage:
+    python3 ai/scripts/benchmark_training_scale.py [--base-per-language 2000] [--scales 10,50,100]
+                                                   [--tune] [--cascade] [--output-json PATH]
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from queue import Empty
+
+import model_registry
+from generate_balanced_bilingual_dataset import iter_dataset, load_labels, write_entries
+
+# How often the parent checks that a silent child (e.g. OOM-killed) is still alive
+CHILD_POLL_SECONDS = 5
+
+
+def _iter_ndjson(path):
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def _run_scale(per_language, workdir, skip_tune, build_cascade, queue):
+    # Runs in a spawned process so peak RSS belongs to this scale alone; always puts exactly one result
+    try:
+        from train_lob_model import _peak_rss_mb, train
+
+        corpus = os.path.join(workdir, "corpus.jsonl")
+        started = time.perf_counter()
+        entries = sum(1 for _ in write_entries(iter_dataset(load_labels(), per_language), corpus))
+        generate_seconds = time.perf_counter() - started
+        generate_rss = _peak_rss_mb()
+
+        models_dir = os.path.join(workdir, "models")
+        started = time.perf_counter()
+        version = train(_iter_ndjson(corpus), skip_tune=skip_tune, build_cascade=build_cascade, promote=False,
+                        models_dir=models_dir)
+        if not version:
+            raise RuntimeError("train() published no version (not enough data)")
+        queue.put({
+            "entries": entries,
+            "corpusBytes": os.path.getsize(corpus),
+            "generate": {"seconds": generate_seconds, "peakRssMb": generate_rss},
+            "trainSeconds": time.perf_counter() - started,
+            "peakRssMb": _peak_rss_mb(),
+            "version": version,
+            "modelsDir": models_dir,
+        })
+    except Exception as exc:
+        queue.put({"error": repr(exc)})
+
+
+def _child_result(proc, queue):
+    """The child's result, or {"error": ...} if it dies without one (e.g. killed by the OOM killer)."""
+    while True:
+        try:
+            return queue.get(timeout=CHILD_POLL_SECONDS)
+        except Empty:
+            if proc.is_alive():
+                continue
+            try:
+                # It may have put its result just before exiting
+                return queue.get(timeout=1)
+            except Empty:
+                return {"error": f"child process exited with code {proc.exitcode} without a result"}
+
+
+def run_scale(per_language, skip_tune, build_cascade):
+    """One scale's measurements, or {"error": ...} if training failed or the child died."""
+    ctx = multiprocessing.get_context("spawn")
+    queue = ctx.Queue()
+    with tempfile.TemporaryDirectory(prefix="lob-scale-bench-") as workdir:
+        proc = ctx.Process(target=_run_scale, args=(per_language, workdir, skip_tune, build_cascade, queue))
+        proc.start()
+        result = _child_result(proc, queue)
+        proc.join()
+        if "error" in result:
+            return dict(result, exitCode=proc.exitcode)
+        version_dir = model_registry.version_dir(result["version"], result.pop("modelsDir"))
+        with open(os.path.join(version_dir, model_registry.META_FILENAME), encoding="utf-8") as f:
+            meta = json.load(f)
+        result["artifactBytes"] = {
+            name: os.path.getsize(os.path.join(version_dir, name)) for name in sorted(os.listdir(version_dir))
+        }
+    stages = dict(meta.get("stages", {}))
+    stages["publish"] = {
+        "seconds": result["trainSeconds"] - sum(s["seconds"] for s in stages.values()),
+        "peakRssMb": result["peakRssMb"],
+    }
+    result.update({
+        "trainRows": meta.get("n_train_samples"),
+        "algorithm": meta.get("algorithm"),
+        "stages": stages,
+        "totalArtifactBytes": sum(result["artifactBytes"].values()),
+    })
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="train() wall time, memory and artifact size at 10x/50x/100x")
+    parser.add_argument("--base-per-language", type=int, default=2000,
+                        help="Entries per language in the 1x corpus (default: the balanced_4000 corpus)")
+    parser.add_argument("--scales", type=str, default="10,50,100")
+    parser.add_argument("--tune", action="store_true", help="Include hyperparameter tuning")
+    parser.add_argument("--cascade", action="store_true", help="Include the cascade first stage")
+    parser.add_argument("--output-json", type=str, default=None,
+                        help="Also write the JSON report here after every scale (default: print it to stdout)")
+    args = parser.parse_args()
+
+    scales = [int(s) for s in args.scales.split(",")]
+    if args.base_per_language < 1 or not scales or min(scales) < 1:
+        print("--base-per-language and every scale must be >= 1", file=sys.stderr)
+        return 1
+
+    report = {
+        "basePerLanguage": args.base_per_language,
+        "tune": args.tune,
+        "cascade": args.cascade,
+        "cpuCount": os.cpu_count(),
+        "runs": [],
+    }
+    for scale in scales:
+        per_language = args.base_per_language * scale
+        print(f"\n=== {scale}x: {per_language * 2} entries ===", flush=True)
+        run = run_scale(per_language, not args.tune, args.cascade)
+        run["scale"] = scale
+        if "error" in run:
+            print(f"  {scale}x failed: {run['error']}", flush=True)
+        report["runs"].append(run)
+        if args.output_json:
+            # Write after every scale so a long run leaves partial results behind
+            os.makedirs(os.path.dirname(args.output_json) or ".", exist_ok=True)
+            with open(args.output_json, "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=2)
+
+    print(f"\n{'scale':>6s} {'entries':>9s} {'rows':>9s} {'train s':>9s} {'peak MB':>8s} {'artifacts MB':>13s}")
+    for run in report["runs"]:
+        if "error" in run:
+            print(f"{run['scale']:>5d}x failed: {run['error']}")
+            continue
+        print(f"{run['scale']:>5d}x {run['entries']:9d} {run['trainRows']:9d} {run['trainSeconds']:9.1f} "
+              f"{run['peakRssMb'] or float('nan'):8.0f} {run['totalArtifactBytes'] / 1e6:13.1f}")
+        print("         " + ", ".join(f"{name} {s['seconds']:.1f}s" for name, s in run["stages"].items()))
+    if args.output_json:
+        print(f"\nReport written to {args.output_json}")
+    else:
+        print(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
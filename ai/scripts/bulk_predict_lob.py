@@ -0,0 +1,208 @@
+"""
+Offline bulk LOB prediction over a JSON, JSONL or CSV file.
+
+Each worker process loads the model artifacts once (after verifying their
+checksums, as the service does), then scores chunks of rows
+as a batch (one vectorizer/model call per chunk). Chunks are sharded across a
+process pool and results are written to JSONL in input order, one line per
+input row:
+
+    {"row": 0, "id": "...", "recommendations": [{..., "confidence": 0.91}, ...]}
+    {"row": 1, "recommendations": [], "noConfidentMatch": true}
+    {"row": 2, "error": "businessDescription must be at least 10 characters"}
+
+Input rows are objects with a businessDescription (or --text-field) and an
+optional id (--id-field); JSON input may also be a plain list of strings.
+
+Usage:
+    python3 ai/scripts/bulk_predict_lob.py INPUT --output OUT.jsonl [--workers 4]
+                                           [--chunk-size 256] [--top-k 5]
+                                           [--threshold 0.01] [--min-confidence 0.5]
+    python3 ai/scripts/bulk_predict_lob.py INPUT --scaling 4 [--output-json PATH]
+        Report rows/sec for 1..4 workers instead of writing predictions.
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from multiprocessing import Pool
+
+from lob_cascade import CascadeClassifier
+from model_registry import RegistryError, active_model_dir, load_bundle, verify_bundle
+from lob_scoring import build_prediction, load_label_map, score
+from lob_text import normalize_text
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+AI_ROOT = os.path.dirname(SCRIPT_DIR)
+MODELS_DIR = os.path.join(AI_ROOT, "models")
+TAXONOMY_PATH = os.path.join(AI_ROOT, "data", "line_of_business.json")
+MIN_DESCRIPTION_LENGTH = 10
+MAX_DESCRIPTION_LENGTH = 2000
+# Same switch as the service: score through the cascade first stage when one was trained
+CASCADE_ENABLED = os.environ.get("LOB_CASCADE_ENABLED", "").strip().lower() in ("1", "true", "yes")
+
+# Per-process state, populated by _init_worker
+_worker = {}
+
+
+def load_rows(path, text_field="businessDescription", id_field="id"):
+    """Read (id, description) pairs from a .json, .jsonl/.ndjson or .csv file."""
+    ext = os.path.splitext(path)[1].lower()
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        if ext == ".csv":
+            records = list(csv.DictReader(f))
+        elif ext in (".jsonl", ".ndjson"):
+            records = [json.loads(line) for line in f if line.strip()]
+        else:
+            records = json.load(f)
+    rows = []
+    for rec in records:
+        if isinstance(rec, str):
+            rows.append((None, rec))
+        else:
+            rows.append((rec.get(id_field), rec.get(text_field) or ""))
+    return rows
+
+
+def _init_worker(models_dir, taxonomy_path, top_k, threshold, min_confidence):
+    bundle = load_bundle(models_dir)
+    cascade_threshold = (bundle["meta"].get("cascade") or {}).get("threshold")
+    cascade = None
+    if CASCADE_ENABLED and bundle["stage1"] is not None and cascade_threshold is not None:
+        cascade = CascadeClassifier(bundle["stage1"], bundle["model"], cascade_threshold)
+    _worker.update(
+        vectorizer=bundle["vectorizer"],
+        model=bundle["model"],
+        cascade=cascade,
+        labels=bundle["labels"],
+        label_map=load_label_map(taxonomy_path),
+        top_k=top_k,
+        threshold=threshold,
+        min_confidence=min_confidence,
+    )
+
+
+def predict_chunk(task):
+    """Score one (start row, [(id, description), ...]) chunk; returns a list of output dicts."""
+    start, rows = task
+    w = _worker
+    results = [None] * len(rows)
+    valid, texts = [], []
+    for i, (row_id, desc) in enumerate(rows):
+        desc = normalize_text(desc)
+        out = {"row": start + i}
+        if row_id is not None:
+            out["id"] = row_id
+        if len(desc) < MIN_DESCRIPTION_LENGTH:
+            out["error"] = f"businessDescription must be at least {MIN_DESCRIPTION_LENGTH} characters"
+        elif len(desc) > MAX_DESCRIPTION_LENGTH:
+            out["error"] = f"businessDescription must be <= {MAX_DESCRIPTION_LENGTH} characters"
+        else:
+            valid.append(i)
+            texts.append(desc)
+        results[i] = out
+    if texts:
+        proba = score(w["model"], w["vectorizer"].transform(texts), w["labels"], w["cascade"])
+        for i, row in zip(valid, proba):
+            results[i].update(
+                build_prediction(row, w["labels"], w["label_map"], w["top_k"], w["threshold"], w["min_confidence"])
+            )
+    return results
+
+
+def run(rows, workers, chunk_size, init_args, out=None):
+    """Score rows with `workers` processes (0/1 = in-process); returns elapsed seconds incl. worker startup."""
+    tasks = [(i, rows[i:i + chunk_size]) for i in range(0, len(rows), chunk_size)]
+    t0 = time.perf_counter()
+    if workers <= 1:
+        _init_worker(*init_args)
+        results = map(predict_chunk, tasks)
+        pool = None
+    else:
+        pool = Pool(workers, initializer=_init_worker, initargs=init_args)
+        # imap keeps input order while later chunks are still being scored
+        results = pool.imap(predict_chunk, tasks)
+    try:
+        for chunk in results:
+            if out is not None:
+                out.writelines(json.dumps(r, ensure_ascii=False) + "\n" for r in chunk)
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+    return time.perf_counter() - t0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline bulk LOB prediction")
+    parser.add_argument("input", help="JSON, JSONL/NDJSON or CSV file of descriptions")
+    parser.add_argument("--output", type=str, default=None, help="JSONL output path (default: stdout)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk-size", type=int, default=256)
+    parser.add_argument("--text-field", type=str, default="businessDescription")
+    parser.add_argument("--id-field", type=str, default="id")
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--threshold", type=float, default=0.01)
+    parser.add_argument("--min-confidence", type=float, default=0.50)
+    parser.add_argument("--models-dir", type=str, default=None,
+                        help="Model bundle directory (default: the current registry version)")
+    parser.add_argument("--scaling", type=int, default=None, metavar="N",
+                        help="Benchmark rows/sec for 1..N workers instead of writing predictions")
+    parser.add_argument("--output-json", type=str, default=None, help="Write the --scaling report here")
+    args = parser.parse_args()
+
+    args.models_dir = args.models_dir or active_model_dir(MODELS_DIR)
+    if not os.path.exists(os.path.join(args.models_dir, "lob_model.joblib")):
+        print(f"Model not found in {args.models_dir}. Train first with train_lob_model.py", file=sys.stderr)
+        return 1
+    try:
+        # Workers verify again when they load; checking here first gives a clean error instead of failing workers
+        verify_bundle(args.models_dir)
+    except RegistryError as exc:
+        print(f"Refusing to load model: {exc}", file=sys.stderr)
+        return 1
+    if args.chunk_size < 1:
+        print("--chunk-size must be >= 1", file=sys.stderr)
+        return 1
+
+    rows = load_rows(args.input, args.text_field, args.id_field)
+    init_args = (args.models_dir, TAXONOMY_PATH, args.top_k, args.threshold, args.min_confidence)
+
+    if args.scaling:
+        report = {"rows": len(rows), "chunkSize": args.chunk_size, "cpuCount": os.cpu_count(), "runs": []}
+        for workers in range(1, args.scaling + 1):
+            elapsed = run(rows, workers, args.chunk_size, init_args)
+            rate = len(rows) / elapsed if elapsed else 0.0
+            report["runs"].append({"workers": workers, "seconds": round(elapsed, 3), "rowsPerSec": round(rate, 1)})
+            print(f"  workers={workers:2d}  {elapsed:7.2f}s  {rate:9.1f} rows/sec", file=sys.stderr)
+        base = report["runs"][0]["rowsPerSec"]
+        for r in report["runs"]:
+            r["speedup"] = round(r["rowsPerSec"] / base, 2) if base else None
+        if args.output_json:
+            os.makedirs(os.path.dirname(args.output_json) or ".", exist_ok=True)
+            with open(args.output_json, "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=2)
+        else:
+            print(json.dumps(report, indent=2))
+        return 0
+
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+        out = open(args.output, "w", encoding="utf-8")
+    else:
+        out = sys.stdout
+    try:
+        elapsed = run(rows, args.workers, args.chunk_size, init_args, out)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    print(f"Scored {len(rows)} rows with {args.workers} worker(s) in {elapsed:.2f}s "
+          f"({len(rows) / elapsed if elapsed else 0:.1f} rows/sec)", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
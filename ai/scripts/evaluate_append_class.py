@@ -0,0 +1,157 @@
+"""
+Benchmark appending a class (lob_incremental.py --append-classes) against a full train().
+
+Holds one label out of the dataset, trains a model without it, appends the label
+from its held-out entries (the label must not occur in the low-recall batches
+train() always folds in, or the base model would already know it), and trains a full model on everything for comparison.
+Reports wall time for both, checks that the classes the base model already knew
+score exactly as before (their decision scores per calibration fold, and their
+top-1 predictions on every row not claimed by the new label), and compares the
+new label's recall and overall top-1 accuracy with the full retrain on the fixed
+test set, the real-world holdout and the held-out label's own rows.
+
+Both full trains use --no-tune --no-cascade. Models go to a throwaway registry,
+never ai/models.
+
+Usage:
+    python3 ai/scripts/evaluate_append_class.py [--dataset PATH] [--label "TAX|Detailed line"]
+                                                [--output-json PATH]
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from collections import Counter
+
+import numpy as np
+
+import model_registry
+from evaluate_incremental_update import TEST_DATASET, predict
+from lob_artifact_cache import STARTUP_DATASET
+from lob_incremental import append_classes_update, linear_estimators
+from train_lob_model import (
+    REALWORLD_HOLDOUT_DATASET,
+    flatten_dataset,
+    load_bundle,
+    load_optional_low_recall_rows,
+    train,
+)
+
+
+def _entry_labels(entry):
+    return {r["label"] for r in flatten_dataset([entry])}
+
+
+def _timed_train(dataset, models_dir):
+    started = time.perf_counter()
+    version = train(dataset, skip_tune=True, build_cascade=False, promote=False, models_dir=models_dir)
+    if not version:
+        raise RuntimeError("Training failed (not enough data?)")
+    return version, time.perf_counter() - started
+
+
+def max_existing_score_diff(base_model, appended_model, label, X):
+    """Largest change in any existing class's decision score, over all calibration folds."""
+    idx = list(appended_model.classes_).index(label)
+    diff = 0.0
+    for before, after in zip(linear_estimators(base_model), linear_estimators(appended_model)):
+        kept = np.delete(after.decision_function(X), idx, axis=1)
+        diff = max(diff, float(np.abs(kept - before.decision_function(X)).max()))
+    return diff
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Append-a-class vs full train(): time and prediction stability")
+    parser.add_argument("--dataset", type=str, default=None, help="Dataset JSON (default: the service's startup dataset)")
+    parser.add_argument("--label", type=str, default=None,
+                        help="Label to hold out and append (default: the median-frequency eligible label)")
+    parser.add_argument("--output-json", type=str, default=None)
+    args = parser.parse_args()
+
+    ds_path = args.dataset or STARTUP_DATASET
+    with open(ds_path, "r", encoding="utf-8") as f:
+        entries = json.load(f)
+    always_trained = {r["label"] for r in load_optional_low_recall_rows(ds_path)}
+    counts = Counter(r["label"] for r in flatten_dataset(entries))
+    eligible = sorted((l for l in counts if l not in always_trained), key=lambda l: (counts[l], l))
+    label = args.label or (eligible[len(eligible) // 2] if eligible else None)
+    if label not in eligible:
+        print(f"Label {label!r} does not occur in {ds_path} or is also in the low-recall batches")
+        return 1
+    base = [e for e in entries if label not in _entry_labels(e)]
+    added = [e for e in entries if label in _entry_labels(e)]
+    print(f"Appending {label!r}: {len(added)} entries held out, {len(base)} base entries")
+
+    eval_sets = {"labelRows": [r for r in flatten_dataset(added) if r["label"] == label]}
+    for name, path in (("test", TEST_DATASET), ("holdout", REALWORLD_HOLDOUT_DATASET)):
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                eval_sets[name] = flatten_dataset(json.load(f))
+
+    with tempfile.TemporaryDirectory(prefix="lob-append-eval-") as models_dir:
+        base_version, base_seconds = _timed_train(base, models_dir)
+        appended_version, info = append_classes_update(added, base_version, negative_entries=base, promote=False,
+                                                       models_dir=models_dir)
+        full_version, full_seconds = _timed_train(entries, models_dir)
+        models = {
+            "base": load_bundle(model_registry.version_dir(base_version, models_dir)),
+            "appended": load_bundle(model_registry.version_dir(appended_version, models_dir)),
+            "fullRetrain": load_bundle(model_registry.version_dir(full_version, models_dir)),
+        }
+
+    checks, results = {}, {}
+    for s, rows in eval_sets.items():
+        if not rows:
+            continue
+        X = models["base"]["vectorizer"].transform([r["text"] for r in rows])
+        y = np.array([r["label"] for r in rows])
+        pred = {name: predict(b, rows) for name, b in models.items()}
+        not_new = pred["appended"] != label
+        checks[s] = {
+            "maxExistingScoreDiff": max_existing_score_diff(models["base"]["model"], models["appended"]["model"], label, X),
+            "existingPredictionsUnchanged": bool(np.array_equal(pred["appended"][not_new], pred["base"][not_new])),
+            "rowsClaimedByNewLabel": int((~not_new).sum()),
+        }
+        has_label = y == label
+        results[s] = {
+            name: {
+                "accuracy": float(np.mean(p == y)),
+                "newLabelRecall": float(np.mean(p[has_label] == label)) if has_label.any() else None,
+            }
+            for name, p in pred.items() if name != "base"
+        }
+
+    report = {
+        "dataset": os.path.basename(ds_path),
+        "label": label,
+        "heldOutEntries": len(added),
+        "append": info["classes"],
+        "seconds": {"baseTrain": base_seconds, "append": info["seconds"], "fullTrain": full_seconds},
+        "speedup": full_seconds / info["seconds"] if info["seconds"] else None,
+        "existingClasses": checks,
+        "results": results,
+    }
+
+    print(f"\nAppend: {info['seconds']:.2f}s vs full train() {full_seconds:.1f}s ({report['speedup']:.0f}x)")
+    for s, c in checks.items():
+        print(
+            f"  {s:10s} existing scores max |diff| {c['maxExistingScoreDiff']:.1e}, predictions unchanged: "
+            f"{c['existingPredictionsUnchanged']} ({c['rowsClaimedByNewLabel']} rows now {label!r})"
+        )
+        for name, r in results[s].items():
+            recall = "n/a" if r["newLabelRecall"] is None else f"{r['newLabelRecall']:.1%}"
+            print(f"    {name:12s} accuracy {r['accuracy']:.2%}  new-label recall {recall}")
+
+    if args.output_json:
+        os.makedirs(os.path.dirname(args.output_json) or ".", exist_ok=True)
+        with open(args.output_json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nReport written to {args.output_json}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,142 @@
+"""
+Measure how far incremental updates (lob_incremental.py) drift from a full retrain.
+
+Splits the dataset's entries (seeded) into a base part and a "new rows" part,
+trains a model on the base part, folds the new rows into it incrementally, and
+trains a full model on base + new rows the way the periodic retrain would. All
+three are scored on the fixed test set, the real-world holdout (when present)
+and the new rows themselves; drift = full retrain accuracy - incremental accuracy.
+Top-1 agreement with the full retrain is reported too, since it shows drift even
+where both models are already near 100% accurate.
+
+Both full trains use --no-tune --no-cascade so the comparison isolates the update
+method. Models go to a throwaway registry, never ai/models.
+
+Usage:
+    python3 ai/scripts/evaluate_incremental_update.py [--dataset PATH] [--new-fraction 0.1]
+                                                      [--seed 42] [--epochs 5] [--output-json PATH]
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+import model_registry
+from lob_artifact_cache import STARTUP_DATASET
+from lob_incremental import DEFAULT_EPOCHS, incremental_update
+from train_lob_model import REALWORLD_HOLDOUT_DATASET, flatten_dataset, load_bundle, train
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+AI_ROOT = os.path.dirname(SCRIPT_DIR)
+TEST_DATASET = os.path.join(AI_ROOT, "datasets", "lob_recommendation_test.json")
+
+
+def split_entries(entries, new_fraction, seed):
+    """Seeded split into (base, new); new entries whose labels never occur in base are dropped."""
+    shuffled = list(entries)
+    random.Random(seed).shuffle(shuffled)
+    n_new = max(1, int(len(shuffled) * new_fraction))
+    base, new = shuffled[n_new:], shuffled[:n_new]
+    base_labels = {r["label"] for r in flatten_dataset(base)}
+    kept = [e for e in new if {r["label"] for r in flatten_dataset([e])} <= base_labels]
+    return base, kept, len(new) - len(kept)
+
+
+def predict(bundle, rows):
+    return bundle["model"].predict(bundle["vectorizer"].transform([r["text"] for r in rows]))
+
+
+def accuracy(bundle, rows):
+    rows = [r for r in rows if r["label"] in set(bundle["labels"])]
+    if not rows:
+        return None
+    return float(np.mean(predict(bundle, rows) == np.array([r["label"] for r in rows])))
+
+
+def _timed_train(dataset, models_dir):
+    started = time.perf_counter()
+    version = train(dataset, skip_tune=True, build_cascade=False, promote=False, models_dir=models_dir)
+    if not version:
+        raise RuntimeError("Training failed (not enough data?)")
+    return version, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Accuracy drift of incremental updates vs a full retrain")
+    parser.add_argument("--dataset", type=str, default=None, help="Dataset JSON (default: the service's startup dataset)")
+    parser.add_argument("--new-fraction", type=float, default=0.1, help="Share of entries held back as new rows")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--epochs", type=int, default=DEFAULT_EPOCHS)
+    parser.add_argument("--output-json", type=str, default=None)
+    args = parser.parse_args()
+
+    ds_path = args.dataset or STARTUP_DATASET
+    with open(ds_path, "r", encoding="utf-8") as f:
+        entries = json.load(f)
+    base, new, dropped = split_entries(entries, args.new_fraction, args.seed)
+    print(f"{len(base)} base entries, {len(new)} new entries ({dropped} dropped: labels unseen in base)")
+
+    eval_sets = {"newRows": flatten_dataset(new)}
+    for name, path in (("test", TEST_DATASET), ("holdout", REALWORLD_HOLDOUT_DATASET)):
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                eval_sets[name] = flatten_dataset(json.load(f))
+
+    with tempfile.TemporaryDirectory(prefix="lob-incremental-eval-") as models_dir:
+        base_version, base_seconds = _timed_train(base, models_dir)
+        incremental_version, info = incremental_update(new, base_version, epochs=args.epochs, promote=False,
+                                                       models_dir=models_dir, base_entries=base)
+        full_version, full_seconds = _timed_train(base + new, models_dir)
+
+        models = {
+            "base": load_bundle(model_registry.version_dir(base_version, models_dir)),
+            "incremental": load_bundle(model_registry.version_dir(incremental_version, models_dir)),
+            "fullRetrain": load_bundle(model_registry.version_dir(full_version, models_dir)),
+        }
+        results = {name: {s: accuracy(b, rows) for s, rows in eval_sets.items()} for name, b in models.items()}
+        agreement = {
+            s: float(np.mean(predict(models["incremental"], rows) == predict(models["fullRetrain"], rows)))
+            for s, rows in eval_sets.items() if rows
+        }
+
+    drift = {
+        s: (None if results["fullRetrain"][s] is None or results["incremental"][s] is None
+            else results["fullRetrain"][s] - results["incremental"][s])
+        for s in eval_sets
+    }
+    report = {
+        "dataset": os.path.basename(ds_path),
+        "baseEntries": len(base),
+        "newEntries": len(new),
+        "newRows": info["rows"],
+        "droppedNewEntries": dropped,
+        "epochs": args.epochs,
+        "evalRows": {s: len(rows) for s, rows in eval_sets.items()},
+        "accuracy": results,
+        "drift": drift,
+        "agreementWithFullRetrain": agreement,
+        "seconds": {"baseTrain": base_seconds, "incrementalUpdate": info["seconds"], "fullRetrain": full_seconds},
+    }
+
+    print(f"\nIncremental update: {info['rows']} rows in {info['seconds']:.2f}s (full retrain {full_seconds:.1f}s)")
+    print(f"  {'set':10s} {'base':>8s} {'incr.':>8s} {'full':>8s} {'drift':>8s} {'agree':>8s}")
+    for s in eval_sets:
+        cells = [results[m][s] for m in ("base", "incremental", "fullRetrain")] + [drift[s], agreement.get(s)]
+        print(f"  {s:10s} " + " ".join("     n/a" if v is None else f"{v:8.2%}" for v in cells))
+
+    if args.output_json:
+        os.makedirs(os.path.dirname(args.output_json) or ".", exist_ok=True)
+        with open(args.output_json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nReport written to {args.output_json}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
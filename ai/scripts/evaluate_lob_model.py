@@ -5,7 +5,7 @@ Uses ai/datasets/lob_recommendation_test.json (from the split script) as a
 fixed unseen test set by default.
 
 Usage:
-    python3 ai/scripts/evaluate_lob_model.py [--dataset PATH]
+    python3 ai/scripts/evaluate_lob_model.py [--dataset PATH] [--cascade]
 
 Metrics:
   - Accuracy (Top-1): % of test rows where the model's single best guess is correct.
@@ -14,17 +14,23 @@ Metrics:
   - F1 (macro/weighted): harmonic mean of precision and recall.
   - Top-3/Top-5 accuracy: % where the correct LOB appears in top-N suggestions.
   - Per-class recall: which LOBs the model misses most.
+  - Cascade (--cascade): escalation rate, top-1 accuracy parity and per-request
+    scoring latency of the ComplementNB-first cascade vs the full model.
 """
 
 import argparse
 import json
 import os
 import sys
+import time
 from collections import defaultdict
 
 import joblib
 import numpy as np
 from sklearn.metrics import accuracy_score, f1_score, precision_score, recall_score
+from lob_cascade import STAGE1_FILENAME, CascadeClassifier
+from model_registry import active_model_dir
+import resource_governor
 from train_lob_model import normalize_text
 
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -75,12 +81,60 @@ def summarize_confidence_gates(y_true_idx, pred_idx, top_probs, thresholds=None)
     return rows, recommended
 
 
+def evaluate_cascade(model, X_test_vec, y_true_idx):
+    """Compare the confidence cascade with the full model, one request (row) at a time.
+
+    Returns a metrics dict, or None if no cascade first stage was trained.
+    """
+    model_dir = active_model_dir(MODELS_DIR)
+    meta_path = os.path.join(model_dir, "training_meta.json")
+    stage1_path = os.path.join(model_dir, STAGE1_FILENAME)
+    if not os.path.exists(meta_path) or not os.path.exists(stage1_path):
+        return None
+    with open(meta_path, "r", encoding="utf-8") as f:
+        threshold = (json.load(f).get("cascade") or {}).get("threshold")
+    if threshold is None:
+        return None
+    cascade = CascadeClassifier(joblib.load(stage1_path), model, threshold)
+
+    n = X_test_vec.shape[0]
+    full_idx = np.empty(n, dtype=int)
+    cascade_idx = np.empty(n, dtype=int)
+    full_seconds = cascade_seconds = 0.0
+    for i in range(n):
+        row = X_test_vec[i : i + 1]
+        t0 = time.perf_counter()
+        full_idx[i] = int(np.argmax(model.predict_proba(row)[0]))
+        t1 = time.perf_counter()
+        cascade_idx[i] = int(np.argmax(cascade.predict_proba(row)[0]))
+        t2 = time.perf_counter()
+        full_seconds += t1 - t0
+        cascade_seconds += t2 - t1
+
+    stats = cascade.stats()
+    full_acc = float(np.mean(full_idx == y_true_idx))
+    cascade_acc = float(np.mean(cascade_idx == y_true_idx))
+    return {
+        "threshold": float(threshold),
+        "escalationRate": stats["escalationRate"],
+        "accuracyFull": full_acc,
+        "accuracyCascade": cascade_acc,
+        "accuracyDelta": cascade_acc - full_acc,
+        "agreement": float(np.mean(full_idx == cascade_idx)),
+        "meanLatencyMsFull": full_seconds / n * 1000.0,
+        "meanLatencyMsCascade": cascade_seconds / n * 1000.0,
+        "latencyReduction": 1.0 - cascade_seconds / full_seconds if full_seconds else 0.0,
+    }
+
+
 def main():
     parser = argparse.ArgumentParser(description="Evaluate LOB model on held-out data")
     parser.add_argument("--dataset", type=str, default=None,
                         help="Path to test dataset JSON. Defaults to lob_recommendation_test.json if it exists.")
     parser.add_argument("--output-json", type=str, default=None,
                         help="If set, write metrics to this JSON file (e.g. ai/models/evaluation_metrics.json)")
+    parser.add_argument("--cascade", action="store_true",
+                        help="Also evaluate the ComplementNB-first confidence cascade against the full model")
     args = parser.parse_args()
 
     # Determine test dataset: explicit arg > fixed test file
@@ -99,9 +153,10 @@ def main():
         print(f"Dataset not found: {ds_path}")
         return 1
 
-    vec_path = os.path.join(MODELS_DIR, "lob_vectorizer.joblib")
-    model_path = os.path.join(MODELS_DIR, "lob_model.joblib")
-    labels_path = os.path.join(MODELS_DIR, "lob_labels.json")
+    model_dir = active_model_dir(MODELS_DIR)
+    vec_path = os.path.join(model_dir, "lob_vectorizer.joblib")
+    model_path = os.path.join(model_dir, "lob_model.joblib")
+    labels_path = os.path.join(model_dir, "lob_labels.json")
     for p in [vec_path, model_path, labels_path]:
         if not os.path.exists(p):
             print(f"Model artifact not found: {p}. Train first with train_lob_model.py")
@@ -249,6 +304,24 @@ def main():
     if len(recalls) > 15:
         print(f"  ... ({len(recalls) - 15} more with 100% recall)")
 
+    cascade_metrics = None
+    if args.cascade:
+        print("\n--- Confidence cascade vs full model (per-request scoring) ---")
+        cascade_metrics = evaluate_cascade(model, X_test_vec, y_true_idx)
+        if cascade_metrics is None:
+            print("  No cascade first stage found; retrain without --no-cascade.")
+        else:
+            print(f"  Threshold:        {cascade_metrics['threshold']:.4f}")
+            print(f"  Escalation rate:  {cascade_metrics['escalationRate']:.1%}")
+            print(
+                f"  Top-1 accuracy:   cascade {cascade_metrics['accuracyCascade']:.2%} vs full "
+                f"{cascade_metrics['accuracyFull']:.2%} (delta {cascade_metrics['accuracyDelta']:+.2%})"
+            )
+            print(
+                f"  Mean latency:     cascade {cascade_metrics['meanLatencyMsCascade']:.3f}ms vs full "
+                f"{cascade_metrics['meanLatencyMsFull']:.3f}ms ({cascade_metrics['latencyReduction']:.1%} lower)"
+            )
+
     print("\n--- Summary ---")
     print(f"  Accuracy (Top-1): {acc1:.1%}")
     print(f"  Precision (macro): {precision_macro:.4f}  Recall (macro): {recall_macro:.4f}  F1 (macro): {f1_macro:.4f}")
@@ -272,6 +345,8 @@ def main():
             "confidenceGates": confidence_gate_rows,
             "recommended95PrecisionGate": confidence_gate_recommended,
         }
+        if cascade_metrics is not None:
+            metrics["cascade"] = cascade_metrics
         with open(args.output_json, "w", encoding="utf-8") as f:
             json.dump(metrics, f, indent=2)
         print(f"\nMetrics written to {args.output_json}")
@@ -280,4 +355,5 @@ def main():
 
 
 if __name__ == "__main__":
-    sys.exit(main())
+    with resource_governor.limit("evaluation"):
+        sys.exit(main())
@@ -0,0 +1,121 @@
+"""
+Compare training with and without the near-duplicate cap (train_lob_model.py --near-dup-cap).
+
+Trains once uncapped and once per cap, and reports for each the training rows
+kept, train() wall time, artifact size and top-1 accuracy on the fixed test set
+and the real-world holdout. Test/holdout rows with a near-duplicate in the
+training dataset are also scored separately, since a cap mostly changes how the
+model treats rows it has (nearly) seen.
+
+All trains use --no-tune --no-cascade. Models go to a throwaway registry,
+never ai/models.
+
+Usage:
+    python3 ai/scripts/evaluate_near_dup_cap.py [--dataset PATH] [--caps 1,3,5] [--output-json PATH]
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+import model_registry
+from evaluate_incremental_update import TEST_DATASET, predict
+from lob_artifact_cache import STARTUP_DATASET
+from lob_near_dup import cluster_near_duplicates
+from train_lob_model import REALWORLD_HOLDOUT_DATASET, flatten_dataset, load_bundle, train
+
+
+def _dir_bytes(path):
+    return sum(os.path.getsize(os.path.join(root, f)) for root, _, files in os.walk(path) for f in files)
+
+
+def near_duplicate_mask(train_texts, eval_texts):
+    """True for each eval text that shares a near-duplicate cluster with some training text."""
+    ids = cluster_near_duplicates(list(train_texts) + list(eval_texts))
+    train_clusters = set(ids[:len(train_texts)])
+    return np.array([cid in train_clusters for cid in ids[len(train_texts):]], dtype=bool)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Training size and accuracy with the near-duplicate cap")
+    parser.add_argument("--dataset", type=str, default=None, help="Dataset JSON (default: the service's startup dataset)")
+    parser.add_argument("--caps", type=str, default="1,3,5", help="Comma-separated per-(cluster, label) caps")
+    parser.add_argument("--output-json", type=str, default=None)
+    args = parser.parse_args()
+
+    ds_path = args.dataset or STARTUP_DATASET
+    with open(ds_path, "r", encoding="utf-8") as f:
+        entries = json.load(f)
+    train_texts = sorted({r["text"] for r in flatten_dataset(entries)})
+
+    eval_sets = {}
+    for name, path in (("test", TEST_DATASET), ("holdout", REALWORLD_HOLDOUT_DATASET)):
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                rows = flatten_dataset(json.load(f))
+            seen = near_duplicate_mask(train_texts, [r["text"] for r in rows])
+            eval_sets[name] = (rows, seen)
+            print(f"{name}: {len(rows)} rows, {int(seen.sum())} with a near-duplicate in {os.path.basename(ds_path)}")
+
+    runs = []
+    with tempfile.TemporaryDirectory(prefix="lob-near-dup-eval-") as models_dir:
+        for cap in [None] + [int(c) for c in args.caps.split(",")]:
+            started = time.perf_counter()
+            version = train(entries, skip_tune=True, build_cascade=False, promote=False, models_dir=models_dir,
+                            near_dup_cap=cap)
+            seconds = time.perf_counter() - started
+            if not version:
+                print(f"Training failed with cap {cap}")
+                return 1
+            version_dir = model_registry.version_dir(version, models_dir)
+            bundle = load_bundle(version_dir)
+            run = {
+                "cap": cap,
+                "trainRows": bundle["meta"].get("n_train_samples"),
+                "rowsDropped": (bundle["meta"].get("nearDuplicates") or {}).get("rowsDropped", 0),
+                "algorithm": bundle["meta"].get("algorithm"),
+                "seconds": seconds,
+                "artifactBytes": _dir_bytes(version_dir),
+                "accuracy": {},
+            }
+            for name, (rows, seen) in eval_sets.items():
+                correct = predict(bundle, rows) == np.array([r["label"] for r in rows])
+                run["accuracy"][name] = {
+                    "all": float(correct.mean()),
+                    "nearDuplicateOfTrain": float(correct[seen].mean()) if seen.any() else None,
+                    "novel": float(correct[~seen].mean()) if (~seen).any() else None,
+                }
+            runs.append(run)
+
+    report = {
+        "dataset": os.path.basename(ds_path),
+        "evalRows": {name: {"rows": len(rows), "nearDuplicateOfTrain": int(seen.sum())}
+                     for name, (rows, seen) in eval_sets.items()},
+        "runs": runs,
+    }
+
+    fmt = lambda v: "     n/a" if v is None else f"{v:8.2%}"
+    print(f"\n{'cap':>5s} {'rows':>7s} {'train s':>8s} {'MB':>6s}  " + "  ".join(
+        f"{name + ' all/dup/novel':>26s}" for name in eval_sets))
+    for run in runs:
+        cells = "  ".join(
+            " ".join(fmt(a[k]) for k in ("all", "nearDuplicateOfTrain", "novel")) for a in run["accuracy"].values()
+        )
+        print(f"{str(run['cap'] or '-'):>5s} {run['trainRows']:7d} {run['seconds']:8.1f} "
+              f"{run['artifactBytes'] / 1e6:6.1f}  {cells}")
+
+    if args.output_json:
+        os.makedirs(os.path.dirname(args.output_json) or ".", exist_ok=True)
+        with open(args.output_json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nReport written to {args.output_json}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
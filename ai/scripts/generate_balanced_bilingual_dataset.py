@@ -6,10 +6,17 @@ Creates a synthetic-but-structured dataset with:
 - exact N Filipino flattened rows
 - one recommendation per entry (so flattened rows == entries)
 
+With --stream, entries are generated and written one at a time (see
+iter_dataset) so corpora of any size fit in bounded memory; an output path
+ending in .jsonl/.ndjson is written as NDJSON, anything else as a JSON array.
+
 Usage:
   python3 ai/scripts/generate_balanced_bilingual_dataset.py \
     --target-per-language 2000 \
     --output ai/datasets/lob_recommendation_dataset_balanced_4000.json
+
+  python3 ai/scripts/generate_balanced_bilingual_dataset.py --stream \
+    --target-per-language 200000 --output /tmp/lob_400k.jsonl
 """
 
 import argparse
@@ -171,11 +178,63 @@ def generate_dataset(labels, target_per_language, seed=20260316, shuffle=True):
     return rows
 
 
+def iter_dataset(labels, target_per_language, seed=20260316):
+    """Yield entries one at a time in bounded memory, interleaving labels round-robin.
+
+    Unlike generate_dataset() nothing is collected or shuffled globally: each label
+    has its own RNG seeded from (seed, label), and each round yields one English and
+    one Filipino entry per label that still needs rows, so every prefix of the
+    stream is balanced. Repeats are detected per label and language against the
+    unsuffixed descriptions only, of which there are at most
+    len(customers) * len(locations) * 3! (384), however large the corpus.
+    """
+    per_label_counts = distribute_counts(target_per_language, len(labels))
+    rngs = [random.Random(f"{seed}/{label['taxCode']}|{label['detailedLine']}") for label in labels]
+    seen = [{"english": set(), "filipino": set()} for _ in labels]
+    builders = (
+        ("english", build_english_description, "Branch reference EN"),
+        ("filipino", build_filipino_description, "Reference FIL"),
+    )
+
+    for i in range(max(per_label_counts, default=0)):
+        for idx, label in enumerate(labels):
+            if i >= per_label_counts[idx]:
+                continue
+            for language, build, reference in builders:
+                desc = build(label, i, rngs[idx])
+                if desc in seen[idx][language]:
+                    desc = f"{desc} {reference}-{idx + 1:03d}-{i + 1:03d}."
+                else:
+                    seen[idx][language].add(desc)
+                yield {
+                    "businessDescription": desc,
+                    "language": language,
+                    "recommendations": [dict(label)],
+                }
+
+
+def write_entries(entries, path):
+    """Write entries to path as they are produced (NDJSON for .jsonl/.ndjson, else a JSON array), yielding each."""
+    ndjson = path.endswith((".jsonl", ".ndjson"))
+    with open(path, "w", encoding="utf-8") as f:
+        if not ndjson:
+            f.write("[")
+        for n, entry in enumerate(entries):
+            line = json.dumps(entry, ensure_ascii=False)
+            f.write(f"{line}\n" if ndjson else f"{',' if n else ''}\n  {line}")
+            yield entry
+        if not ndjson:
+            f.write("\n]\n")
+
+
 def summarize(rows):
+    """Summary counts for a list or a one-shot iterable of entries."""
     lang_counter = Counter()
     label_counter = Counter()
+    total_entries = 0
 
     for entry in rows:
+        total_entries += 1
         lang = (entry.get("language") or "unknown").lower().strip()
         for rec in entry.get("recommendations", []):
             tax = rec.get("taxCode", "")
@@ -186,7 +245,7 @@ def summarize(rows):
             lang_counter[lang] += 1
 
     return {
-        "totalEntries": len(rows),
+        "totalEntries": total_entries,
         "flattenedRows": sum(label_counter.values()),
         "byLanguage": dict(lang_counter),
         "labelCount": len(label_counter),
@@ -200,8 +259,11 @@ def main():
     parser.add_argument("--target-per-language", type=int, default=2000)
     parser.add_argument("--seed", type=int, default=20260316)
     parser.add_argument("--output", type=str, default=DEFAULT_OUTPUT)
-    parser.add_argument("--report-json", type=str, default=DEFAULT_REPORT)
+    parser.add_argument("--report-json", type=str, default=None,
+                        help="Report path (default: the balanced_4000 report, or <output>_report.json with --stream)")
     parser.add_argument("--no-shuffle", action="store_true")
+    parser.add_argument("--stream", action="store_true",
+                        help="Generate and write entries incrementally (labels interleaved, no global shuffle)")
     args = parser.parse_args()
 
     if args.target_per_language < 1:
@@ -211,20 +273,23 @@ def main():
     if not labels:
         raise SystemExit("No labels found in taxonomy")
 
-    rows = generate_dataset(
-        labels,
-        target_per_language=args.target_per_language,
-        seed=args.seed,
-        shuffle=not args.no_shuffle,
-    )
-
-    summary = summarize(rows)
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    if args.stream:
+        report_json = args.report_json or f"{os.path.splitext(args.output)[0]}_report.json"
+        summary = summarize(write_entries(iter_dataset(labels, args.target_per_language, args.seed), args.output))
+    else:
+        report_json = args.report_json or DEFAULT_REPORT
+        rows = generate_dataset(
+            labels,
+            target_per_language=args.target_per_language,
+            seed=args.seed,
+            shuffle=not args.no_shuffle,
+        )
+        summary = summarize(rows)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(rows, f, ensure_ascii=False, indent=2)
     expected_total = args.target_per_language * 2
 
-    os.makedirs(os.path.dirname(args.output), exist_ok=True)
-    with open(args.output, "w", encoding="utf-8") as f:
-        json.dump(rows, f, ensure_ascii=False, indent=2)
-
     report = {
         "targetPerLanguage": args.target_per_language,
         "expectedTotalFlattenedRows": expected_total,
@@ -237,12 +302,12 @@ def main():
         ],
     }
 
-    os.makedirs(os.path.dirname(args.report_json), exist_ok=True)
-    with open(args.report_json, "w", encoding="utf-8") as f:
+    os.makedirs(os.path.dirname(report_json) or ".", exist_ok=True)
+    with open(report_json, "w", encoding="utf-8") as f:
         json.dump(report, f, ensure_ascii=False, indent=2)
 
     print(f"Wrote dataset: {args.output}")
-    print(f"Wrote report:  {args.report_json}")
+    print(f"Wrote report:  {report_json}")
     print(json.dumps(summary, indent=2))
 
     by_language = summary.get("byLanguage", {})
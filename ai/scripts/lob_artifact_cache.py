@@ -0,0 +1,212 @@
+"""
+Build-time cache of trained LOB model bundles, keyed on everything that goes into training.
+
+The key is a SHA-256 over the contents of the training dataset, the extra
+datasets train() folds in (low-recall batches, the real-world holdout it
+excludes), the taxonomy, the training code (train_lob_model.py and the ai/scripts
+modules it imports), the training options (including
+environment settings that change what train() produces, such as
+LOB_FEATURE_DTYPE) and the numpy/scipy/scikit-learn versions. Training is seeded, so the same key always
+yields the same model; a bundle stored under that key can be reused instead of
+retraining.
+
+Layout:
+    ai/models/cache/<key>/     a complete bundle (as in the registry) + inputs.json
+                               (override the cache root with LOB_ARTIFACT_CACHE_DIR)
+
+Usage:
+    python ai/scripts/lob_artifact_cache.py              # train only if no cached bundle matches, then cache it
+    python ai/scripts/lob_artifact_cache.py --install    # ... and publish + promote it in the registry
+    python ai/scripts/lob_artifact_cache.py --check      # exit 0 if a matching bundle is cached, else 1
+
+The Dockerfile runs --install at image build time, so containers start with a
+promoted model and the service only trains at startup when nothing matches.
+"""
+
+import argparse
+import ast
+import functools
+import glob
+import hashlib
+import json
+import os
+import shutil
+import sys
+
+import model_registry
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+AI_ROOT = os.path.dirname(SCRIPT_DIR)
+CACHE_DIR = os.environ.get("LOB_ARTIFACT_CACHE_DIR") or os.path.join(AI_ROOT, "models", "cache")
+MANIFEST_FILENAME = "inputs.json"
+# Same dataset the prediction service auto-trains from (predict_app.DEFAULT_DATASET)
+BALANCED_DATASET = os.path.join(AI_ROOT, "datasets", "lob_recommendation_dataset_balanced_4000.json")
+STARTUP_DATASET = BALANCED_DATASET if os.path.exists(BALANCED_DATASET) else os.path.join(AI_ROOT, "datasets", "lob_recommendation_dataset.json")
+TAXONOMY_PATH = os.path.join(AI_ROOT, "data", "line_of_business.json")
+LOW_RECALL_DATASET_GLOB = os.path.join(AI_ROOT, "datasets", "generated_batch_*_low_recall.json")
+REALWORLD_HOLDOUT_DATASET = os.path.join(AI_ROOT, "datasets", "lob_recommendation_realworld_holdout.json")
+TRAINING_ENTRY_POINT = "train_lob_model.py"
+
+
+def _library_versions():
+    import numpy
+    import scipy
+    import sklearn
+
+    return {"numpy": numpy.__version__, "scipy": scipy.__version__, "scikit-learn": sklearn.__version__}
+
+
+def _environment_options():
+    """Environment settings that change the trained model, as train_lob_model resolved them.
+
+    The training thread/worker budgets (resource_governor.py) are left out: they change
+    how fast a model is trained, not the model.
+    """
+    import train_lob_model
+
+    return {"feature_dtype": str(train_lob_model.FEATURE_DTYPE)}
+
+
+@functools.lru_cache(maxsize=None)
+def training_code():
+    """train_lob_model.py and every ai/scripts module it imports, directly or not (file names, sorted).
+
+    Read from the import statements (including ones inside functions), so a new
+    helper module is part of the key as soon as training code imports it.
+    """
+    seen, pending = set(), [TRAINING_ENTRY_POINT]
+    while pending:
+        name = pending.pop()
+        if name in seen:
+            continue
+        seen.add(name)
+        with open(os.path.join(SCRIPT_DIR, name), "r", encoding="utf-8") as f:
+            tree = ast.parse(f.read(), filename=name)
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                modules = [alias.name for alias in node.names]
+            elif isinstance(node, ast.ImportFrom) and node.level == 0 and node.module:
+                modules = [node.module]
+            else:
+                continue
+            pending.extend(f"{m}.py" for m in modules if os.path.exists(os.path.join(SCRIPT_DIR, f"{m}.py")))
+    return tuple(sorted(seen))
+
+
+def _input_files(dataset_path):
+    files = {"dataset": dataset_path, "taxonomy": TAXONOMY_PATH}
+    for path in sorted(glob.glob(LOW_RECALL_DATASET_GLOB)):
+        files[f"datasets/{os.path.basename(path)}"] = path
+    if os.path.exists(REALWORLD_HOLDOUT_DATASET):
+        files["holdout"] = REALWORLD_HOLDOUT_DATASET
+    for name in training_code():
+        files[f"scripts/{name}"] = os.path.join(SCRIPT_DIR, name)
+    return files
+
+
+def inputs_manifest(dataset_path=None, skip_tune=False, feature_budget_delta=None, build_cascade=True):
+    """Describe the training inputs; returns (key, manifest). Only file contents matter, not paths."""
+    files = _input_files(dataset_path or STARTUP_DATASET)
+    digests = model_registry.digest_cache.digests(list(files.values()))
+    manifest = {
+        "inputs": {name: digests[path] for name, path in files.items()},
+        "options": dict(
+            _environment_options(),
+            skip_tune=skip_tune,
+            feature_budget_delta=feature_budget_delta,
+            build_cascade=build_cascade,
+        ),
+        "libraries": _library_versions(),
+    }
+    key = hashlib.sha256(json.dumps(manifest, sort_keys=True).encode("utf-8")).hexdigest()
+    return key, manifest
+
+
+def cached_bundle_dir(key, cache_dir=CACHE_DIR):
+    """The cached bundle for `key`, or None."""
+    path = os.path.join(cache_dir, key)
+    return path if os.path.exists(os.path.join(path, model_registry.CHECKSUMS_FILENAME)) else None
+
+
+def store(bundle_dir, key, manifest, cache_dir=CACHE_DIR):
+    """Copy a published bundle into the cache under `key` (copy + rename, so entries are never partial)."""
+    target = os.path.join(cache_dir, key)
+    if os.path.exists(target):
+        return target
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp = os.path.join(cache_dir, f".tmp-{key}-{os.getpid()}")
+    shutil.copytree(bundle_dir, tmp)
+    with open(os.path.join(tmp, MANIFEST_FILENAME), "w", encoding="utf-8") as f:
+        json.dump(dict(manifest, key=key), f, indent=2)
+    try:
+        os.rename(tmp, target)
+    except OSError:
+        shutil.rmtree(tmp, ignore_errors=True)  # another builder stored the same key first
+    return target
+
+
+def install(key, models_dir=model_registry.MODELS_DIR, cache_dir=CACHE_DIR):
+    """Publish the cached bundle for `key` as a new registry version and promote it; None if not cached."""
+    source = cached_bundle_dir(key, cache_dir)
+    if source is None:
+        return None
+    staging = model_registry.create_staging_dir(models_dir)
+    for name in os.listdir(source):
+        if name != MANIFEST_FILENAME:
+            shutil.copy2(os.path.join(source, name), os.path.join(staging, name))
+    version = model_registry.publish(staging, models_dir)
+    model_registry.promote(version, models_dir)
+    return version
+
+
+def build(dataset_path=None, skip_tune=False, feature_budget_delta=None, build_cascade=True, cache_dir=CACHE_DIR):
+    """Train and cache a bundle only if none matches the current inputs.
+
+    Returns (key, version): version is the newly trained (unpromoted) registry
+    version, or None when a cached bundle already matched and nothing was trained.
+    """
+    key, manifest = inputs_manifest(dataset_path, skip_tune, feature_budget_delta, build_cascade)
+    if cached_bundle_dir(key, cache_dir):
+        return key, None
+    from train_lob_model import MODELS_DIR, train
+
+    version = train(
+        dataset_path or STARTUP_DATASET,
+        skip_tune=skip_tune,
+        feature_budget_delta=feature_budget_delta,
+        build_cascade=build_cascade,
+        promote=False,
+        inputs_key=key,
+    )
+    if not version:
+        raise RuntimeError("Training failed (not enough data?)")
+    store(model_registry.version_dir(version, MODELS_DIR), key, manifest, cache_dir)
+    return key, version
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build (or reuse) the cached LOB model bundle for the current inputs")
+    parser.add_argument("--dataset", type=str, default=None, help="Path to dataset JSON (default: the service's startup dataset)")
+    parser.add_argument("--no-tune", action="store_true", help="Skip hyperparameter tuning step")
+    parser.add_argument("--feature-budget-delta", type=float, default=None, help="See train_lob_model.py")
+    parser.add_argument("--no-cascade", action="store_true", help="Do not build the cascade first stage")
+    parser.add_argument("--cache-dir", type=str, default=CACHE_DIR, help="Cache root (default: ai/models/cache or LOB_ARTIFACT_CACHE_DIR)")
+    parser.add_argument("--check", action="store_true", help="Only report whether a matching bundle is cached (exit 1 if not)")
+    parser.add_argument("--install", action="store_true", help="Publish and promote the cached bundle in the model registry")
+    args = parser.parse_args()
+
+    options = dict(skip_tune=args.no_tune, feature_budget_delta=args.feature_budget_delta, build_cascade=not args.no_cascade)
+    if args.check:
+        key, _ = inputs_manifest(args.dataset, **options)
+        hit = cached_bundle_dir(key, args.cache_dir)
+        print(f"{key}: {'cached at ' + hit if hit else 'not cached'}")
+        sys.exit(0 if hit else 1)
+
+    key, version = build(args.dataset, cache_dir=args.cache_dir, **options)
+    print(f"{key}: {'trained and cached as ' + version if version else 'already cached, not retrained'}")
+    if args.install:
+        if version:
+            model_registry.promote(version)
+        else:
+            version = install(key, cache_dir=args.cache_dir)
+        print(f"Registry version {version} is now current")
@@ -0,0 +1,111 @@
+"""
+Confidence cascade for LOB prediction: a cheap ComplementNB first stage that
+answers when its top-1 confidence clears a threshold, escalating everything
+else to the full (calibrated) model.
+
+The threshold is tuned offline on out-of-fold predictions so that, on the rows
+the first stage keeps, its top-1 precision is at least the full model's
+precision on those same rows (precision parity).
+"""
+
+import numpy as np
+
+STAGE1_FILENAME = "lob_cascade_stage1.joblib"
+# Minimum fraction of rows the first stage must keep for a threshold to be worth using.
+MIN_CASCADE_COVERAGE = 0.01
+
+
+def tune_cascade_threshold(stage1_proba, stage1_classes, full_pred, y, tolerance=0.0):
+    """Pick the lowest first-stage confidence threshold with precision parity.
+
+    stage1_proba: out-of-fold first-stage probabilities (n_rows x n_classes).
+    full_pred: out-of-fold top-1 labels of the full model for the same rows, as it is
+        served (tuned and calibrated), since that is what escalated rows get.
+    Returns a dict with the threshold (None if no threshold reaches parity) and
+    the coverage/precision it achieved.
+    """
+    y = np.asarray(y)
+    full_pred = np.asarray(full_pred)
+    conf = stage1_proba.max(axis=1)
+    stage1_pred = np.asarray(stage1_classes)[stage1_proba.argmax(axis=1)]
+    stage1_ok = stage1_pred == y
+    full_ok = full_pred == y
+    n = len(y)
+
+    candidates = np.unique(np.quantile(conf, np.linspace(0.0, 1.0, 201)))
+    best = None
+    for t in candidates:
+        keep = conf >= t
+        kept = int(keep.sum())
+        if kept < max(1, int(n * MIN_CASCADE_COVERAGE)):
+            continue
+        stage1_precision = float(stage1_ok[keep].mean())
+        full_precision = float(full_ok[keep].mean())
+        if stage1_precision + tolerance >= full_precision:
+            best = {
+                "threshold": float(t),
+                "coverage": kept / n,
+                "stage1_precision": stage1_precision,
+                "full_precision_on_kept": full_precision,
+            }
+            break
+
+    result = {"threshold": None, "tolerance": tolerance, "rows": n}
+    if best:
+        result.update(best)
+    return result
+
+
+class CascadeClassifier:
+    """Serve predict_proba from a ComplementNB first stage, escalating low-confidence rows.
+
+    The first stage is scored as a single sparse x dense product against a
+    pre-transposed, C-contiguous copy of its log-probability weights, which is
+    much cheaper than ComplementNB.predict_proba on a 30k+ feature vocabulary.
+    Both stages must have been fitted on the same label set.
+    """
+
+    def __init__(self, stage1, full_model, threshold):
+        if list(stage1.classes_) != list(full_model.classes_):
+            raise ValueError("cascade stages were trained on different label sets")
+        self.classes_ = full_model.classes_
+        self.full_model = full_model
+        self.threshold = float(threshold)
+        self._weights = np.ascontiguousarray(stage1.feature_log_prob_.T)
+        self._bias = stage1.class_log_prior_ if len(stage1.classes_) == 1 else None
+        self.answered = 0
+        self.escalated = 0
+
+    def stage1_proba(self, X):
+        jll = np.asarray(X @ self._weights)
+        if self._bias is not None:
+            jll = jll + self._bias
+        jll -= jll.max(axis=1, keepdims=True)
+        np.exp(jll, out=jll)
+        jll /= jll.sum(axis=1, keepdims=True)
+        return jll
+
+    def predict_proba_with_stage(self, X):
+        """Return (probabilities, stage per row) where stage is 1 (answered) or 2 (escalated)."""
+        proba = self.stage1_proba(X)
+        stages = np.ones(proba.shape[0], dtype=np.int8)
+        escalate = proba.max(axis=1) < self.threshold
+        if escalate.any():
+            proba[escalate] = self.full_model.predict_proba(X[np.flatnonzero(escalate)])
+            stages[escalate] = 2
+        n_escalated = int(escalate.sum())
+        self.escalated += n_escalated
+        self.answered += proba.shape[0] - n_escalated
+        return proba, stages
+
+    def predict_proba(self, X):
+        return self.predict_proba_with_stage(X)[0]
+
+    def stats(self):
+        total = self.answered + self.escalated
+        return {
+            "threshold": self.threshold,
+            "answered": self.answered,
+            "escalated": self.escalated,
+            "escalationRate": self.escalated / total if total else 0.0,
+        }
@@ -0,0 +1,432 @@
+"""
+Incremental LOB model updates: fold newly labeled rows into a published model in seconds.
+
+The bundle's fitted TF-IDF vectorizer is reused as-is (words outside its
+vocabulary are ignored, exactly as at serving time). Each scorer continues from
+where the last fit left off:
+
+    LinearSVC (every CalibratedClassifierCV fold)  a few epochs of SGD on the squared
+                                                   hinge loss over the new rows, starting from
+                                                   its coefficients; the sigmoid calibrators are
+                                                   then refitted (see below)
+    LogisticRegression                             refitted on the base rows plus the new rows,
+                                                   warm-started from its coefficients (same C,
+                                                   class_weight, multinomial loss)
+    ComplementNB (model or cascade first stage)    its own partial_fit (adds the new counts)
+
+The SGD regularization matches the base fit (alpha = 1 / (C * n_train_samples))
+and class_weight="balanced" becomes per-class weights from the base and new rows'
+label counts. Calibrators are refitted on rows the fold's estimator did not train
+on before the update: with cross-validated calibration each fold uses its part of
+a stratified split of the base rows (the split CalibratedClassifierCV makes), and
+prefit calibration uses the base and new rows, as train_lob_model does.
+
+Linear models need the base rows, i.e. the dataset the base version was trained
+on; they default to the service's dataset when training_meta.json shows the base
+was trained on it. The result is published as a new registry version whose training_meta.json records
+"incremental" (base version, rows, epochs, wall time, updates since the last full
+train). Fields that describe the last full training run rather than the updated
+model (CV scores, tuning, feature selection, stage timings) move under
+"baseTraining", and its inputsKey is dropped so the bundle is never mistaken for
+one built from those inputs. Updates drift from what a full retrain on the same data would produce,
+so the periodic train_lob_model.py run stays the consolidation step; see
+evaluate_incremental_update.py for the measured drift.
+
+New labels (e.g. a detailed line just added to data/line_of_business.json) are
+appended with --append-classes instead: for each new label only a binary
+LinearSVC (new label vs. the rows the model was trained on) is fitted on the
+current features with the model's own LinearSVC parameters, calibrated the same
+way as the model (its CV fold count, or prefit, and its sigmoid method), and
+its coefficient row and calibrator are inserted into every fold at the label's
+sorted position. Existing classes' scorers and calibrators are not touched, so
+their scores are unchanged (probabilities are renormalized over one more class).
+The cascade first stage cannot gain a class without refitting, so it is dropped
+until the next full train. See evaluate_append_class.py for timing and checks.
+
+Usage:
+    python ai/scripts/lob_incremental.py --dataset NEW_ROWS.json [--base-dataset DATASET.json]
+                                         [--base VERSION] [--epochs 5] [--no-promote]
+    python ai/scripts/lob_incremental.py --dataset NEW_LABEL_ROWS.json --append-classes
+                                         [--base-dataset DATASET.json] [--base VERSION] [--no-promote]
+"""
+
+import argparse
+import copy
+import json
+import sys
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+from scipy import sparse
+from sklearn.base import clone
+from sklearn.calibration import CalibratedClassifierCV
+from sklearn.linear_model import LogisticRegression, SGDClassifier
+from sklearn.model_selection import StratifiedKFold
+
+import model_registry
+import resource_governor
+from lob_artifact_cache import STARTUP_DATASET
+from train_lob_model import (
+    MODELS_DIR,
+    augment_rows,
+    dedupe_rows,
+    flatten_dataset,
+    load_bundle,
+    load_taxonomy,
+    publish_bundle,
+)
+
+DEFAULT_EPOCHS = 5
+DEFAULT_ETA0 = 0.05
+SGD_LOSSES = {"LinearSVC": "squared_hinge"}
+# training_meta.json fields describing the full training run, not the model an update produces
+BASE_TRAINING_FIELDS = ("cv_accuracy", "tuning", "feature_selection", "augmentation", "nearDuplicates", "finalFit",
+                        "stages", "resourceBudgets")
+
+
+class IncrementalUpdateError(ValueError):
+    """The new rows cannot be folded into the base model (no rows, or labels it does not know)."""
+
+
+def linear_estimators(model):
+    """The fitted linear scorers inside `model`: each calibration fold's estimator, or the model itself."""
+    if hasattr(model, "calibrated_classifiers_"):
+        return [cc.estimator for cc in model.calibrated_classifiers_]
+    if hasattr(model, "coef_"):
+        return [model]
+    return []
+
+
+def _balanced_weights(y):
+    """class_weight="balanced" as explicit per-class weights (SGD's partial_fit does not take "balanced")."""
+    classes, counts = np.unique(y, return_counts=True)
+    return dict(zip(classes, len(y) / (len(classes) * counts)))
+
+
+def _sgd_update(estimator, X, y, n_train_samples, epochs, eta0, class_weight=None):
+    """Continue training a LinearSVC on (X, y) from its current coefficients, in place."""
+    sgd = SGDClassifier(
+        loss=SGD_LOSSES[type(estimator).__name__],
+        alpha=1.0 / (estimator.C * n_train_samples),
+        learning_rate="constant",
+        eta0=eta0,
+        class_weight=class_weight,
+        random_state=42,
+    )
+    # partial_fit picks up from coef_/intercept_ when classes_ and coef_ are already set;
+    # SGD works in the features' dtype (float32 for current bundles), so the state must match
+    dtype = np.float32 if X.dtype == np.float32 else np.float64
+    sgd.classes_ = estimator.classes_
+    sgd.coef_ = np.array(estimator.coef_, dtype=dtype, order="C")
+    sgd.intercept_ = np.array(estimator.intercept_, dtype=dtype)
+    for _ in range(epochs):
+        sgd.partial_fit(X, y)
+    estimator.coef_ = sgd.coef_.astype(estimator.coef_.dtype, copy=False)
+    estimator.intercept_ = sgd.intercept_.astype(estimator.intercept_.dtype, copy=False)
+
+
+def _refit_calibrators(calibrated, X, y):
+    """Refit one calibrated fold's per-class calibrators on (X, y), rows its estimator did not train on."""
+    scores = calibrated.estimator.decision_function(X)
+    if scores.ndim == 1:
+        # Binary: a single calibrator, for the positive class
+        scores, targets = scores[:, None], calibrated.classes[1:]
+    else:
+        targets = calibrated.classes
+    calibrated.calibrators = [
+        clone(calibrator).fit(scores[:, i], (y == label).astype(np.int8))
+        for i, (calibrator, label) in enumerate(zip(calibrated.calibrators, targets))
+    ]
+
+
+def update_model(model, X, y, n_train_samples, epochs=DEFAULT_EPOCHS, eta0=DEFAULT_ETA0, X_base=None, y_base=None):
+    """Return a copy of `model` with (X, y) folded in; `model` itself is not modified.
+
+    Linear models also need the base rows (X_base, y_base) they were trained on.
+    """
+    updated = copy.deepcopy(model)
+    estimators = linear_estimators(updated)
+    if estimators and X_base is None:
+        raise IncrementalUpdateError(f"Updating a {type(estimators[0]).__name__} model needs the rows it was trained on")
+    if isinstance(updated, LogisticRegression):
+        X_all = sparse.vstack([X_base, X], format="csr")
+        updated.set_params(warm_start=True).fit(X_all, np.concatenate([y_base, y]))
+        updated.set_params(warm_start=model.warm_start)
+    elif estimators:
+        if any(type(e).__name__ not in SGD_LOSSES for e in estimators):
+            raise IncrementalUpdateError(f"{type(estimators[0]).__name__} cannot be updated incrementally; retrain instead")
+        y_all = np.concatenate([y_base, y])
+        for estimator in estimators:
+            class_weight = _balanced_weights(y_all) if estimator.class_weight == "balanced" else estimator.class_weight
+            _sgd_update(estimator, X, y, n_train_samples, epochs, eta0, class_weight)
+        calibrated = getattr(updated, "calibrated_classifiers_", [])
+        if isinstance(getattr(updated, "cv", None), str) and updated.cv == "prefit":
+            _refit_calibrators(calibrated[0], sparse.vstack([X_base, X], format="csr"), y_all)
+        elif calibrated:
+            folds = StratifiedKFold(n_splits=len(calibrated)).split(X_base, y_base)
+            for cc, (_, held_out) in zip(calibrated, folds):
+                _refit_calibrators(cc, X_base[held_out], y_base[held_out])
+    elif hasattr(updated, "partial_fit"):
+        updated.partial_fit(X, y)
+    else:
+        raise IncrementalUpdateError(f"{type(model).__name__} cannot be updated incrementally; retrain instead")
+    return updated
+
+
+def update_bundle(bundle, entries, epochs=DEFAULT_EPOCHS, eta0=DEFAULT_ETA0, base_entries=None):
+    """Fold dataset `entries` into a loaded bundle (see train_lob_model.load_bundle).
+
+    base_entries (the rows the bundle was trained on) are needed for linear models and
+    default to the service's dataset, only if training_meta.json shows the bundle was
+    trained on it. Returns (updated bundle, number of new rows, number of base rows).
+    Raises IncrementalUpdateError if there are no usable rows or a row's label is not
+    one of the model's classes.
+    """
+    rows = dedupe_rows(flatten_dataset(entries))
+    if not rows:
+        raise IncrementalUpdateError("No labeled rows to add")
+    known = set(bundle["labels"])
+    unknown = sorted({r["label"] for r in rows} - known)
+    if unknown:
+        raise IncrementalUpdateError(
+            f"{len(unknown)} label(s) not in the base model (e.g. {unknown[0]!r}); append new labels "
+            "with appendClasses or retrain"
+        )
+
+    vectorizer = bundle["vectorizer"]
+    X = vectorizer.transform([r["text"] for r in rows])
+    y = np.array([r["label"] for r in rows])
+    X_base = y_base = None
+    if linear_estimators(bundle["model"]):
+        if base_entries is None:
+            base_entries = _training_entries(bundle["meta"])
+        base_rows = [r for r in dedupe_rows(flatten_dataset(base_entries)) if r["label"] in known]
+        X_base = vectorizer.transform([r["text"] for r in base_rows])
+        y_base = np.array([r["label"] for r in base_rows])
+    n_train_samples = bundle["meta"].get("n_train_samples") or X.shape[0]
+    updated = dict(bundle)
+    updated["model"] = update_model(bundle["model"], X, y, n_train_samples, epochs, eta0, X_base, y_base)
+    if bundle["stage1"] is not None:
+        updated["stage1"] = update_model(bundle["stage1"], X, y, n_train_samples, epochs, eta0, X_base, y_base)
+    return updated, len(rows), 0 if y_base is None else len(y_base)
+
+
+def _fit_binary_scorer(model, X, y_bin):
+    """Fit the new label's scorer the way the model's own classes were fitted (same parameters and calibration)."""
+    if not hasattr(model, "calibrated_classifiers_"):
+        return clone(model).fit(X, y_bin)
+    base = model.calibrated_classifiers_[0].estimator
+    if isinstance(model.cv, str) and model.cv == "prefit":
+        # Calibrated on its own training rows (train_lob_model.calibrate_linear_svc with singleton classes)
+        return CalibratedClassifierCV(clone(base).fit(X, y_bin), cv="prefit", method=model.method).fit(X, y_bin)
+    return CalibratedClassifierCV(clone(base), cv=len(model.calibrated_classifiers_), method=model.method).fit(X, y_bin)
+
+
+def _insert_class(model, label, scorer):
+    """Insert the fitted binary `scorer` into `model` as class `label`, in place, keeping classes_ sorted."""
+    classes = list(model.classes_)
+    idx = int(np.searchsorted(model.classes_, label))
+    model.classes_ = np.array(classes[:idx] + [label] + classes[idx:])
+    for est, new_est in zip(linear_estimators(model), linear_estimators(scorer)):
+        est.coef_ = np.insert(est.coef_, idx, new_est.coef_[0], axis=0)
+        est.intercept_ = np.insert(est.intercept_, idx, new_est.intercept_[0])
+        est.classes_ = model.classes_
+    # Calibrated folds: the new label's sigmoid goes into the matching fold, at the same position
+    for cc, new_cc in zip(getattr(model, "calibrated_classifiers_", []), getattr(scorer, "calibrated_classifiers_", [])):
+        cc.calibrators.insert(idx, new_cc.calibrators[0])
+        cc.classes = model.classes_
+
+
+def _appendable_estimators(model):
+    estimators = linear_estimators(model)
+    if not estimators or any(type(e).__name__ != "LinearSVC" for e in estimators) or len(model.classes_) < 3:
+        raise IncrementalUpdateError("Classes can only be appended to a multi-class LinearSVC model; retrain instead")
+    return estimators
+
+
+def append_classes(bundle, entries, negative_entries):
+    """Add the labels in `entries` that the model does not know yet; returns (updated bundle, per-label info).
+
+    Rows of already-known labels in `entries` only serve as negatives, together
+    with the rows of `negative_entries` (the data the model was trained on).
+    """
+    model = bundle["model"]
+    estimators = _appendable_estimators(model)
+
+    rows = dedupe_rows(flatten_dataset(entries))
+    new_labels = sorted({r["label"] for r in rows} - set(bundle["labels"]))
+    if not new_labels:
+        raise IncrementalUpdateError("No new labels to append; use an incremental update for known labels")
+    n_folds = len(estimators)
+    counts = {label: sum(r["label"] == label for r in rows) for label in new_labels}
+    too_few = [label for label, n in counts.items() if n < max(2, n_folds)]
+    if too_few:
+        raise IncrementalUpdateError(f"{too_few[0]!r} needs at least {max(2, n_folds)} example rows")
+    taxonomy_labels = {f"{e['taxCode']}|{dl}" for e in load_taxonomy() for dl in e["detailedLines"]}
+    for label in new_labels:
+        if label not in taxonomy_labels:
+            print(f"WARNING: {label!r} is not in data/line_of_business.json; predictions will lack taxonomy details")
+
+    vectorizer = bundle["vectorizer"]
+    # Same noisy variants train() adds for every label
+    rows = dedupe_rows(rows + augment_rows([r for r in rows if r["label"] in counts], per_label_limit=60, seed=42))
+    negatives = [r for r in dedupe_rows(flatten_dataset(negative_entries)) if r["label"] not in counts]
+    X = sparse.vstack([
+        vectorizer.transform([r["text"] for r in rows]),
+        vectorizer.transform([r["text"] for r in negatives]),
+    ], format="csr")
+    # Rows of the other new labels are negatives too: each appended scorer is one-vs-rest like the rest
+    y = np.array([r["label"] for r in rows] + [r["label"] for r in negatives])
+
+    updated = copy.deepcopy(model)
+    info = []
+    for label in new_labels:
+        started = time.perf_counter()
+        y_bin = (y == label).astype(np.int8)
+        _insert_class(updated, label, _fit_binary_scorer(model, X, y_bin))
+        info.append({"label": label, "rows": counts[label], "negatives": int(X.shape[0] - y_bin.sum()),
+                     "seconds": round(time.perf_counter() - started, 3)})
+
+    result = dict(bundle, model=updated, labels=[str(c) for c in updated.classes_], stage1=None)
+    return result, info
+
+
+def derived_meta(base_meta, **fields):
+    """training_meta.json for a version derived from `base_meta`'s without a full retrain.
+
+    The base run's own fields go under "baseTraining" (kept from the last full train
+    across repeated updates); inputsKey is dropped since the bundle no longer matches
+    those inputs.
+    """
+    meta = {k: v for k, v in base_meta.items() if k not in BASE_TRAINING_FIELDS and k != "inputsKey"}
+    meta["baseTraining"] = base_meta.get("baseTraining") or {
+        k: base_meta[k] for k in BASE_TRAINING_FIELDS if k in base_meta
+    }
+    meta.update(fields, trainedAt=datetime.now(timezone.utc).isoformat(), resourceBudgets=resource_governor.summary())
+    return meta
+
+
+def _training_entries(meta):
+    """The service's training dataset, if training_meta.json says the model was trained on it."""
+    try:
+        trained_on_startup = meta.get("datasetSha256") == model_registry.file_sha256(STARTUP_DATASET)
+    except OSError:
+        trained_on_startup = False
+    if not trained_on_startup:
+        raise IncrementalUpdateError(
+            "The base version was not trained on the service's dataset; pass the rows it was trained on "
+            "(negatives / --base-dataset)"
+        )
+    with open(STARTUP_DATASET, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def append_classes_update(entries, base_version=None, negative_entries=None, promote=True, models_dir=None):
+    """Append the new labels in `entries` to `base_version` (default: current) and publish the result.
+
+    negative_entries defaults to the service's training dataset, only if training_meta.json
+    shows the base version was trained on it. Returns (new version, summary dict).
+    """
+    models_dir = models_dir or MODELS_DIR
+    started = time.perf_counter()
+    base_version = base_version or model_registry.current_version(models_dir)
+    if not base_version:
+        raise IncrementalUpdateError("No current model version to update; train one first")
+    with resource_governor.limit("training"):
+        bundle = load_bundle(model_registry.version_dir(base_version, models_dir))
+        if negative_entries is None:
+            _appendable_estimators(bundle["model"])
+            negative_entries = _training_entries(bundle["meta"])
+        updated, info = append_classes(bundle, entries, negative_entries)
+
+    base_meta = bundle["meta"]
+    summary = {"baseVersion": base_version, "classes": info, "seconds": round(time.perf_counter() - started, 3)}
+    meta = derived_meta(
+        base_meta,
+        n_labels=len(updated["labels"]),
+        appendedClasses=(base_meta.get("appendedClasses") or []) + [dict(c, baseVersion=base_version) for c in info],
+    )
+    if base_meta.get("cascade"):
+        meta["cascade"] = dict(base_meta["cascade"], saved=False)
+    version = publish_bundle(updated["vectorizer"], updated["model"], updated["labels"], meta, None, models_dir)
+    if promote:
+        model_registry.promote(version, models_dir)
+    return version, summary
+
+
+def incremental_update(entries, base_version=None, epochs=DEFAULT_EPOCHS, eta0=DEFAULT_ETA0, promote=True,
+                       models_dir=None, base_entries=None):
+    """Fold `entries` into `base_version` (default: the current version) and publish the result.
+
+    base_entries are the rows base_version was trained on (see update_bundle).
+    Returns (new version, summary dict). Runs under the "training" thread budget.
+    """
+    models_dir = models_dir or MODELS_DIR
+    started = time.perf_counter()
+    base_version = base_version or model_registry.current_version(models_dir)
+    if not base_version:
+        raise IncrementalUpdateError("No current model version to update; train one first")
+    with resource_governor.limit("training"):
+        bundle = load_bundle(model_registry.version_dir(base_version, models_dir))
+        updated, n_rows, n_base_rows = update_bundle(bundle, entries, epochs, eta0, base_entries)
+
+    base_meta = bundle["meta"]
+    previous = base_meta.get("incremental") or {}
+    summary = {
+        "baseVersion": base_version,
+        "rows": n_rows,
+        "baseRows": n_base_rows,
+        "epochs": epochs,
+        "eta0": eta0,
+        "updatesSinceFullTrain": previous.get("updatesSinceFullTrain", 0) + 1,
+        "lastFullTrainVersion": previous.get("lastFullTrainVersion", base_version),
+    }
+    meta = derived_meta(
+        base_meta,
+        n_train_samples=(base_meta.get("n_train_samples") or 0) + n_rows,
+        incremental=summary,
+    )
+    summary["seconds"] = round(time.perf_counter() - started, 3)  # load + update; publishing is I/O only
+    version = publish_bundle(updated["vectorizer"], updated["model"], updated["labels"], meta, updated["stage1"],
+                             models_dir)
+    if promote:
+        model_registry.promote(version, models_dir)
+    return version, summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fold new labeled rows into the current LOB model without retraining")
+    parser.add_argument("--dataset", type=str, required=True, help="Path to a dataset JSON of new labeled entries")
+    parser.add_argument("--base", type=str, default=None, help="Registry version to update (default: current)")
+    parser.add_argument("--epochs", type=int, default=DEFAULT_EPOCHS, help="Passes over the new rows")
+    parser.add_argument("--no-promote", action="store_true", help="Publish the updated version without making it current")
+    parser.add_argument("--append-classes", action="store_true", help="Append the dataset's new labels as new classes")
+    parser.add_argument("--base-dataset", "--negatives", dest="base_dataset", type=str, default=None,
+                        help="Dataset JSON the base version was trained on (default: the service's training "
+                             "dataset, if the base was trained on it)")
+    args = parser.parse_args()
+
+    with open(args.dataset, "r", encoding="utf-8") as f:
+        new_entries = json.load(f)
+    base_dataset = None
+    if args.base_dataset:
+        with open(args.base_dataset, "r", encoding="utf-8") as f:
+            base_dataset = json.load(f)
+    try:
+        if args.append_classes:
+            new_version, info = append_classes_update(new_entries, args.base, base_dataset,
+                                                      promote=not args.no_promote)
+            for c in info["classes"]:
+                print(f"Appended {c['label']!r}: {c['rows']} rows vs {c['negatives']} negatives in {c['seconds']:.2f}s")
+            print(f"{info['baseVersion']} -> {new_version}{' (promoted)' if not args.no_promote else ''} in {info['seconds']:.2f}s")
+            sys.exit(0)
+        new_version, info = incremental_update(new_entries, args.base, epochs=args.epochs, promote=not args.no_promote,
+                                               base_entries=base_dataset)
+    except IncrementalUpdateError as exc:
+        print(f"ERROR: {exc}")
+        sys.exit(1)
+    print(
+        f"Folded {info['rows']} rows into {info['baseVersion']} in {info['seconds']:.2f}s -> {new_version}"
+        f"{' (promoted)' if not args.no_promote else ''}; {info['updatesSinceFullTrain']} update(s) since the last full train"
+    )
@@ -0,0 +1,243 @@
+"""
+Near-duplicate clustering of LOB descriptions with MinHash + LSH.
+
+Each normalized description is reduced to its set of character shingles and a
+MinHash signature; signatures are cut into LSH bands, and two descriptions that
+land in the same bucket of any band are joined (union-find) into one cluster
+when their signatures agree on at least `threshold` of their positions (an
+estimate of shingle Jaccard similarity). Every description is hashed once and
+compared only with the first member of each bucket it lands in, so clustering
+is linear in the number of rows instead of all-pairs.
+
+cap_cluster_rows() keeps at most N rows per (cluster, label) so templated
+near-copies of one description do not dominate a class during training (see
+train_lob_model.py --near-dup-cap).
+
+Run as a script it audits every dataset file together and reports clusters,
+the rows a cap would drop, and clusters that span files (e.g. test or holdout
+descriptions with a near-copy in a training file).
+
+Usage:
+    python3 ai/scripts/lob_near_dup.py [--datasets-glob 'ai/datasets/*.json'] [--threshold 0.8]
+                                       [--output-json PATH]
+"""
+
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+import zlib
+from collections import Counter, defaultdict
+
+import numpy as np
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+AI_ROOT = os.path.dirname(SCRIPT_DIR)
+DATASETS_GLOB = os.path.join(AI_ROOT, "datasets", "*.json")
+
+SHINGLE_SIZE = 5
+NUM_PERM = 64
+# 8 bands of 8 rows: pairs above ~0.77 estimated Jaccard share a bucket in at least one band
+# with high probability; the signature check then applies the actual threshold.
+BANDS = 8
+DEFAULT_THRESHOLD = 0.8
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64(0xFFFFFFFF)
+
+
+def shingles(text, k=SHINGLE_SIZE):
+    """Character k-shingles of an (already normalized) text, padded so short words count."""
+    padded = f" {text} "
+    if len(padded) <= k:
+        return {padded}
+    return {padded[i:i + k] for i in range(len(padded) - k + 1)}
+
+
+def minhash_signatures(texts, num_perm=NUM_PERM, seed=42):
+    """MinHash signature (num_perm uint32 values as uint64) per text, using (a*x + b) mod p permutations."""
+    rng = np.random.RandomState(seed)
+    a = rng.randint(1, 1 << 32, size=num_perm, dtype=np.uint64)
+    b = rng.randint(0, 1 << 32, size=num_perm, dtype=np.uint64)
+    out = np.empty((len(texts), num_perm), dtype=np.uint64)
+    for i, text in enumerate(texts):
+        grams = shingles(text)
+        x = np.fromiter((zlib.crc32(g.encode("utf-8")) for g in grams), dtype=np.uint64, count=len(grams))
+        # x, a < 2**32 and b < 2**32, so x*a + b cannot overflow uint64
+        out[i] = ((np.outer(x, a) + b) % _MERSENNE_PRIME & _MAX_HASH).min(axis=0)
+    return out
+
+
+def cluster_near_duplicates(texts, threshold=DEFAULT_THRESHOLD, num_perm=NUM_PERM, bands=BANDS, seed=42):
+    """Cluster id per text: the index of the first text in its near-duplicate cluster.
+
+    Identical texts always share a cluster; distinct texts are joined when they
+    share an LSH bucket and their signatures agree on >= threshold of positions.
+    """
+    if num_perm % bands:
+        raise ValueError("num_perm must be a multiple of bands")
+    parent = list(range(len(texts)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    def union(i, j):
+        ri, rj = find(i), find(j)
+        if ri != rj:
+            parent[max(ri, rj)] = min(ri, rj)
+
+    first_index = {}
+    distinct = []
+    for i, text in enumerate(texts):
+        j = first_index.setdefault(text, i)
+        if j == i:
+            distinct.append(i)
+        else:
+            parent[i] = j
+
+    signatures = minhash_signatures([texts[i] for i in distinct], num_perm, seed)
+    rows_per_band = num_perm // bands
+    for band in range(bands):
+        segment = signatures[:, band * rows_per_band:(band + 1) * rows_per_band]
+        heads = {}
+        for pos in range(len(distinct)):
+            head = heads.setdefault(segment[pos].tobytes(), pos)
+            if head != pos and np.mean(signatures[head] == signatures[pos]) >= threshold:
+                union(distinct[head], distinct[pos])
+    return [find(i) for i in range(len(texts))]
+
+
+def _cap(rows, cluster_ids, per_cluster_limit):
+    taken = Counter()
+    kept = []
+    for row, cid in zip(rows, cluster_ids):
+        key = (cid, row["label"])
+        if taken[key] < per_cluster_limit:
+            taken[key] += 1
+            kept.append(row)
+    return kept
+
+
+def cap_cluster_rows(rows, per_cluster_limit, threshold=DEFAULT_THRESHOLD):
+    """Keep at most per_cluster_limit rows per (near-duplicate cluster, label), in input order.
+
+    Returns (kept rows, summary dict).
+    """
+    if per_cluster_limit < 1:
+        raise ValueError("per_cluster_limit must be at least 1")
+    cluster_ids = cluster_near_duplicates([r["text"] for r in rows], threshold)
+    kept = _cap(rows, cluster_ids, per_cluster_limit)
+    sizes = Counter(cluster_ids)
+    return kept, {
+        "cap": per_cluster_limit,
+        "threshold": threshold,
+        "clusters": len(sizes),
+        "multiRowClusters": sum(1 for n in sizes.values() if n > 1),
+        "largestCluster": max(sizes.values(), default=0),
+        "rowsBefore": len(rows),
+        "rowsDropped": len(rows) - len(kept),
+    }
+
+
+def _load_dataset_rows(paths):
+    from train_lob_model import flatten_dataset
+
+    rows = []
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            raw = json.load(f)
+        if not isinstance(raw, list):
+            continue  # e.g. *_report.json
+        rows.extend(dict(r, file=os.path.basename(path)) for r in flatten_dataset(raw))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Near-duplicate clusters across the LOB dataset files")
+    parser.add_argument("--datasets-glob", type=str, default=DATASETS_GLOB)
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Minimum estimated Jaccard similarity of character shingles")
+    parser.add_argument("--caps", type=str, default="1,3,5", help="Per-(cluster, label) caps to report")
+    parser.add_argument("--examples", type=int, default=5, help="Largest clusters to print")
+    parser.add_argument("--output-json", type=str, default=None)
+    args = parser.parse_args()
+
+    paths = sorted(glob.glob(args.datasets_glob))
+    started = time.perf_counter()
+    rows = _load_dataset_rows(paths)
+    load_seconds = time.perf_counter() - started
+    if not rows:
+        print(f"No dataset rows matched {args.datasets_glob}")
+        return 1
+
+    started = time.perf_counter()
+    cluster_ids = cluster_near_duplicates([r["text"] for r in rows], args.threshold)
+    cluster_seconds = time.perf_counter() - started
+
+    members = defaultdict(list)
+    for row, cid in zip(rows, cluster_ids):
+        members[cid].append(row)
+    distinct_texts = {cid: {r["text"] for r in m} for cid, m in members.items()}
+    cross_file = Counter()
+    for m in members.values():
+        files = sorted({r["file"] for r in m})
+        for i, f1 in enumerate(files):
+            for f2 in files[i + 1:]:
+                cross_file[f"{f1} ~ {f2}"] += 1
+
+    caps = [int(c) for c in args.caps.split(",")]
+    per_file = {}
+    for path in paths:
+        name = os.path.basename(path)
+        in_file = [(r, cid) for r, cid in zip(rows, cluster_ids) if r["file"] == name]
+        if in_file:
+            file_rows, file_ids = zip(*in_file)
+            per_file[name] = {
+                "rows": len(file_rows),
+                "afterCap": {cap: len(_cap(file_rows, file_ids, cap)) for cap in caps},
+            }
+
+    largest = sorted(members, key=lambda cid: len(distinct_texts[cid]), reverse=True)[:args.examples]
+    report = {
+        "files": len(per_file),
+        "rows": len(rows),
+        "distinctTexts": len({r["text"] for r in rows}),
+        "threshold": args.threshold,
+        "clusters": len(members),
+        "clustersWithNearDuplicates": sum(1 for t in distinct_texts.values() if len(t) > 1),
+        "seconds": {"load": load_seconds, "cluster": cluster_seconds},
+        "rowsPerSec": len(rows) / cluster_seconds if cluster_seconds else None,
+        "perFile": per_file,
+        "crossFileClusters": dict(cross_file.most_common()),
+        "largestClusters": [
+            {"distinctTexts": len(distinct_texts[cid]), "rows": len(members[cid]),
+             "labels": sorted({r["label"] for r in members[cid]}), "sample": sorted(distinct_texts[cid])[:3]}
+            for cid in largest
+        ],
+    }
+
+    print(f"{report['rows']} rows ({report['distinctTexts']} distinct texts) from {report['files']} files")
+    print(f"Clustered in {cluster_seconds:.2f}s ({report['rowsPerSec']:.0f} rows/sec): {report['clusters']} clusters, "
+          f"{report['clustersWithNearDuplicates']} with near-duplicate texts")
+    for name, info in per_file.items():
+        after = ", ".join(f"cap {c}: {n}" for c, n in info["afterCap"].items())
+        print(f"  {name:50s} {info['rows']:6d} rows  ({after})")
+    if cross_file:
+        print("Clusters spanning files:")
+        for pair, n in cross_file.most_common(10):
+            print(f"  {n:6d}  {pair}")
+
+    if args.output_json:
+        os.makedirs(os.path.dirname(args.output_json) or ".", exist_ok=True)
+        with open(args.output_json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"\nReport written to {args.output_json}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
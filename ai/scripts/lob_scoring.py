@@ -0,0 +1,91 @@
+"""
+Turning model scores into LOB recommendations.
+
+Shared by the prediction service (predict_app.py) and the offline bulk CLI
+(bulk_predict_lob.py) so online and batch output cannot drift apart. Imports
+only numpy, so the service can use it without loading the training stack.
+"""
+
+import json
+
+import numpy as np
+
+NO_CONFIDENT_MATCH_MESSAGE = (
+    "Your description doesn't clearly match any of our current lines of business. "
+    "Please add your line(s) manually below."
+)
+
+
+def label_map_from_taxonomy(taxonomy):
+    """Map 'taxCode|detailedLine' -> {taxCode, lineOfBusiness, detailedLine, psicCode}."""
+    mapping = {}
+    for entry in taxonomy:
+        tc = entry["taxCode"]
+        lob = entry["lineOfBusiness"]
+        for i, dl in enumerate(entry["detailedLines"]):
+            psic = entry["psicCodes"][i] if i < len(entry["psicCodes"]) else ""
+            mapping[f"{tc}|{dl}"] = {
+                "taxCode": tc,
+                "lineOfBusiness": lob,
+                "detailedLine": dl,
+                "psicCode": psic,
+            }
+    return mapping
+
+
+def load_label_map(taxonomy_path):
+    with open(taxonomy_path, "r", encoding="utf-8") as f:
+        return label_map_from_taxonomy(json.load(f))
+
+
+def score(model, X, labels, cascade=None):
+    """Class probabilities (rows aligned with X, columns with `labels`)."""
+    if cascade is not None:
+        return cascade.predict_proba(X)
+    if hasattr(model, "predict_proba"):
+        return model.predict_proba(X)
+    if hasattr(model, "decision_function"):
+        decision = model.decision_function(X)
+        if decision.ndim == 1:
+            decision = np.column_stack([-decision, decision])
+        exp_d = np.exp(decision - decision.max(axis=1, keepdims=True))
+        return exp_d / exp_d.sum(axis=1, keepdims=True)
+    # Label-only models: one-hot, so the predicted label is returned with confidence 1.0
+    label_to_idx = {l: i for i, l in enumerate(labels)}
+    proba = np.zeros((X.shape[0], len(labels)))
+    for row, pred in enumerate(model.predict(X)):
+        if str(pred) in label_to_idx:
+            proba[row, label_to_idx[str(pred)]] = 1.0
+    return proba
+
+
+def top_indices(proba, top_k):
+    return np.argsort(proba)[::-1][: min(top_k, len(proba))]
+
+
+def build_prediction(proba, labels, label_map, top_k, threshold, min_confidence):
+    """Turn one row of class probabilities into the /predict response payload."""
+    top = top_indices(proba, top_k)
+    best_prob = float(proba[top[0]]) if len(top) else 0
+    if best_prob < min_confidence:
+        return {
+            "recommendations": [],
+            "noConfidentMatch": True,
+            "message": NO_CONFIDENT_MATCH_MESSAGE,
+        }
+
+    recommendations = []
+    seen = set()
+    for idx in top:
+        if proba[idx] < threshold:
+            continue
+        label = labels[idx]
+        if label in seen:
+            continue
+        seen.add(label)
+        info = label_map.get(label)
+        if info:
+            rec = dict(info)
+            rec["confidence"] = round(float(proba[idx]), 4)
+            recommendations.append(rec)
+    return {"recommendations": recommendations}
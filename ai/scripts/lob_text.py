@@ -0,0 +1,83 @@
+"""
+Text normalization shared by training and serving.
+
+Kept free of scikit-learn imports so the prediction service (and bulk
+prediction workers) can normalize input without importing the training stack.
+"""
+
+import re
+import unicodedata
+
+CANONICAL_TOKEN_MAP = {
+    "tindahan": "store",
+    "kainan": "restaurant",
+    "karinderia": "eatery",
+    "karinderya": "eatery",
+    "carinderia": "eatery",
+    "botika": "pharmacy",
+    "sanglaan": "pawnshop",
+    "nagbebenta": "selling",
+    "nagtitinda": "selling",
+    "nagde-deliver": "delivery",
+    "nagpapautang": "lending",
+    "bukid": "farm",
+    "gulay": "vegetables",
+    "bigas": "rice",
+    "kape": "coffee",
+    "gupit": "haircut",
+    # Food-related Filipino words
+    "pagkain": "food",
+    "lutong-bahay": "homecookedfood",
+    "lutong": "cooked",
+    "luto": "cooked",
+    "ulam": "viand",
+    "merienda": "snack",
+    "kakanin": "ricecake",
+    "pandesal": "bread",
+    "tinapay": "bread",
+    "panaderia": "bakery",
+    "inumin": "drinks",
+    "ihaw": "grilled",
+    "prito": "fried",
+    "nilaga": "boiled",
+    "sinigang": "soupdish",
+    "adobo": "stewdish",
+    "lugaw": "porridge",
+    "goto": "porridge",
+    "bulalo": "soupdish",
+    "tusok-tusok": "streetfood",
+    "fishball": "streetfood",
+    "kwek-kwek": "streetfood",
+    "siomai": "dimsum",
+    "lumpia": "springroll",
+    "halo-halo": "dessert",
+    "manok": "chicken",
+    "baboy": "pork",
+    "baka": "beef",
+    "isda": "fish",
+    "prutas": "fruits",
+    "karne": "meat",
+    "palengke": "market",
+    "damit": "clothing",
+    "sapatos": "shoes",
+    "gamot": "medicine",
+    "laba": "laundry",
+    "sakahan": "farm",
+    "taniman": "plantation",
+}
+
+
+def normalize_text(text):
+    """Normalize bilingual free text into a more stable representation for training/inference."""
+    text = unicodedata.normalize("NFKC", str(text or "")).lower().strip()
+    if not text:
+        return ""
+
+    text = text.replace("&", " and ")
+    text = re.sub(r"[^\w\s/-]", " ", text)
+    text = re.sub(r"\s+", " ", text).strip()
+
+    for source, target in CANONICAL_TOKEN_MAP.items():
+        text = re.sub(rf"\b{re.escape(source)}\b", target, text)
+
+    return text
@@ -0,0 +1,390 @@
+"""
+Versioned on-disk registry of LOB model bundles.
+
+Layout:
+    ai/models/registry/<version>/        one complete bundle per training run
+        lob_vectorizer.joblib, lob_model.joblib, lob_labels.json,
+        [lob_cascade_stage1.joblib], lob_artifact_checksums.json, training_meta.json
+    ai/models/registry/CURRENT.json      {"version": ..., "previous": ..., "promotedAt": ...}
+
+A bundle is written into a hidden staging directory and renamed into place
+only when complete, so a crash mid-write never leaves a half-written version.
+Promotion rewrites the pointer file with an atomic os.replace(); readers see
+either the old or the new version, never a mix. Models trained before the
+registry existed (flat files directly in ai/models) are still served when no
+pointer exists.
+
+Retention is opt-in: with LOB_REGISTRY_KEEP=N (default 0 = keep every version)
+each publish() prunes the registry down to the N newest versions, never removing
+the current or previous one, nor a version this process has protect()ed (e.g.
+the service's shadow candidate). publish() always deletes staging directories
+left behind by crashed writers once they are a day old.
+
+Loading: verify_bundle() checks a bundle's artifacts against its checksum file
+before anything is unpickled, and load_bundle() then loads it. Both live here,
+not in train_lob_model, so serving code never imports the training stack.
+
+Artifact digests: writers hash while they write (HashingWriter), so train()
+never re-reads what it just dumped; readers go through DigestCache, which
+remembers digests keyed on (path, inode, size, mtime_ns) and rehashes only
+files that changed, in parallel with a 1 MB read buffer.
+"""
+
+import hashlib
+import hmac
+import json
+import os
+import shutil
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+import joblib
+
+from lob_cascade import STAGE1_FILENAME
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+AI_ROOT = os.path.dirname(SCRIPT_DIR)
+MODELS_DIR = os.path.join(AI_ROOT, "models")
+REGISTRY_DIRNAME = "registry"
+POINTER_FILENAME = "CURRENT.json"
+CHECKSUMS_FILENAME = "lob_artifact_checksums.json"
+META_FILENAME = "training_meta.json"
+STAGING_PREFIX = ".staging-"
+BUNDLE_FILENAMES = ("lob_vectorizer.joblib", "lob_model.joblib", "lob_labels.json")
+HASH_CHUNK_BYTES = 1 << 20
+KEEP_VERSIONS = int(os.environ.get("LOB_REGISTRY_KEEP", 0))
+# Older staging directories belong to writers that died mid-write; younger ones may still be in use
+STALE_STAGING_SECONDS = 24 * 3600
+
+
+class RegistryError(Exception):
+    """Raised for unknown versions or incomplete bundles."""
+
+
+# Versions this process still needs, e.g. a shadow candidate (reference counts); prune() leaves them alone
+_protected = Counter()
+_protected_lock = threading.Lock()
+
+
+def protect(version):
+    """Keep prune() from removing `version` until a matching unprotect()."""
+    with _protected_lock:
+        _protected[version] += 1
+
+
+def unprotect(version):
+    with _protected_lock:
+        _protected[version] -= 1
+        if _protected[version] <= 0:
+            del _protected[version]
+
+
+class HashingWriter:
+    """Binary file wrapper that SHA-256s everything written through it.
+
+        with HashingWriter(path) as f:
+            joblib.dump(obj, f)
+        digest = f.hexdigest()
+    """
+
+    def __init__(self, path):
+        self._file = open(path, "wb")
+        self._hash = hashlib.sha256()
+
+    def write(self, data):
+        self._hash.update(data)
+        return self._file.write(data)
+
+    def tell(self):
+        return self._file.tell()
+
+    def flush(self):
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def hexdigest(self):
+        return self._hash.hexdigest()
+
+
+def file_sha256(path, chunk_size=HASH_CHUNK_BYTES):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _stat_key(path):
+    st = os.stat(path)
+    return (os.path.realpath(path), st.st_ino, st.st_size, st.st_mtime_ns)
+
+
+class DigestCache:
+    """SHA-256 digests of files, recomputed only when (path, inode, size, mtime_ns) changes."""
+
+    def __init__(self, max_workers=4):
+        self.max_workers = max_workers
+        self._digests = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _hash(self, path):
+        before = _stat_key(path)
+        digest = file_sha256(path)
+        # Only remember the digest if the file did not change while being read
+        return (before if _stat_key(path) == before else None), digest
+
+    def digests(self, paths):
+        """{path: sha256 hex}; raises OSError if a path is missing."""
+        out, todo = {}, []
+        with self._lock:
+            for p in paths:
+                digest = self._digests.get(_stat_key(p))
+                if digest is None:
+                    todo.append(p)
+                else:
+                    out[p] = digest
+            self.hits += len(out)
+            self.misses += len(todo)
+        if len(todo) == 1:
+            results = [self._hash(todo[0])]
+        elif todo:
+            # hashlib releases the GIL on large updates, so threads hash files concurrently
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(todo))) as pool:
+                results = list(pool.map(self._hash, todo))
+        else:
+            results = []
+        with self._lock:
+            for p, (key, digest) in zip(todo, results):
+                out[p] = digest
+                if key is not None:
+                    self._digests[key] = digest
+        return out
+
+    def remember(self, path, digest):
+        """Seed the cache for a file whose digest is already known (e.g. just written)."""
+        with self._lock:
+            self._digests[_stat_key(path)] = digest
+
+
+# Shared by train() (seeds digests of files it writes) and the service's verification
+digest_cache = DigestCache()
+
+
+def registry_dir(models_dir=MODELS_DIR):
+    return os.path.join(models_dir, REGISTRY_DIRNAME)
+
+
+def pointer_path(models_dir=MODELS_DIR):
+    return os.path.join(registry_dir(models_dir), POINTER_FILENAME)
+
+
+def version_dir(version, models_dir=MODELS_DIR):
+    if not version or os.sep in version or version.startswith(".") or version == POINTER_FILENAME:
+        raise RegistryError(f"Invalid version name: {version!r}")
+    return os.path.join(registry_dir(models_dir), version)
+
+
+def _write_json_atomic(path, payload):
+    tmp = f"{path}.tmp-{os.getpid()}"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(payload, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def read_pointer(models_dir=MODELS_DIR):
+    """Return the pointer dict, or None if nothing has been promoted yet."""
+    path = pointer_path(models_dir)
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def current_version(models_dir=MODELS_DIR):
+    pointer = read_pointer(models_dir)
+    return pointer.get("version") if pointer else None
+
+
+def active_model_dir(models_dir=MODELS_DIR):
+    """Directory holding the artifacts to serve: the promoted version, else the legacy flat layout."""
+    version = current_version(models_dir)
+    return version_dir(version, models_dir) if version else models_dir
+
+
+def new_version_name(now=None):
+    now = now or datetime.now(timezone.utc)
+    return now.strftime("%Y%m%dT%H%M%S%fZ")
+
+
+def create_staging_dir(models_dir=MODELS_DIR):
+    """Make an empty staging directory for a new bundle; pass it to publish() once complete."""
+    os.makedirs(registry_dir(models_dir), exist_ok=True)
+    path = os.path.join(registry_dir(models_dir), f"{STAGING_PREFIX}{new_version_name()}-{os.getpid()}")
+    os.makedirs(path)
+    return path
+
+
+def publish(staging_dir, models_dir=MODELS_DIR, version=None):
+    """Atomically move a complete staging directory into the registry; returns the version name."""
+    if not os.path.exists(os.path.join(staging_dir, CHECKSUMS_FILENAME)):
+        raise RegistryError(f"{staging_dir} has no {CHECKSUMS_FILENAME}; refusing to publish an incomplete bundle")
+    version = version or new_version_name()
+    target = version_dir(version, models_dir)
+    if os.path.exists(target):
+        raise RegistryError(f"Version {version} already exists")
+    os.rename(staging_dir, target)
+    prune(models_dir)
+    return version
+
+
+def prune(models_dir=MODELS_DIR, keep=None, stale_staging_seconds=STALE_STAGING_SECONDS):
+    """Delete all but the `keep` newest versions and stale staging directories; returns the removed names.
+
+    keep defaults to KEEP_VERSIONS; 0 keeps every version. The current and previous
+    versions in CURRENT.json and protect()ed versions are always kept.
+    """
+    keep = KEEP_VERSIONS if keep is None else keep
+    root = registry_dir(models_dir)
+    if not os.path.isdir(root):
+        return []
+    pointer = read_pointer(models_dir) or {}
+    with _protected_lock:
+        pinned = {pointer.get("version"), pointer.get("previous"), *_protected}
+    versions = sorted(
+        (name for name in os.listdir(root) if not name.startswith(".") and os.path.isdir(os.path.join(root, name))),
+        reverse=True,
+    )
+    doomed = [name for name in versions[keep:] if name not in pinned] if keep > 0 else []
+    cutoff = time.time() - stale_staging_seconds
+    for name in os.listdir(root):
+        if not name.startswith(STAGING_PREFIX):
+            continue
+        try:
+            if os.path.getmtime(os.path.join(root, name)) < cutoff:
+                doomed.append(name)
+        except OSError:
+            pass  # published or removed by its writer meanwhile
+    for name in doomed:
+        shutil.rmtree(os.path.join(root, name), ignore_errors=True)
+    return doomed
+
+
+def verify_bundle(model_dir, names=None):
+    """Check a bundle's artifacts against its checksum file before anything is unpickled.
+
+    names defaults to BUNDLE_FILENAMES plus the cascade first stage when present.
+    Returns the verified artifact paths, in that order. Raises RegistryError if an
+    artifact is missing or does not match.
+    """
+    checksums_path = os.path.join(model_dir, CHECKSUMS_FILENAME)
+    try:
+        with open(checksums_path, "r", encoding="utf-8") as f:
+            expected = json.load(f)
+    except (OSError, ValueError) as exc:
+        raise RegistryError(f"Cannot read {checksums_path}: {exc}") from exc
+    if names is None:
+        names = list(BUNDLE_FILENAMES)
+        if os.path.exists(os.path.join(model_dir, STAGE1_FILENAME)):
+            names.append(STAGE1_FILENAME)
+    paths = [os.path.join(model_dir, name) for name in names]
+    try:
+        digests = digest_cache.digests(paths)
+    except OSError as exc:
+        raise RegistryError(f"Cannot read model artifact in {model_dir}: {exc}") from exc
+    for name, path in zip(names, paths):
+        want = expected.get(name)
+        if not want:
+            raise RegistryError(f"Missing checksum entry for {name} in {model_dir}")
+        if not hmac.compare_digest(digests[path], want):
+            raise RegistryError(f"Checksum mismatch for {name} in {model_dir}")
+    return paths
+
+
+def load_bundle(model_dir):
+    """Load a published bundle after verifying its checksums (verify_bundle).
+
+    Returns a dict with vectorizer, model, labels, stage1 (or None) and meta.
+    Raises RegistryError if an artifact is missing or does not match.
+    """
+    paths = verify_bundle(model_dir)
+    with open(paths[2], "r", encoding="utf-8") as f:
+        unique_labels = json.load(f)
+    meta = {}
+    meta_path = os.path.join(model_dir, META_FILENAME)
+    if os.path.exists(meta_path):
+        with open(meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+    return {
+        "vectorizer": joblib.load(paths[0]),
+        "model": joblib.load(paths[1]),
+        "labels": unique_labels,
+        "stage1": joblib.load(paths[3]) if len(paths) > 3 else None,
+        "meta": meta,
+    }
+
+
+def promote(version, models_dir=MODELS_DIR):
+    """Point CURRENT.json at `version`; the version it replaces is recorded as "previous"."""
+    target = version_dir(version, models_dir)
+    if not os.path.exists(os.path.join(target, CHECKSUMS_FILENAME)):
+        raise RegistryError(f"Unknown or incomplete version: {version}")
+    old = read_pointer(models_dir) or {}
+    pointer = {
+        "version": version,
+        "previous": old.get("version") if old.get("version") != version else old.get("previous"),
+        "promotedAt": datetime.now(timezone.utc).isoformat(),
+    }
+    _write_json_atomic(pointer_path(models_dir), pointer)
+    return pointer
+
+
+def clear_current(models_dir=MODELS_DIR):
+    """Remove the pointer so the legacy flat artifacts in models_dir are served again."""
+    path = pointer_path(models_dir)
+    if os.path.exists(path):
+        os.remove(path)
+
+
+def list_versions(models_dir=MODELS_DIR):
+    """All published versions, newest first, with their training metadata summary."""
+    root = registry_dir(models_dir)
+    if not os.path.isdir(root):
+        return []
+    current = current_version(models_dir)
+    versions = []
+    for name in sorted(os.listdir(root), reverse=True):
+        path = os.path.join(root, name)
+        if name.startswith(".") or not os.path.isdir(path):
+            continue
+        meta = {}
+        meta_path = os.path.join(path, META_FILENAME)
+        if os.path.exists(meta_path):
+            try:
+                with open(meta_path, "r", encoding="utf-8") as f:
+                    meta = json.load(f)
+            except (OSError, ValueError):
+                pass
+        versions.append({
+            "version": name,
+            "current": name == current,
+            "algorithm": meta.get("algorithm"),
+            "trainedAt": meta.get("trainedAt"),
+            "cv_accuracy": meta.get("cv_accuracy"),
+            "n_labels": meta.get("n_labels"),
+        })
+    return versions
@@ -0,0 +1,97 @@
+"""
+Thread and worker budgets for serving, training and evaluation.
+
+Each stage gets a budget of
+    threads  — BLAS/OpenMP threads per process (applied with threadpoolctl)
+    workers  — parallel workers: joblib n_jobs for training/evaluation, concurrent
+               /predict executions (the admission limit; 0 = unlimited) for serving
+
+    with resource_governor.limit("training") as budget:
+        GridSearchCV(..., n_jobs=budget.workers).fit(X, y)
+
+Defaults keep stages from oversubscribing the cores they share with the
+prediction service: one BLAS thread everywhere (single-row sparse scoring gains
+nothing from more), training uses every core but one so an in-process /train
+leaves room for /predict, and evaluation runs single-worker.
+
+Environment overrides:
+    LOB_SERVING_THREADS   (1)      LOB_MAX_IN_FLIGHT    (0)  serving workers, see admission control
+    LOB_TRAINING_THREADS  (1)      LOB_TRAINING_WORKERS (cpu_count - 1, at least 1)
+    LOB_EVAL_THREADS      (1)      LOB_EVAL_WORKERS     (1)
+
+Threads must be at least 1. Training and evaluation workers must be at least 1,
+or -1 for every core (as joblib reads it); serving workers at least 0. Anything
+else raises ValueError naming the variable.
+"""
+
+import os
+from collections import namedtuple
+from contextlib import contextmanager
+
+from threadpoolctl import threadpool_limits
+
+Budget = namedtuple("Budget", ["threads", "workers"])
+
+STAGES = ("serving", "training", "evaluation")
+_ENV = {
+    "serving": ("LOB_SERVING_THREADS", "LOB_MAX_IN_FLIGHT"),
+    "training": ("LOB_TRAINING_THREADS", "LOB_TRAINING_WORKERS"),
+    "evaluation": ("LOB_EVAL_THREADS", "LOB_EVAL_WORKERS"),
+}
+
+
+def _defaults(cpus):
+    return {
+        "serving": Budget(1, 0),
+        "training": Budget(1, max(1, cpus - 1)),
+        "evaluation": Budget(1, 1),
+    }
+
+
+def _env_int(name, default):
+    raw = os.environ.get(name)
+    if raw is None:
+        return default
+    try:
+        return int(raw)
+    except ValueError:
+        raise ValueError(f"{name} must be an integer, got {raw!r}") from None
+
+
+def budget(stage):
+    """The Budget for `stage`, read from the environment on every call."""
+    default = _defaults(os.cpu_count() or 1)[stage]
+    threads_var, workers_var = _ENV[stage]
+    threads = _env_int(threads_var, default.threads)
+    workers = _env_int(workers_var, default.workers)
+    if threads < 1:
+        raise ValueError(f"{threads_var} must be at least 1")
+    if stage == "serving":
+        if workers < 0:
+            raise ValueError(f"{workers_var} must be at least 0 (0 = unlimited)")
+    elif workers < 1 and workers != -1:
+        raise ValueError(f"{workers_var} must be at least 1, or -1 for every core")
+    return Budget(threads, workers)
+
+
+def summary():
+    """All budgets in effect, for training_meta.json and /health."""
+    out = {"cpuCount": os.cpu_count()}
+    for stage in STAGES:
+        out[stage] = budget(stage)._asdict()
+    return out
+
+
+@contextmanager
+def limit(stage):
+    """Cap BLAS/OpenMP threads to the stage's budget for the duration of the block."""
+    b = budget(stage)
+    with threadpool_limits(limits=b.threads):
+        yield b
+
+
+def apply(stage):
+    """Cap BLAS/OpenMP threads for the rest of the process (e.g. the serving process at startup)."""
+    b = budget(stage)
+    threadpool_limits(limits=b.threads)
+    return b
@@ -22,6 +22,7 @@ from typing import Dict, List
 import joblib
 import numpy as np
 from sklearn.metrics import accuracy_score, confusion_matrix, f1_score, precision_score, recall_score
+from model_registry import active_model_dir
 from train_lob_model import normalize_text
 
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -127,9 +128,10 @@ def mutate_text(text: str) -> str:
 def evaluate() -> Dict[str, float]:
     random.seed(42)
 
-    vec_path = os.path.join(MODELS_DIR, "lob_vectorizer.joblib")
-    model_path = os.path.join(MODELS_DIR, "lob_model.joblib")
-    labels_path = os.path.join(MODELS_DIR, "lob_labels.json")
+    model_dir = active_model_dir(MODELS_DIR)
+    vec_path = os.path.join(model_dir, "lob_vectorizer.joblib")
+    model_path = os.path.join(model_dir, "lob_model.joblib")
+    labels_path = os.path.join(model_dir, "lob_labels.json")
 
     vectorizer = joblib.load(vec_path)
     model = joblib.load(model_path)
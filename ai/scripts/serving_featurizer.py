@@ -0,0 +1,206 @@
+"""
+Cached serving featurizer for the word + char_wb TF-IDF union.
+
+Produces the same sparse matrix as the fitted ``FeatureUnion.transform`` but
+keeps a bounded LRU cache from each whitespace token to its precomputed
+char_wb (feature index, raw count) pairs. Real descriptions reuse a small
+vocabulary ("store", "selling", "sari-sari", ...), so a request only merges
+cached fragments, then applies sublinear TF, IDF and L2 normalization.
+
+Usage (serving):
+    featurizer = CachedTfidfFeaturizer(vectorizer, cache_size=20000)
+    X = featurizer.transform([normalize_text(description)])
+"""
+
+from functools import lru_cache
+
+import numpy as np
+from scipy import sparse
+
+DEFAULT_CACHE_SIZE = 20000
+
+
+def char_wb_word_ngrams(word, min_n, max_n):
+    """char_wb n-grams of a single whitespace-free token (mirrors scikit-learn's analyzer)."""
+    w = " " + word + " "
+    w_len = len(w)
+    ngrams = []
+    for n in range(min_n, max_n + 1):
+        offset = 0
+        ngrams.append(w[offset : offset + n])
+        while offset + n < w_len:
+            offset += 1
+            ngrams.append(w[offset : offset + n])
+        if offset == 0:  # a short word (w_len < n) is counted only once
+            break
+    return ngrams
+
+
+def _check_supported(vec):
+    if vec.analyzer not in ("word", "char_wb"):
+        raise ValueError(f"unsupported analyzer: {vec.analyzer!r}")
+    if vec.norm not in ("l2", None):
+        raise ValueError(f"unsupported norm: {vec.norm!r}")
+    if not hasattr(vec, "vocabulary_"):
+        raise ValueError("vectorizer is not fitted")
+
+
+class _TfidfBlock:
+    """Shared TF-IDF weighting for one fitted TfidfVectorizer in the union."""
+
+    def __init__(self, vec, offset):
+        _check_supported(vec)
+        self.offset = offset
+        self.size = len(vec.vocabulary_)
+        self.vocabulary = vec.vocabulary_
+        self.preprocess = vec.build_preprocessor()
+        self.min_n, self.max_n = vec.ngram_range
+        self.binary = vec.binary
+        self.sublinear_tf = vec.sublinear_tf
+        self.idf = vec.idf_ if vec.use_idf else None
+        self.l2 = vec.norm == "l2"
+        self.dtype = vec.dtype
+
+    def counts(self, text):
+        raise NotImplementedError
+
+    def weights(self, text):
+        """Return (sorted local column indices, tf-idf weights) for one document."""
+        counts = self.counts(text)
+        if not counts:
+            return np.empty(0, dtype=np.int32), np.empty(0, dtype=self.dtype)
+        cols = np.fromiter(sorted(counts), dtype=np.int32, count=len(counts))
+        data = np.fromiter((counts[c] for c in cols.tolist()), dtype=self.dtype, count=len(cols))
+        if self.binary:
+            data[:] = 1
+        if self.sublinear_tf:
+            np.log(data, data)
+            data += 1.0
+        if self.idf is not None:
+            data *= self.idf[cols]
+        if self.l2:
+            # Same arithmetic as sklearn's row normalization (squares in the feature dtype, summed
+            # in order in float64, division in float64), so float32 output matches transform() exactly
+            norm = np.sqrt(np.cumsum(data * data, dtype=np.float64)[-1])
+            if norm > 0:
+                data = (data.astype(np.float64) / norm).astype(self.dtype, copy=False)
+        return cols, data
+
+
+class _WordBlock(_TfidfBlock):
+    def __init__(self, vec, offset):
+        super().__init__(vec, offset)
+        self.tokenize = vec.build_tokenizer()
+        self.stop_words = vec.get_stop_words()
+
+    def counts(self, text):
+        tokens = self.tokenize(self.preprocess(text))
+        if self.stop_words is not None:
+            tokens = [t for t in tokens if t not in self.stop_words]
+        vocab = self.vocabulary
+        counts = {}
+        n_tokens = len(tokens)
+        for n in range(self.min_n, min(self.max_n, n_tokens) + 1):
+            for i in range(n_tokens - n + 1):
+                j = vocab.get(tokens[i] if n == 1 else " ".join(tokens[i : i + n]))
+                if j is not None:
+                    counts[j] = counts.get(j, 0) + 1
+        return counts
+
+
+class _CharWbBlock(_TfidfBlock):
+    def __init__(self, vec, offset, cache_size):
+        super().__init__(vec, offset)
+        self.token_counts = lru_cache(maxsize=cache_size)(self._token_counts)
+
+    def _token_counts(self, token):
+        vocab = self.vocabulary
+        counts = {}
+        for gram in char_wb_word_ngrams(token, self.min_n, self.max_n):
+            j = vocab.get(gram)
+            if j is not None:
+                counts[j] = counts.get(j, 0) + 1
+        return tuple(counts.items())
+
+    def counts(self, text):
+        counts = {}
+        token_counts = self.token_counts
+        for token in self.preprocess(text).split():
+            for j, c in token_counts(token):
+                counts[j] = counts.get(j, 0) + c
+        return counts
+
+
+class CachedTfidfFeaturizer:
+    """Drop-in ``transform`` for a fitted word/char_wb TfidfVectorizer union with a per-token cache.
+
+    Raises ValueError at construction if the vectorizer uses options this
+    featurizer does not reproduce; callers should then fall back to the
+    vectorizer itself.
+    """
+
+    def __init__(self, vectorizer, cache_size=DEFAULT_CACHE_SIZE):
+        # Imported here so importing this module (and the service) doesn't pay for scikit-learn
+        from sklearn.pipeline import FeatureUnion
+
+        if isinstance(vectorizer, FeatureUnion):
+            if vectorizer.transformer_weights:
+                raise ValueError("transformer_weights are not supported")
+            parts = [vec for _, vec in vectorizer.transformer_list if vec not in ("drop", None)]
+        else:
+            parts = [vectorizer]
+
+        self.blocks = []
+        offset = 0
+        for vec in parts:
+            if getattr(vec, "analyzer", None) == "char_wb":
+                block = _CharWbBlock(vec, offset, cache_size)
+            elif getattr(vec, "analyzer", None) == "word":
+                block = _WordBlock(vec, offset)
+            else:
+                raise ValueError(f"unsupported transformer: {type(vec).__name__}")
+            self.blocks.append(block)
+            offset += block.size
+        self.n_features = offset
+        self.dtype = np.result_type(*[b.dtype for b in self.blocks])
+
+    def transform(self, texts):
+        indptr = [0]
+        indices = []
+        data = []
+        nnz = 0
+        for text in texts:
+            for block in self.blocks:
+                cols, weights = block.weights(text)
+                indices.append(cols + block.offset if block.offset else cols)
+                data.append(weights)
+                nnz += len(cols)
+            indptr.append(nnz)
+        X = sparse.csr_matrix(
+            (
+                np.concatenate(data) if data else np.empty(0, dtype=self.dtype),
+                np.concatenate(indices) if indices else np.empty(0, dtype=np.int32),
+                np.asarray(indptr, dtype=np.int32),
+            ),
+            shape=(len(texts), self.n_features),
+            dtype=self.dtype,
+        )
+        X.has_sorted_indices = True
+        return X
+
+    def cache_info(self):
+        """Aggregate hit/miss/size counters of the per-token caches."""
+        hits = misses = currsize = maxsize = 0
+        for block in self.blocks:
+            if isinstance(block, _CharWbBlock):
+                info = block.token_counts.cache_info()
+                hits += info.hits
+                misses += info.misses
+                currsize += info.currsize
+                maxsize += info.maxsize or 0
+        return {"hits": hits, "misses": misses, "size": currsize, "maxsize": maxsize}
+
+    def cache_clear(self):
+        for block in self.blocks:
+            if isinstance(block, _CharWbBlock):
+                block.token_counts.cache_clear()
@@ -5,34 +5,62 @@ Loads the LOB recommendation dataset, flattens multi-recommendation entries,
 adds hard-case rows + noisy augmentation, trains robust text classifiers
 (Logistic Regression, Linear SVC, ComplementNB), compares them with
 cross-validation, runs hyperparameter tuning on the best, and saves the best model + vectorizer
-+ label list + tuning metadata.
++ label list + tuning metadata. A ComplementNB first stage for the confidence cascade
+(see lob_cascade.py) is saved next to it when a precision-parity threshold exists.
+
+Optionally prunes the TF-IDF vocabulary to the smallest chi-squared feature
+budget whose CV accuracy stays within --feature-budget-delta of the full model
+(features are ranked inside each CV fold, on its training rows only).
+
+Each run is saved as a new version under ai/models/registry/ (see
+model_registry.py) and promoted to current unless --no-promote is given.
 
 Usage:
     python ai/scripts/train_lob_model.py [--dataset PATH_TO_JSON] [--no-tune]
+                                         [--feature-budget-delta 0.002] [--no-cascade]
+                                         [--no-promote] [--warm-start] [--near-dup-cap N]
 """
 
 import argparse
 import glob
 import hashlib
+import io
 import json
 import os
 import random
 import re
 import sys
-import unicodedata
+import time
 from collections import Counter
 from datetime import datetime, timezone
 
+try:
+    import resource
+except ImportError:  # Windows: no peak-RSS figures in training_meta.json "stages"
+    resource = None
+
 import joblib
 import numpy as np
+from scipy import sparse
+from sklearn.base import clone
 from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.feature_selection import chi2
 from sklearn.naive_bayes import ComplementNB
 from sklearn.linear_model import LogisticRegression
 from sklearn.pipeline import FeatureUnion
 from sklearn.svm import LinearSVC
-from sklearn.model_selection import cross_val_score, StratifiedKFold, GridSearchCV
+from sklearn.model_selection import StratifiedKFold, GridSearchCV
 from sklearn.metrics import classification_report, accuracy_score
 from sklearn.calibration import CalibratedClassifierCV
+from sklearn.preprocessing import normalize
+
+from lob_cascade import STAGE1_FILENAME, tune_cascade_threshold
+from lob_near_dup import cap_cluster_rows
+from lob_text import normalize_text
+import model_registry
+import resource_governor
+# Bundle loading lives in model_registry (serving code must not import this module); kept importable from here
+from model_registry import load_bundle, verify_bundle
 
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 AI_ROOT = os.path.dirname(SCRIPT_DIR)
@@ -50,90 +78,41 @@ else:
     DEFAULT_DATASET = FULL_DATASET
 TAXONOMY_PATH = os.path.join(AI_ROOT, "data", "line_of_business.json")
 MODELS_DIR = os.path.join(AI_ROOT, "models")
-CHECKSUMS_PATH = os.path.join(MODELS_DIR, "lob_artifact_checksums.json")
 LOW_RECALL_DATASET_GLOB = os.path.join(AI_ROOT, "datasets", "generated_batch_*_low_recall.json")
 REALWORLD_HOLDOUT_DATASET = os.path.join(AI_ROOT, "datasets", "lob_recommendation_realworld_holdout.json")
 
-CANONICAL_TOKEN_MAP = {
-    "tindahan": "store",
-    "kainan": "restaurant",
-    "karinderia": "eatery",
-    "karinderya": "eatery",
-    "carinderia": "eatery",
-    "botika": "pharmacy",
-    "sanglaan": "pawnshop",
-    "nagbebenta": "selling",
-    "nagtitinda": "selling",
-    "nagde-deliver": "delivery",
-    "nagpapautang": "lending",
-    "bukid": "farm",
-    "gulay": "vegetables",
-    "bigas": "rice",
-    "kape": "coffee",
-    "gupit": "haircut",
-    # Food-related Filipino words
-    "pagkain": "food",
-    "lutong-bahay": "homecookedfood",
-    "lutong": "cooked",
-    "luto": "cooked",
-    "ulam": "viand",
-    "merienda": "snack",
-    "kakanin": "ricecake",
-    "pandesal": "bread",
-    "tinapay": "bread",
-    "panaderia": "bakery",
-    "inumin": "drinks",
-    "ihaw": "grilled",
-    "prito": "fried",
-    "nilaga": "boiled",
-    "sinigang": "soupdish",
-    "adobo": "stewdish",
-    "lugaw": "porridge",
-    "goto": "porridge",
-    "bulalo": "soupdish",
-    "tusok-tusok": "streetfood",
-    "fishball": "streetfood",
-    "kwek-kwek": "streetfood",
-    "siomai": "dimsum",
-    "lumpia": "springroll",
-    "halo-halo": "dessert",
-    "manok": "chicken",
-    "baboy": "pork",
-    "baka": "beef",
-    "isda": "fish",
-    "prutas": "fruits",
-    "karne": "meat",
-    "palengke": "market",
-    "damit": "clothing",
-    "sapatos": "shoes",
-    "gamot": "medicine",
-    "laba": "laundry",
-    "sakahan": "farm",
-    "taniman": "plantation",
-}
-
 FILLER_SUFFIXES = (" sa barangay", " near palengke", " po", " naman")
 
+# Noise profiles for augmentation: (per-token typo rate, filler-suffix rate).
+# AUGMENT_PROFILES are applied to every sampled row by train().
+NOISE_PROFILES = {
+    "typo": (0.18, 0.45),
+    "heavy_typo": (0.35, 0.15),
+    "filler": (0.0, 1.0),
+}
+AUGMENT_PROFILES = ("typo",)
+# Variants are generated at roughly 2000/s per CPU and starting the worker processes
+# (each imports this module) takes a few seconds, so below this many variants,
+# including the ~4000 a default train() makes, they cost more than they save.
+AUGMENT_PARALLEL_MIN_TASKS = 20000
 
-def load_taxonomy():
-    with open(TAXONOMY_PATH, "r", encoding="utf-8") as f:
-        return json.load(f)
-
+# TF-IDF features are float32 end to end (half the memory of float64; solvers that only
+# support float64 convert internally). LOB_FEATURE_DTYPE=float64 restores the old behaviour.
+FEATURE_DTYPE = np.dtype(os.environ.get("LOB_FEATURE_DTYPE", "float32"))
 
-def normalize_text(text):
-    """Normalize bilingual free text into a more stable representation for training/inference."""
-    text = unicodedata.normalize("NFKC", str(text or "")).lower().strip()
-    if not text:
-        return ""
+# Warm start: the promoted model's coefficients are reused only if at least this share of
+# this run's features (same TF-IDF block, same term) existed in its vocabulary.
+WARM_START_MIN_OVERLAP = 0.5
+WARM_START_BLOCK_PARAMS = ("analyzer", "ngram_range", "lowercase", "token_pattern", "sublinear_tf", "norm")
 
-    text = text.replace("&", " and ")
-    text = re.sub(r"[^\w\s/-]", " ", text)
-    text = re.sub(r"\s+", " ", text).strip()
+# Fractions of the fitted vocabulary tried (smallest first) by the feature-selection stage.
+FEATURE_BUDGET_FRACTIONS = (0.05, 0.1, 0.2, 0.35, 0.5, 0.75)
+FEATURE_BUDGET_LATENCY_SAMPLES = 200
 
-    for source, target in CANONICAL_TOKEN_MAP.items():
-        text = re.sub(rf"\b{re.escape(source)}\b", target, text)
 
-    return text
+def load_taxonomy():
+    with open(TAXONOMY_PATH, "r", encoding="utf-8") as f:
+        return json.load(f)
 
 
 def _inject_typo_noise(token, rng):
@@ -152,14 +131,18 @@ def _inject_typo_noise(token, rng):
     return re.sub(r"[aeiou]", lambda _: rng.choice("aeiou"), token, count=1)
 
 
-def make_noisy_variant(text, rng):
-    """Create lightweight typo/colloquial noise variants to improve robustness."""
+def make_noisy_variant(text, rng, profile="typo"):
+    """Create lightweight typo/colloquial noise variants to improve robustness.
+
+    `profile` names an entry of NOISE_PROFILES (per-token typo rate, filler-suffix rate).
+    """
+    token_rate, suffix_rate = NOISE_PROFILES[profile]
     parts = re.split(r"(\s+)", text)
     for i, part in enumerate(parts):
-        if part.strip() and part.isalpha() and rng.random() < 0.18:
+        if part.strip() and part.isalpha() and rng.random() < token_rate:
             parts[i] = _inject_typo_noise(part, rng)
     noisy = "".join(parts)
-    if rng.random() < 0.45:
+    if rng.random() < suffix_rate:
         noisy = noisy + rng.choice(FILLER_SUFFIXES)
     return normalize_text(noisy)
 
@@ -199,7 +182,7 @@ def load_holdout_row_keys():
 def load_optional_low_recall_rows(primary_dataset_path):
     """Load additional difficult examples if available to improve hard-case recall."""
     rows = []
-    primary_abs = os.path.abspath(primary_dataset_path)
+    primary_abs = os.path.abspath(primary_dataset_path) if primary_dataset_path else None
     holdout_row_keys = load_holdout_row_keys()
     for path in sorted(glob.glob(LOW_RECALL_DATASET_GLOB)):
         if os.path.abspath(path) == primary_abs:
@@ -228,21 +211,60 @@ def dedupe_rows(rows):
     return out
 
 
-def augment_rows(rows, per_label_limit=50, seed=42):
-    """Generate bounded noisy variants per label to improve typo/code-switch robustness."""
-    rng = random.Random(seed)
+def row_seed(seed, label, index, profile=""):
+    """Stable per-row seed from (seed, label, row index, profile), independent of PYTHONHASHSEED."""
+    key = f"{seed}\x1f{label}\x1f{index}\x1f{profile}".encode("utf-8")
+    return int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), "big")
+
+
+def _noisy_variant_task(task):
+    text, row_rng_seed, profile = task
+    return make_noisy_variant(text, random.Random(row_rng_seed), profile)
+
+
+def _noisy_variant_chunk(tasks):
+    return [_noisy_variant_task(task) for task in tasks]
+
+
+def augment_rows(rows, per_label_limit=50, seed=42, profiles=AUGMENT_PROFILES, workers=1,
+                 min_parallel_tasks=AUGMENT_PARALLEL_MIN_TASKS):
+    """Generate bounded noisy variants per label to improve typo/code-switch robustness.
+
+    Each label's sample and each (row, profile) variant get their own RNG seeded from
+    (seed, label, row index[, profile]), so the output does not depend on the order rows
+    are processed in: with workers > 1 (and at least min_parallel_tasks variants) they
+    are generated in joblib's loky worker processes and come back in the same order,
+    identical to workers=1. loky starts its workers fresh rather than forking, so this
+    is safe from the threaded prediction service, and it reuses the same workers as the
+    training n_jobs.
+    """
     grouped = {}
     for row in rows:
         grouped.setdefault(row["label"], []).append(row)
 
-    augmented = []
+    tasks, task_labels = [], []
     for label, label_rows in grouped.items():
-        max_take = min(per_label_limit, len(label_rows))
-        sampled = label_rows if len(label_rows) <= max_take else rng.sample(label_rows, max_take)
-        for row in sampled:
-            noisy_text = make_noisy_variant(row["text"], rng)
-            if noisy_text and noisy_text != row["text"]:
-                augmented.append({"text": noisy_text, "label": label})
+        indices = range(len(label_rows))
+        if len(label_rows) > per_label_limit:
+            indices = sorted(random.Random(row_seed(seed, label, "sample")).sample(indices, per_label_limit))
+        for i in indices:
+            for profile in profiles:
+                tasks.append((label_rows[i]["text"], row_seed(seed, label, i, profile), profile))
+                task_labels.append(label)
+
+    if workers > 1 and len(tasks) >= min_parallel_tasks:
+        size = max(1, -(-len(tasks) // (workers * 4)))
+        chunks = joblib.Parallel(n_jobs=workers, backend="loky")(
+            joblib.delayed(_noisy_variant_chunk)(tasks[i:i + size]) for i in range(0, len(tasks), size)
+        )
+        variants = [variant for chunk in chunks for variant in chunk]
+    else:
+        variants = map(_noisy_variant_task, tasks)
+
+    augmented = []
+    for (text, _, _), label, noisy_text in zip(tasks, task_labels, variants):
+        if noisy_text and noisy_text != text:
+            augmented.append({"text": noisy_text, "label": label})
     return augmented
 
 
@@ -270,11 +292,380 @@ def get_param_grid(algorithm_name):
     return grids.get(algorithm_name, {})
 
 
-def train(dataset_path=None, skip_tune=False):
-    ds_path = dataset_path or DEFAULT_DATASET
-    print(f"Loading dataset from {ds_path}")
-    with open(ds_path, "r", encoding="utf-8") as f:
-        raw = json.load(f)
+def cross_val_with_predictions(model, X, y, cv, with_proba=False):
+    """cross_val_score equivalent that also returns out-of-fold predictions.
+
+    Returns (fold accuracies, out-of-fold labels, out-of-fold probabilities or None).
+    Probability columns follow the sorted unique labels of y.
+    """
+    scores = []
+    pred = np.empty(len(y), dtype=y.dtype)
+    proba = np.zeros((len(y), len(np.unique(y)))) if with_proba else None
+    for train_idx, test_idx in cv.split(X, y):
+        est = clone(model).fit(X[train_idx], y[train_idx])
+        pred[test_idx] = est.predict(X[test_idx])
+        if with_proba:
+            proba[test_idx] = est.predict_proba(X[test_idx])
+        scores.append(float(np.mean(pred[test_idx] == y[test_idx])))
+    return np.array(scores), pred, proba
+
+
+def calibrate_linear_svc(svc, X, y):
+    """Wrap a LinearSVC in CalibratedClassifierCV for predict_proba, fitted on X, y.
+
+    With at least two rows per class, a fresh LinearSVC with svc's C is calibrated with
+    cv=min(3, smallest class). Otherwise svc itself is calibrated as-is (cv="prefit"),
+    and is fitted first if it is not already.
+    """
+    min_class_count = min(Counter(y).values())
+    if min_class_count < 2:
+        if not hasattr(svc, "coef_"):
+            svc.fit(X, y)
+        return CalibratedClassifierCV(svc, cv="prefit").fit(X, y)
+    c_value = svc.get_params().get("C", 1.0)
+    return CalibratedClassifierCV(
+        LinearSVC(max_iter=5000, C=c_value, random_state=42, dual=False, class_weight="balanced"),
+        cv=min(3, min_class_count),
+    ).fit(X, y)
+
+
+def served_oof_predictions(name, model, X, y, cv):
+    """Out-of-fold top-1 labels of `model` as train() serves it (calibrated if LinearSVC)."""
+    pred = np.empty(len(y), dtype=y.dtype)
+    for train_idx, test_idx in cv.split(X, y):
+        est = clone(model)
+        if name == "LinearSVC":
+            est = calibrate_linear_svc(est, X[train_idx], y[train_idx])
+        else:
+            est.fit(X[train_idx], y[train_idx])
+        pred[test_idx] = est.predict(X[test_idx])
+    return pred
+
+
+def build_vectorizer():
+    """Word (1-2 gram) + char_wb (3-5 gram) TF-IDF union used for training and serving."""
+    return FeatureUnion(
+        [
+            (
+                "word",
+                TfidfVectorizer(
+                    max_features=12000,
+                    ngram_range=(1, 2),
+                    sublinear_tf=True,
+                    min_df=1,
+                    max_df=0.95,
+                    strip_accents="unicode",
+                    dtype=FEATURE_DTYPE,
+                ),
+            ),
+            (
+                "char",
+                TfidfVectorizer(
+                    analyzer="char_wb",
+                    ngram_range=(3, 5),
+                    max_features=25000,
+                    sublinear_tf=True,
+                    min_df=1,
+                    strip_accents="unicode",
+                    dtype=FEATURE_DTYPE,
+                ),
+            ),
+        ]
+    )
+
+
+def _vectorizer_block_sizes(vectorizer):
+    """Feature count of each TF-IDF block in the word+char FeatureUnion, in column order."""
+    return [len(vec.vocabulary_) for _, vec in vectorizer.transformer_list]
+
+
+def slice_feature_blocks(X, kept, block_sizes):
+    """Keep columns `kept` of X and re-apply per-block L2 normalization.
+
+    Each TF-IDF block is L2-normalized on its own, so slicing a block and
+    renormalizing it gives the same matrix as transforming with a vectorizer
+    whose vocabulary was shrunk to the kept terms.
+    """
+    kept = np.sort(np.asarray(kept))
+    blocks = []
+    offset = 0
+    for size in block_sizes:
+        local = kept[(kept >= offset) & (kept < offset + size)]
+        blocks.append(normalize(X[:, local], norm="l2", copy=False))
+        offset += size
+    return sparse.hstack(blocks, format="csr")
+
+
+def shrink_vectorizer(vectorizer, kept):
+    """Return a copy of the word+char FeatureUnion restricted to columns `kept`.
+
+    Each TfidfVectorizer is rebuilt with a fixed vocabulary of its kept terms
+    (re-indexed in original column order) and the matching slice of idf_, so
+    the saved artifact only carries the selected features.
+    """
+    kept = np.sort(np.asarray(kept))
+    shrunk_list = []
+    offset = 0
+    for name, vec in vectorizer.transformer_list:
+        size = len(vec.vocabulary_)
+        local = kept[(kept >= offset) & (kept < offset + size)] - offset
+        terms = vec.get_feature_names_out()
+        shrunk = clone(vec).set_params(
+            vocabulary={terms[i]: new_idx for new_idx, i in enumerate(local)},
+            max_features=None,
+        )
+        shrunk.idf_ = vec.idf_[local]
+        shrunk_list.append((name, shrunk))
+        offset += size
+    return FeatureUnion(shrunk_list)
+
+
+def project_coefficients(coef, old_vectorizer, new_vectorizer):
+    """Re-index coefficient columns from old_vectorizer's features to new_vectorizer's.
+
+    Features are matched by (TF-IDF block, term); terms the old vocabulary did not
+    have start at 0. Returns (projected coef, share of new features that were matched).
+    """
+    old_cols, new_cols = [], []
+    old_offset = new_offset = 0
+    for (_, old), (_, new) in zip(old_vectorizer.transformer_list, new_vectorizer.transformer_list):
+        for term, j in new.vocabulary_.items():
+            i = old.vocabulary_.get(term)
+            if i is not None:
+                old_cols.append(old_offset + i)
+                new_cols.append(new_offset + j)
+        old_offset += len(old.vocabulary_)
+        new_offset += len(new.vocabulary_)
+    projected = np.zeros((coef.shape[0], new_offset), dtype=coef.dtype)
+    projected[:, new_cols] = coef[:, old_cols]
+    return projected, len(new_cols) / max(1, new_offset)
+
+
+def warm_start_init(previous, algorithm, vectorizer, unique_labels):
+    """Initial (coef, intercept, feature overlap) for the final fit from the promoted bundle.
+
+    Returns (init, None), or (None, reason) when a warm start is not possible and
+    the solver must start cold: only lbfgs LogisticRegression accepts an initial
+    solution in scikit-learn (liblinear's LinearSVC and ComplementNB do not), and
+    the promoted model must share the label set and TF-IDF configuration.
+    """
+    if previous is None:
+        return None, "no promoted model"
+    if algorithm != "LogisticRegression":
+        return None, f"{algorithm} does not support warm starts"
+    prev_model = previous["model"]
+    if type(prev_model).__name__ != "LogisticRegression":
+        return None, f"promoted model is {type(prev_model).__name__}"
+    if list(previous["labels"]) != list(unique_labels):
+        return None, "label set changed"
+    old_blocks = getattr(previous["vectorizer"], "transformer_list", [])
+    new_blocks = vectorizer.transformer_list
+    if [n for n, _ in old_blocks] != [n for n, _ in new_blocks] or any(
+        old.get_params()[p] != new.get_params()[p]
+        for (_, old), (_, new) in zip(old_blocks, new_blocks)
+        for p in WARM_START_BLOCK_PARAMS
+    ):
+        return None, "feature extractor changed"
+    coef, overlap = project_coefficients(prev_model.coef_, previous["vectorizer"], vectorizer)
+    if overlap < WARM_START_MIN_OVERLAP:
+        return None, f"only {overlap:.0%} of features overlap"
+    return (coef, prev_model.intercept_.copy(), overlap), None
+
+
+def _peak_rss_mb():
+    """Peak resident set size of this process so far, in MB (None where unavailable)."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _stage_clock(stages):
+    """Return mark(name), recording the wall time since the previous mark and the peak RSS so far."""
+    last = [time.perf_counter()]
+
+    def mark(name):
+        now = time.perf_counter()
+        stages[name] = {"seconds": now - last[0], "peakRssMb": _peak_rss_mb()}
+        last[0] = now
+
+    return mark
+
+
+def _artifact_size_bytes(*objs):
+    buf = io.BytesIO()
+    joblib.dump(objs, buf)
+    return buf.tell()
+
+
+def _median_predict_latency_ms(vectorizer, model, texts):
+    """Median single-request transform + decision_function latency in milliseconds."""
+    timings = []
+    for text in texts:
+        t0 = time.perf_counter()
+        model.decision_function(vectorizer.transform([text]))
+        timings.append((time.perf_counter() - t0) * 1000.0)
+    return float(np.median(timings)) if timings else 0.0
+
+
+def _chi2_order(X, y):
+    """Feature indices, most label-dependent (chi-squared) first."""
+    scores, _ = chi2(X, y)
+    return np.argsort(np.nan_to_num(scores, nan=0.0))[::-1]
+
+
+def _budget_fold_accuracy(estimator, X, y, train_idx, test_idx, k, block_sizes):
+    """Accuracy on one CV fold with the k features ranked on the fold's training rows (all features if k is None)."""
+    if k is not None:
+        X = slice_feature_blocks(X, np.sort(_chi2_order(X[train_idx], y[train_idx])[:k]), block_sizes)
+    fitted = clone(estimator).fit(X[train_idx], y[train_idx])
+    return accuracy_score(y[test_idx], fitted.predict(X[test_idx]))
+
+
+def select_feature_budget(vectorizer, X, y, texts, cv_mask, cv, delta, fractions=FEATURE_BUDGET_FRACTIONS):
+    """Pick the smallest chi-squared feature budget whose CV accuracy is within `delta` of the full model.
+
+    Budgets are scored with the (cheap) LinearSVC candidate from get_models(). Each
+    fold ranks features on its own training rows, so held-out labels never choose
+    the features they are scored with; the chosen budget's features are then
+    ranked on all rows. Returns (kept_indices or None, report) — None means the
+    full vocabulary is kept.
+    """
+    block_sizes = _vectorizer_block_sizes(vectorizer)
+    n_features = X.shape[1]
+    order = _chi2_order(X, y)
+    latency_texts = texts[:FEATURE_BUDGET_LATENCY_SAMPLES]
+    reference = get_models()["LinearSVC"]
+    X_cv, y_cv = X[cv_mask], y[cv_mask]
+    folds = list(cv.split(X_cv, y_cv))
+
+    def evaluate(kept, budget_vectorizer):
+        k = None if kept is None else len(kept)
+        t0 = time.perf_counter()
+        cv_scores = joblib.Parallel(n_jobs=resource_governor.budget("training").workers)(
+            joblib.delayed(_budget_fold_accuracy)(reference, X_cv, y_cv, train_idx, test_idx, k, block_sizes)
+            for train_idx, test_idx in folds
+        )
+        cv_seconds = time.perf_counter() - t0
+        X_budget = X if kept is None else slice_feature_blocks(X, kept, block_sizes)
+        fitted = clone(reference).fit(X_budget, y)
+        return {
+            "n_features": int(n_features if kept is None else len(kept)),
+            "cv_accuracy": float(np.mean(cv_scores)),
+            "cv_seconds": round(cv_seconds, 3),
+            "predict_latency_ms": round(_median_predict_latency_ms(budget_vectorizer, fitted, latency_texts), 4),
+            "artifact_bytes": _artifact_size_bytes(budget_vectorizer, fitted),
+        }
+
+    full = evaluate(None, vectorizer)
+    print(
+        f"  full: {full['n_features']} features, cv_accuracy={full['cv_accuracy']:.4f}, "
+        f"latency={full['predict_latency_ms']:.3f}ms, artifact={full['artifact_bytes'] / 1e6:.2f}MB"
+    )
+    floor = full["cv_accuracy"] - delta
+    tried = []
+    chosen = None
+    for fraction in sorted(fractions):
+        k = int(n_features * fraction)
+        if k < 1 or k >= n_features:
+            continue
+        kept = np.sort(order[:k])
+        result = evaluate(kept, shrink_vectorizer(vectorizer, kept))
+        result["fraction"] = fraction
+        result["within_budget"] = result["cv_accuracy"] >= floor
+        tried.append(result)
+        print(
+            f"  {fraction:.0%}: {k} features, cv_accuracy={result['cv_accuracy']:.4f}, "
+            f"latency={result['predict_latency_ms']:.3f}ms, artifact={result['artifact_bytes'] / 1e6:.2f}MB"
+        )
+        if result["within_budget"]:
+            chosen = kept
+            break
+
+    report = {
+        "method": "chi2",
+        "delta": delta,
+        "full": full,
+        "tried": tried,
+        "selected_n_features": int(n_features if chosen is None else len(chosen)),
+    }
+    return chosen, report
+
+
+def publish_bundle(vectorizer, model, unique_labels, meta, stage1=None, models_dir=None):
+    """Write a model bundle and publish it as a new (unpromoted) registry version; returns the version.
+
+    The bundle is written into a staging directory and only becomes a registry
+    version once complete; artifact digests are computed as the bytes are written.
+    """
+    models_dir = models_dir or MODELS_DIR
+    bundle_dir = model_registry.create_staging_dir(models_dir)
+    labels_path = os.path.join(bundle_dir, "lob_labels.json")
+
+    # scikit-learn caches id(stop_words) on each TF-IDF block; drop it so identical inputs pickle to identical bytes
+    for _, block in getattr(vectorizer, "transformer_list", [("", vectorizer)]):
+        vars(block).pop("_stop_words_id", None)
+
+    checksums = {}
+    artifacts = [("lob_vectorizer.joblib", vectorizer), ("lob_model.joblib", model)]
+    if stage1 is not None:
+        artifacts.append((STAGE1_FILENAME, stage1))
+    for name, obj in artifacts:
+        with model_registry.HashingWriter(os.path.join(bundle_dir, name)) as f:
+            joblib.dump(obj, f)
+        checksums[name] = f.hexdigest()
+    with model_registry.HashingWriter(labels_path) as f:
+        f.write(json.dumps(unique_labels, ensure_ascii=False, indent=2).encode("utf-8"))
+    checksums[os.path.basename(labels_path)] = f.hexdigest()
+    with open(os.path.join(bundle_dir, model_registry.CHECKSUMS_FILENAME), "w", encoding="utf-8") as f:
+        json.dump(checksums, f, indent=2)
+    with open(os.path.join(bundle_dir, model_registry.META_FILENAME), "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+
+    version = model_registry.publish(bundle_dir, models_dir)
+    version_path = model_registry.version_dir(version, models_dir)
+    for name, digest in checksums.items():
+        # publish() renamed the files; seed the verification cache so an in-process reload skips rehashing
+        model_registry.digest_cache.remember(os.path.join(version_path, name), digest)
+    return version
+
+
+def train(dataset=None, skip_tune=False, feature_budget_delta=None, build_cascade=True, promote=True,
+          inputs_key=None, models_dir=None, warm_start=False, near_dup_cap=None):
+    """Train, publish a registry version and (unless promote=False) make it current.
+
+    `dataset` is a path to a dataset JSON file (default DEFAULT_DATASET) or an
+    iterable of already-parsed entries; an iterator is consumed once, so callers
+    can stream entries straight from an upload without a temp file.
+
+    Returns the new version name, or False if there was not enough data. inputs_key
+    (see lob_artifact_cache.py) is recorded in training_meta.json when given.
+    models_dir defaults to MODELS_DIR (ai/models). warm_start=True initializes the
+    final fit from the promoted model's coefficients when compatible (see
+    warm_start_init); solver iterations and wall time of the final fit are recorded
+    in training_meta.json under "finalFit" either way. near_dup_cap keeps at most that
+    many rows per (near-duplicate cluster, label) before augmentation (lob_near_dup.py).
+    Wall time and peak RSS per stage (up to publishing) are recorded under "stages".
+    Runs under the "training" thread/worker budget (resource_governor.py).
+    """
+    with resource_governor.limit("training") as budget:
+        return _train(dataset, skip_tune, feature_budget_delta, build_cascade, promote, inputs_key,
+                      models_dir or MODELS_DIR, warm_start, near_dup_cap, budget)
+
+
+def _train(dataset, skip_tune, feature_budget_delta, build_cascade, promote, inputs_key, models_dir, warm_start,
+           near_dup_cap, budget):
+    stages = {}
+    mark = _stage_clock(stages)
+    if dataset is None or isinstance(dataset, (str, os.PathLike)):
+        ds_path = dataset or DEFAULT_DATASET
+        print(f"Loading dataset from {ds_path}")
+        with open(ds_path, "r", encoding="utf-8") as f:
+            raw = json.load(f)
+    else:
+        ds_path = None
+        print("Loading dataset from in-memory entries")
+        raw = dataset
 
     rows = flatten_dataset(raw)
     base_rows_count = len(rows)
@@ -284,9 +675,21 @@ def train(dataset_path=None, skip_tune=False):
         rows.extend(extra_rows)
 
     rows = dedupe_rows(rows)
+    near_duplicates = None
+    if near_dup_cap:
+        rows, near_duplicates = cap_cluster_rows(rows, near_dup_cap)
+        print(f"Near-duplicate cap {near_dup_cap}/cluster/label: dropped {near_duplicates['rowsDropped']} of "
+              f"{near_duplicates['rowsBefore']} rows ({near_duplicates['multiRowClusters']} multi-row clusters)")
     deduped_before_aug = len(rows)
 
-    augmented_rows = augment_rows(rows, per_label_limit=60, seed=42)
+    augment_started = time.perf_counter()
+    augmented_rows = augment_rows(rows, per_label_limit=60, seed=42, workers=budget.workers)
+    augmentation = {
+        "profiles": list(AUGMENT_PROFILES),
+        "rows": len(augmented_rows),
+        "workerBudget": budget.workers,
+        "seconds": time.perf_counter() - augment_started,
+    }
     rows.extend(augmented_rows)
     rows = dedupe_rows(rows)
 
@@ -294,6 +697,7 @@ def train(dataset_path=None, skip_tune=False):
     print(f"Added optional difficult rows: {len(extra_rows)}")
     print(f"Added noisy augmentation rows: {len(augmented_rows)}")
     print(f"Training rows after dedupe: {len(rows)} (pre-augment dedupe: {deduped_before_aug})")
+    mark("prepareRows")
 
     if len(rows) < 10:
         print("ERROR: Not enough training data (need at least 10 rows).")
@@ -309,34 +713,10 @@ def train(dataset_path=None, skip_tune=False):
         f"Label distribution — min: {min(label_counts.values())}, max: {max(label_counts.values())}, median: {sorted(label_counts.values())[len(label_counts)//2]}"
     )
 
-    vectorizer = FeatureUnion(
-        [
-            (
-                "word",
-                TfidfVectorizer(
-                    max_features=12000,
-                    ngram_range=(1, 2),
-                    sublinear_tf=True,
-                    min_df=1,
-                    max_df=0.95,
-                    strip_accents="unicode",
-                ),
-            ),
-            (
-                "char",
-                TfidfVectorizer(
-                    analyzer="char_wb",
-                    ngram_range=(3, 5),
-                    max_features=25000,
-                    sublinear_tf=True,
-                    min_df=1,
-                    strip_accents="unicode",
-                ),
-            ),
-        ]
-    )
+    vectorizer = build_vectorizer()
     X = vectorizer.fit_transform(texts)
     y = np.array(labels)
+    mark("vectorize")
 
     min_class_count = min(label_counts.values())
     n_splits = min(5, max(2, min_class_count))
@@ -356,15 +736,37 @@ def train(dataset_path=None, skip_tune=False):
             "\nToo few multi-sample classes for cross-validation; will evaluate on full training set only."
         )
 
+    feature_selection = None
+    if feature_budget_delta is not None:
+        if can_cross_validate:
+            print(f"\n--- Feature selection (chi2, CV accuracy delta <= {feature_budget_delta}) ---")
+            kept, feature_selection = select_feature_budget(
+                vectorizer, X, y, texts, cv_mask, cv, feature_budget_delta
+            )
+            if kept is not None:
+                X = slice_feature_blocks(X, kept, _vectorizer_block_sizes(vectorizer))
+                X_cv = X[cv_mask]
+                vectorizer = shrink_vectorizer(vectorizer, kept)
+                print(f"  Selected {len(kept)} features")
+            else:
+                print("  No smaller budget stayed within delta; keeping the full vocabulary.")
+        else:
+            print("\nSkipping feature selection: not enough data for cross-validation.")
+        mark("featureSelection")
+
     models = get_models()
     print(f"\nComparing {len(models)} algorithms: {list(models.keys())}")
 
     results = {}
+    oof_predictions = {}
     if can_cross_validate:
         print("\n--- Cross-validation results ---")
         for name, model in models.items():
             try:
-                scores = cross_val_score(model, X_cv, y_cv, cv=cv, scoring="accuracy")
+                scores, oof_pred, oof_proba = cross_val_with_predictions(
+                    model, X_cv, y_cv, cv, with_proba=(name == "ComplementNB")
+                )
+                oof_predictions[name] = (oof_pred, oof_proba)
                 mean_acc = scores.mean()
                 results[name] = mean_acc
                 print(f"  {name}: accuracy = {mean_acc:.4f} (+/- {scores.std():.4f})")
@@ -385,6 +787,7 @@ def train(dataset_path=None, skip_tune=False):
     if not results:
         print("ERROR: All models failed.")
         return False
+    mark("modelSelection")
 
     best_name = max(results, key=results.get)
     best_cv_accuracy = results[best_name]
@@ -404,7 +807,7 @@ def train(dataset_path=None, skip_tune=False):
                 param_grid,
                 cv=min(3, n_splits),
                 scoring="accuracy",
-                n_jobs=-1,
+                n_jobs=budget.workers,
                 refit=True,
             )
             search.fit(X_tune, y_tune)
@@ -422,52 +825,79 @@ def train(dataset_path=None, skip_tune=False):
             print(f"  Best CV score: {search.best_score_:.4f}")
         except Exception as e:
             print(f"  Tuning failed: {e}; using default params.")
+        mark("tuning")
+
+    # Unfitted copy of what is served (before calibration), for the cascade's out-of-fold check
+    served_spec = clone(best_model)
 
-    # Train best (possibly tuned) model on full data
+    # Train best (possibly tuned) model on full data, optionally starting from the promoted model
+    final_fit = {"start": "cold"}
+    if warm_start:
+        previous_version = model_registry.current_version(models_dir)
+        try:
+            previous = load_bundle(model_registry.version_dir(previous_version, models_dir)) if previous_version else None
+        except (OSError, ValueError, model_registry.RegistryError) as exc:
+            print(f"WARNING: Could not load promoted model {previous_version} for warm start: {exc}")
+            previous = None
+        init, reason = warm_start_init(previous, best_name, vectorizer, unique_labels)
+        if init is not None:
+            best_model.set_params(warm_start=True)
+            best_model.coef_, best_model.intercept_, overlap = init
+            final_fit = {"start": "warm", "fromVersion": previous_version, "featureOverlap": overlap}
+        else:
+            final_fit["warmStartSkipped"] = reason
+        print(f"Warm start: {'from ' + previous_version if init is not None else 'skipped (' + reason + ')'}")
+    fit_started = time.perf_counter()
     best_model.fit(X, y)
+    final_fit["seconds"] = time.perf_counter() - fit_started
+    if hasattr(best_model, "n_iter_"):
+        final_fit["iterations"] = int(np.max(best_model.n_iter_))
+    if final_fit["start"] == "warm":
+        best_model.set_params(warm_start=False)
+    print(f"Final fit ({final_fit['start']} start): {final_fit.get('iterations', 'n/a')} iterations, {final_fit['seconds']:.2f}s")
+    mark("finalFit")
 
     # LinearSVC doesn't have predict_proba; wrap with calibration
     if best_name == "LinearSVC":
         print("Wrapping LinearSVC with CalibratedClassifierCV for probability support...")
-        cal_cv = min(3, min_class_count) if min_class_count >= 2 else "prefit"
-        if cal_cv == "prefit":
-            calibrated = CalibratedClassifierCV(best_model, cv="prefit")
-            calibrated.fit(X, y)
-        else:
-            c_value = best_model.get_params().get("C", 1.0)
-            calibrated = CalibratedClassifierCV(
-                LinearSVC(
-                    max_iter=5000, C=c_value, random_state=42, dual=False, class_weight="balanced"
-                ),
-                cv=cal_cv,
+        best_model = calibrate_linear_svc(best_model, X, y)
+        mark("calibration")
+
+    cascade_stage1 = None
+    cascade_result = None
+    if build_cascade and best_name != "ComplementNB" and "ComplementNB" in oof_predictions and best_name in oof_predictions:
+        print("\n--- Confidence cascade (ComplementNB first stage) ---")
+        # Parity must hold against the model actually served. Model selection's out-of-fold
+        # predictions came from the untuned, uncalibrated candidate, so rescore unless that
+        # is what is served.
+        full_oof = "candidate"
+        full_pred = oof_predictions[best_name][0]
+        if tuning_result is not None or best_name == "LinearSVC":
+            full_oof = "served"
+            full_pred = served_oof_predictions(best_name, served_spec, X_cv, y_cv, cv)
+        cascade_result = tune_cascade_threshold(
+            oof_predictions["ComplementNB"][1],
+            np.unique(y_cv),
+            full_pred,
+            y_cv,
+        )
+        cascade_result["fullModelOof"] = full_oof
+        if cascade_result["threshold"] is not None:
+            cascade_stage1 = clone(models["ComplementNB"]).fit(X, y)
+            print(
+                f"  Threshold {cascade_result['threshold']:.4f}: first stage answers "
+                f"{cascade_result['coverage']:.1%} of CV rows at precision {cascade_result['stage1_precision']:.4f} "
+                f"(full model {cascade_result['full_precision_on_kept']:.4f} on the same rows)"
             )
-            calibrated.fit(X, y)
-        best_model = calibrated
+        else:
+            print("  No first-stage threshold reaches precision parity; cascade not saved.")
+        mark("cascade")
 
     print("\n--- Full training set classification report ---")
     y_pred = best_model.predict(X)
     print(classification_report(y, y_pred, zero_division=0))
     print(f"Training accuracy: {accuracy_score(y, y_pred):.4f}")
-
-    os.makedirs(MODELS_DIR, exist_ok=True)
-    vectorizer_path = os.path.join(MODELS_DIR, "lob_vectorizer.joblib")
-    model_path = os.path.join(MODELS_DIR, "lob_model.joblib")
-    labels_path = os.path.join(MODELS_DIR, "lob_labels.json")
-
-    joblib.dump(vectorizer, vectorizer_path)
-    joblib.dump(best_model, model_path)
-    with open(labels_path, "w", encoding="utf-8") as f:
-        json.dump(unique_labels, f, ensure_ascii=False, indent=2)
-
-    checksums = {}
-    for p in (vectorizer_path, model_path, labels_path):
-        h = hashlib.sha256()
-        with open(p, "rb") as f:
-            for chunk in iter(lambda: f.read(8192), b""):
-                h.update(chunk)
-        checksums[os.path.basename(p)] = h.hexdigest()
-    with open(CHECKSUMS_PATH, "w", encoding="utf-8") as f:
-        json.dump(checksums, f, indent=2)
+    mark("trainingReport")
 
     meta = {
         "algorithm": best_name,
@@ -479,20 +909,37 @@ def train(dataset_path=None, skip_tune=False):
         "n_noisy_augmented_samples": len(augmented_rows),
         "n_labels": len(unique_labels),
         "feature_extractor": "tfidf_word_char_hybrid",
+        "augmentation": augmentation,
+        "nearDuplicates": near_duplicates,
+        "finalFit": final_fit,
+        "stages": stages,
     }
     if tuning_result:
         meta["tuning"] = tuning_result
-    meta_path = os.path.join(MODELS_DIR, "training_meta.json")
-    with open(meta_path, "w", encoding="utf-8") as f:
-        json.dump(meta, f, indent=2)
-
-    print(f"\nSaved vectorizer to {vectorizer_path}")
-    print(f"Saved model ({best_name}) to {model_path}")
-    print(f"Saved {len(unique_labels)} labels to {labels_path}")
-    print(f"Saved artifact checksums to {CHECKSUMS_PATH}")
-    print(f"Saved metadata (incl. tuning) to {meta_path}")
+    if feature_selection:
+        meta["feature_selection"] = feature_selection
+    meta["resourceBudgets"] = resource_governor.summary()
+    if inputs_key:
+        meta["inputsKey"] = inputs_key
+    if ds_path:
+        # Lets lob_incremental.append_classes_update find the rows the model was trained on
+        meta["datasetSha256"] = model_registry.digest_cache.digests([ds_path])[ds_path]
+    if cascade_result:
+        meta["cascade"] = dict(cascade_result, stage1="ComplementNB", saved=cascade_stage1 is not None)
+
+    version = publish_bundle(vectorizer, best_model, unique_labels, meta, cascade_stage1, models_dir)
+    version_path = model_registry.version_dir(version, models_dir)
+    print(f"\nSaved model version {version} to {version_path}")
+    print(f"  vectorizer, model ({best_name}), {len(unique_labels)} labels, artifact checksums, metadata (incl. tuning)")
+    if cascade_stage1 is not None:
+        print("  cascade first stage (ComplementNB)")
+    if promote:
+        model_registry.promote(version, models_dir)
+        print(f"Promoted {version} to current")
+    else:
+        print(f"Not promoted; promote with POST /admin/models/promote {{\"version\": \"{version}\"}}")
     print("\nTraining complete.")
-    return True
+    return version
 
 
 if __name__ == "__main__":
@@ -503,6 +950,41 @@ if __name__ == "__main__":
         action="store_true",
         help="Skip hyperparameter tuning step",
     )
+    parser.add_argument(
+        "--feature-budget-delta",
+        type=float,
+        default=None,
+        help="Enable chi2 feature selection: keep the smallest vocabulary whose CV accuracy is within this delta of the full model",
+    )
+    parser.add_argument(
+        "--no-cascade",
+        action="store_true",
+        help="Do not build the ComplementNB first stage for the confidence cascade",
+    )
+    parser.add_argument(
+        "--no-promote",
+        action="store_true",
+        help="Publish the new model version to the registry without making it current",
+    )
+    parser.add_argument(
+        "--warm-start",
+        action="store_true",
+        help="Start the final fit from the promoted model's coefficients when label set and features are compatible",
+    )
+    parser.add_argument(
+        "--near-dup-cap",
+        type=int,
+        default=None,
+        help="Keep at most N rows per near-duplicate cluster and label (MinHash/LSH, see lob_near_dup.py)",
+    )
     args = parser.parse_args()
-    success = train(args.dataset, skip_tune=args.no_tune)
+    success = train(
+        args.dataset,
+        skip_tune=args.no_tune,
+        feature_budget_delta=args.feature_budget_delta,
+        build_cascade=not args.no_cascade,
+        promote=not args.no_promote,
+        warm_start=args.warm_start,
+        near_dup_cap=args.near_dup_cap,
+    )
     sys.exit(0 if success else 1)
@@ -0,0 +1,126 @@
+"""
+Admission control for /predict: bounded in-flight and queued requests, early
+load shedding against a latency target, and client deadlines.
+
+    admission = AdmissionController(max_in_flight=4, max_queued=32, latency_target=2.0)
+    try:
+        started = admission.acquire(deadline)      # may wait in the queue
+    except AdmissionRejected as exc:
+        ...  # 503 with Retry-After: exc.retry_after
+    try:
+        ...  # score
+    finally:
+        admission.release(started)
+
+A request that cannot take an in-flight slot immediately is queued, unless the
+queue is full or its estimated wait (queue position x smoothed service time /
+slots) exceeds the latency target or its deadline. Deadlines are
+time.perf_counter() values.
+
+Outcome counts only ever go up (they are exported as Prometheus counters):
+"accepted" counts every admitted request, and an admitted request whose
+deadline passes before scoring is also counted as expired_after_admission.
+"""
+
+import math
+import time
+from collections import Counter
+from threading import Lock, Semaphore
+
+OUTCOMES = ("accepted", "queue_full", "latency", "deadline_expired", "expired_after_admission")
+REJECT_REASONS = ("queue_full", "latency", "deadline_expired")
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request is shed; reason is one of REJECT_REASONS."""
+
+    def __init__(self, reason, retry_after=1):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    def __init__(self, max_in_flight, max_queued, latency_target=None, ewma_alpha=0.2):
+        if max_in_flight < 1 or max_queued < 0:
+            raise ValueError("max_in_flight must be >= 1 and max_queued >= 0")
+        self.max_in_flight = max_in_flight
+        self.max_queued = max_queued
+        self.latency_target = latency_target or None
+        self.ewma_alpha = ewma_alpha
+        self._slots = Semaphore(max_in_flight)
+        self._lock = Lock()
+        self.in_flight = 0
+        self.queued = 0
+        self.service_time = 0.0  # EWMA of seconds a request holds its slot
+        self.outcomes = Counter({o: 0 for o in OUTCOMES})
+
+    def estimated_wait(self, position):
+        return position * self.service_time / self.max_in_flight
+
+    def _retry_after(self):
+        return max(1, math.ceil(self.estimated_wait(self.queued + 1)))
+
+    def _reject(self, reason):
+        # Caller holds self._lock
+        self.outcomes[reason] += 1
+        return AdmissionRejected(reason, self._retry_after())
+
+    def acquire(self, deadline=None):
+        """Take an in-flight slot, waiting in the queue if allowed; returns a token for release()."""
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                if self.queued >= self.max_queued:
+                    raise self._reject("queue_full")
+                wait = self.estimated_wait(self.queued + 1)
+                if self.latency_target is not None and wait > self.latency_target:
+                    raise self._reject("latency")
+                if deadline is not None and time.perf_counter() + wait > deadline:
+                    raise self._reject("deadline_expired")
+                self.queued += 1
+            try:
+                timeout = None if deadline is None else max(0.0, deadline - time.perf_counter())
+                acquired = self._slots.acquire(timeout=timeout)
+            finally:
+                with self._lock:
+                    self.queued -= 1
+            if not acquired:
+                with self._lock:
+                    raise self._reject("deadline_expired")
+        with self._lock:
+            if deadline is not None and time.perf_counter() >= deadline:
+                self._slots.release()
+                raise self._reject("deadline_expired")
+            self.in_flight += 1
+            self.outcomes["accepted"] += 1
+        return time.perf_counter()
+
+    def release(self, started):
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self.in_flight -= 1
+            if self.service_time:
+                self.service_time += self.ewma_alpha * (elapsed - self.service_time)
+            else:
+                self.service_time = elapsed
+        self._slots.release()
+
+    def expire(self):
+        """Count an admitted request whose deadline passed before scoring.
+
+        It stays counted as accepted, so no outcome count ever goes down.
+        """
+        with self._lock:
+            self.outcomes["expired_after_admission"] += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                "maxInFlight": self.max_in_flight,
+                "maxQueued": self.max_queued,
+                "latencyTargetMs": self.latency_target * 1000.0 if self.latency_target else None,
+                "inFlight": self.in_flight,
+                "queued": self.queued,
+                "serviceTimeMs": round(self.service_time * 1000.0, 3),
+                "outcomes": dict(self.outcomes),
+            }
@@ -0,0 +1,74 @@
+"""
+Background watcher that notices new model artifacts on disk.
+
+    watcher = ArtifactWatcher(lambda: [pointer, checksums, ...], on_change, interval=5.0)
+    watcher.start()
+
+Every `interval` seconds the watcher stats the paths returned by paths_fn()
+(re-evaluated each poll, so the set can follow the registry pointer) and
+builds a signature of (path, inode, size, mtime_ns). When the signature
+differs from the last one handled and has been stable for one full poll (so
+a copy still in progress is not picked up half-written), on_change() is
+called on the watcher thread. Exceptions from on_change are printed and the
+watcher keeps running.
+"""
+
+import os
+import threading
+import traceback
+
+
+def file_signature(paths):
+    sig = []
+    for p in paths:
+        try:
+            st = os.stat(p)
+        except OSError:
+            sig.append((p, None))
+            continue
+        sig.append((p, st.st_ino, st.st_size, st.st_mtime_ns))
+    return tuple(sig)
+
+
+class ArtifactWatcher:
+    def __init__(self, paths_fn, on_change, interval=5.0):
+        self.paths_fn = paths_fn
+        self.on_change = on_change
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+        self._handled = None
+        self._pending = None
+
+    def start(self):
+        self._handled = file_signature(self.paths_fn())
+        self._thread = threading.Thread(target=self._run, name="lob-artifact-watcher", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=5.0):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def poll(self):
+        """Check once; returns True if on_change was called."""
+        sig = file_signature(self.paths_fn())
+        if sig == self._handled:
+            self._pending = None
+            return False
+        if sig != self._pending:
+            # Changed since the last poll: wait for it to settle
+            self._pending = sig
+            return False
+        self._handled = sig
+        self._pending = None
+        try:
+            self.on_change()
+        except Exception:
+            traceback.print_exc()
+        return True
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.poll()
@@ -3,30 +3,70 @@ LOB Prediction & Training Flask Service
 
 Endpoints:
   POST /predict  — predict LOB recommendations for a business description
-  POST /train    — retrain the model from a provided dataset (requires X-LOB-Admin-Token)
-  GET  /health   — simple health check
+  POST /train    — retrain the model from a provided dataset: JSON, or streamed NDJSON, either optionally
+                   gzip (requires X-LOB-Admin-Token)
+  GET  /health   — simple health check (liveness; answers as soon as the process is up)
+  GET  /ready    — readiness: 200 only once a model is loaded and warmed, 503 before
   GET  /evaluate — run model evaluation on test set, return metrics as JSON (requires X-LOB-Admin-Token)
+  POST /predict/bulk — stream-score an NDJSON (optionally gzip) body, streaming NDJSON back (requires X-LOB-Admin-Token)
+  GET  /admin/models — list registry versions and the loaded/previous ones (requires X-LOB-Admin-Token)
+  POST /admin/models/promote — {"version": ...}: load, verify and serve a registry version (requires X-LOB-Admin-Token)
+  POST /admin/models/rollback — switch back to the previously served version (requires X-LOB-Admin-Token)
+  POST /admin/models/update — {"dataset": [...]}: fold new labeled rows into the served model in seconds,
+                        or with "appendClasses": true add new labels as new classes (scripts/lob_incremental.py);
+                        publish it, and with "promote": true also serve it (requires X-LOB-Admin-Token)
+  GET/POST/DELETE /admin/shadow — shadow-score sampled /predict traffic with a candidate registry version
+                        and report agreement, confidence deltas and latency (requires X-LOB-Admin-Token)
+  GET  /metrics  — Prometheus text-format latency histograms and counters
+  GET  /admin/profile — sample request-thread stacks for N seconds (requires X-LOB-Admin-Token
+                        and LOB_PROFILER_ENABLED=1); ?seconds=5&hz=100&threads=request|all&format=json|collapsed
+
+Per-stage /predict durations (queue, parse, normalize, lock_wait, vectorize, score,
+topk, serialize; requests that shared an identical concurrent request's result
+report "coalesced" instead) feed the /metrics histograms. With LOB_SERVER_TIMING=1
+each response also carries them in a Server-Timing header (~3us extra per request).
+
+/predict admission control (off unless LOB_MAX_IN_FLIGHT > 0): at most
+LOB_MAX_IN_FLIGHT requests run at once and LOB_MAX_QUEUED wait; beyond that, or
+when the estimated queue wait exceeds LOB_LATENCY_TARGET_MS, requests get an
+early 503 with Retry-After. Clients may send X-LOB-Deadline-Ms (time budget in
+ms); requests whose deadline passes before scoring are dropped with a 503.
+
+BLAS/OpenMP threads and parallel workers for serving, /train and /evaluate are
+capped by per-stage budgets (scripts/resource_governor.py), reported on /health.
+
+New artifacts (a promoted registry version, or files copied over the legacy
+flat layout) are picked up by a background watcher every LOB_HOT_RELOAD_INTERVAL
+seconds, loaded, verified and warmed off the request path, then swapped in;
+LOB_HOT_RELOAD=0 disables it.
+
+Training and evaluation code (train_lob_model, sklearn.metrics) is imported on
+first use, so serving-only processes start without the training stack.
 
 Startup:
-  python predict_app.py              — load existing model (auto-train only if missing)
+  python predict_app.py              — load the current model; if there is none, install the cached build for
+                                       the current inputs (scripts/lob_artifact_cache.py) and train only if none matches
   python predict_app.py --retrain    — retrain from default dataset, then start server
 """
 
 import argparse
-import hashlib
 import hmac
 import json
+import math
 import os
 import sys
+import time
 import traceback
+import zlib
 from collections import defaultdict
-from threading import Lock
+from threading import Lock, Thread
+
+_PROCESS_STARTED = time.perf_counter()
 
 import joblib
 import numpy as np
-from flask import Flask, request, jsonify
+from flask import Flask, Response, g, request, jsonify, stream_with_context
 from flask_cors import CORS
-from sklearn.metrics import accuracy_score, f1_score, precision_score, recall_score
 
 SERVICE_DIR = os.path.dirname(os.path.abspath(__file__))
 AI_ROOT = os.path.dirname(SERVICE_DIR)
@@ -35,58 +75,174 @@ TAXONOMY_PATH = os.path.join(AI_ROOT, "data", "line_of_business.json")
 BALANCED_DATASET = os.path.join(AI_ROOT, "datasets", "lob_recommendation_dataset_balanced_4000.json")
 DEFAULT_DATASET = BALANCED_DATASET if os.path.exists(BALANCED_DATASET) else os.path.join(AI_ROOT, "datasets", "lob_recommendation_dataset.json")
 TEST_DATASET = os.path.join(AI_ROOT, "datasets", "lob_recommendation_test.json")
-CHECKSUMS_PATH = os.path.join(MODELS_DIR, "lob_artifact_checksums.json")
 
 MAX_DESCRIPTION_LENGTH = 2000
 MAX_TOP_K = 10
 MIN_THRESHOLD = 0.0
 MAX_THRESHOLD = 1.0
 MAX_TRAIN_EXAMPLES = 50000
+# NDJSON /train uploads are validated and consumed while streaming, so they can be much larger
+MAX_TRAIN_STREAM_EXAMPLES = int(os.environ.get("LOB_MAX_TRAIN_STREAM_EXAMPLES", 1000000))
+MAX_TRAIN_JSON_BYTES = 64 * 1024 * 1024  # decompressed size cap for gzip'd JSON /train bodies
+NDJSON_MIMETYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl")
+BULK_BATCH_SIZE = int(os.environ.get("LOB_BULK_BATCH_SIZE", 64))
+BULK_READ_CHUNK_BYTES = 64 * 1024
+MAX_BULK_LINE_BYTES = 16 * 1024
+# Run through every freshly loaded bundle before it serves traffic
+WARMUP_DESCRIPTIONS = (
+    "Sari-sari store selling canned goods, softdrinks and bigas",
+    "Maliit na karinderia na nagtitinda ng lutong-bahay na ulam",
+    "Barber shop offering gupit and shave",
+    "Online reseller of clothing and shoes",
+    "Pharmacy and botika selling generic medicines",
+    "Laundry shop with wash, dry and fold service",
+    "Computer repair and cellphone accessories shop",
+    "Bakery selling pandesal and tinapay",
+)
+FEATURIZER_CACHE_SIZE = int(os.environ.get("LOB_FEATURIZER_CACHE_SIZE", 20000))
+# Serve from the ComplementNB first stage when it is confident, escalating the rest (see lob_cascade.py)
+CASCADE_ENABLED = os.environ.get("LOB_CASCADE_ENABLED", "").strip().lower() in ("1", "true", "yes")
+SERVER_TIMING_ENABLED = os.environ.get("LOB_SERVER_TIMING", "").strip().lower() in ("1", "true", "yes")
+PROFILER_ENABLED = os.environ.get("LOB_PROFILER_ENABLED", "").strip().lower() in ("1", "true", "yes")
+# Admission control for /predict (see admission_control.py); off unless LOB_MAX_IN_FLIGHT > 0
+ADMISSION_MAX_IN_FLIGHT = int(os.environ.get("LOB_MAX_IN_FLIGHT", 0))
+ADMISSION_MAX_QUEUED = int(os.environ.get("LOB_MAX_QUEUED", 32))
+ADMISSION_LATENCY_TARGET_MS = float(os.environ.get("LOB_LATENCY_TARGET_MS", 2000))
+# Client time budget in milliseconds, relative to when the request arrives
+DEADLINE_HEADER = "X-LOB-Deadline-Ms"
+# Identical concurrent /predict requests share one computation (see single_flight.py)
+SINGLE_FLIGHT_ENABLED = os.environ.get("LOB_SINGLE_FLIGHT", "1").strip().lower() not in ("0", "false", "no")
+# Defaults for POST /admin/shadow (fraction of /predict requests replayed against the candidate)
+SHADOW_SAMPLE_RATE = float(os.environ.get("LOB_SHADOW_SAMPLE_RATE", 0.1))
+SHADOW_QUEUE_SIZE = int(os.environ.get("LOB_SHADOW_QUEUE_SIZE", 1000))
+# Poll for new artifacts (registry pointer or copied-in files) and swap them in without a restart
+HOT_RELOAD_ENABLED = os.environ.get("LOB_HOT_RELOAD", "1").strip().lower() not in ("0", "false", "no")
+HOT_RELOAD_INTERVAL = float(os.environ.get("LOB_HOT_RELOAD_INTERVAL", 5))
+# Use orjson for JSON responses when installed (see payload_fragments.py)
+FAST_JSON_ENABLED = os.environ.get("LOB_FAST_JSON", "").strip().lower() in ("1", "true", "yes")
+
+from latency_metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, MetricsRegistry, StageTimer
+from sampling_profiler import ProfilerBusyError, SamplingProfiler
+from admission_control import OUTCOMES as ADMISSION_OUTCOMES, AdmissionController, AdmissionRejected
+from single_flight import SingleFlight
+from artifact_watcher import ArtifactWatcher
+from shadow_scoring import ShadowScorer
+from payload_fragments import OrjsonProvider, RecommendationFragments, encode as encode_json, orjson
 
 sys.path.insert(0, os.path.join(AI_ROOT, "scripts"))
-from train_lob_model import train as run_training, flatten_dataset, normalize_text
+from lob_text import normalize_text
+from lob_scoring import NO_CONFIDENT_MATCH_MESSAGE
+from serving_featurizer import CachedTfidfFeaturizer
+from lob_cascade import STAGE1_FILENAME, CascadeClassifier
+import model_registry
+import lob_artifact_cache
+import lob_scoring
+import resource_governor
 
 app = Flask(__name__)
 CORS(app)
+if FAST_JSON_ENABLED:
+    if orjson is None:
+        print("WARNING: LOB_FAST_JSON is set but orjson is not installed; using the default JSON encoder.")
+    else:
+        app.json = OrjsonProvider(app)
 
 model = None
 vectorizer = None
+featurizer = None  # CachedTfidfFeaturizer over `vectorizer` (or the vectorizer itself if unsupported)
 labels = None
+fragments = None  # RecommendationFragments aligned with `labels`, rebuilt on every model load
+cascade = None  # CascadeClassifier when LOB_CASCADE_ENABLED and a first stage was trained
 taxonomy = None
 model_lock = Lock()
+registry_lock = Lock()  # serializes promote/rollback and shadow swaps
 training_meta = None  # {"algorithm": str, "trainedAt": str} from training_meta.json
+current_bundle = None  # ModelBundle the globals above were taken from
+previous_bundle = None  # bundle replaced by the last promotion, kept loaded for instant rollback
+_ready_after = None  # seconds from process start until the first warmed model was serving
+shadow = None  # ShadowScorer replaying sampled /predict traffic against a candidate bundle
+profiler = SamplingProfiler() if PROFILER_ENABLED else None
+admission = (
+    AdmissionController(ADMISSION_MAX_IN_FLIGHT, ADMISSION_MAX_QUEUED, ADMISSION_LATENCY_TARGET_MS / 1000.0)
+    if ADMISSION_MAX_IN_FLIGHT > 0
+    else None
+)
+single_flight = SingleFlight() if SINGLE_FLIGHT_ENABLED else None
 
 # OPTIMIZATION: Cache the label-to-taxonomy mapping instead of rebuilding on every request
 _label_to_taxonomy_cache = None
 
+_NO_CONFIDENT_MATCH_BODY = encode_json(
+    {"recommendations": [], "noConfidentMatch": True, "message": NO_CONFIDENT_MATCH_MESSAGE},
+    app.json.ensure_ascii,
+)
+
+PREDICT_STAGES = ("queue", "parse", "normalize", "lock_wait", "vectorize", "score", "topk", "coalesced", "serialize")
+metrics = MetricsRegistry()
+_stage_seconds = metrics.histogram(
+    "lob_predict_stage_seconds", "Wall time of each /predict stage in seconds.", ["stage"]
+)
+_stage_children = {stage: _stage_seconds.labels(stage=stage) for stage in PREDICT_STAGES}
+_predict_seconds = metrics.histogram("lob_predict_seconds", "Total /predict handler time in seconds.")
+_predict_responses = metrics.counter("lob_predict_responses_total", "/predict responses by HTTP status.", ["status"])
+_model_reloads = metrics.counter("lob_model_reloads_total", "Hot reloads of model artifacts by outcome.", ["outcome"])
+_model_reload_seconds = metrics.histogram(
+    "lob_model_reload_seconds", "Load + verify + warm time of hot reloads in seconds.",
+    buckets=(0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0),
+)
+_bulk_rows = metrics.counter("lob_bulk_rows_total", "/predict/bulk output lines by result.", ["result"])
+metrics.gauge(
+    "lob_featurizer_cache_events_total",
+    "Per-token featurizer cache lookups by result.",
+    lambda: _featurizer_cache_events(),
+    ["result"],
+    kind="counter",
+)
+metrics.gauge(
+    "lob_cascade_requests_total",
+    "Rows scored by the confidence cascade, by stage that answered.",
+    lambda: {("stage1",): cascade.answered, ("full",): cascade.escalated} if cascade is not None else None,
+    ["answered_by"],
+    kind="counter",
+)
+metrics.gauge(
+    "lob_predict_admission_total",
+    "/predict admission decisions: accepted, or shed by reason; expired_after_admission also counts as accepted.",
+    lambda: {(o,): admission.outcomes[o] for o in ADMISSION_OUTCOMES} if admission is not None else None,
+    ["outcome"],
+    kind="counter",
+)
+metrics.gauge(
+    "lob_predict_coalesced_total",
+    "/predict requests answered from an identical concurrent request's computation (computations saved).",
+    lambda: single_flight.shared if single_flight is not None else None,
+    kind="counter",
+)
+metrics.gauge(
+    "lob_predict_queued",
+    "/predict requests waiting for an in-flight slot.",
+    lambda: admission.queued if admission is not None else None,
+)
+
+
+def _featurizer_cache_events():
+    if not hasattr(featurizer, "cache_info"):
+        return None
+    info = featurizer.cache_info()
+    return {("hit",): info["hits"], ("miss",): info["misses"]}
+
 
-def _verify_model_artifacts(paths):
-    """Verify model artifact checksums before loading pickled artifacts."""
-    if not os.path.exists(CHECKSUMS_PATH):
-        print(f"ERROR: Missing artifact checksum file: {CHECKSUMS_PATH}")
-        return False
+def _verify_model_artifacts(model_dir, names):
+    """model_registry.verify_bundle for `names`, logging instead of raising; True if they all match.
 
+    Digests come from model_registry.digest_cache, so files unchanged since the
+    last verification (same path, inode, size and mtime) are not rehashed.
+    """
     try:
-        with open(CHECKSUMS_PATH, "r", encoding="utf-8") as f:
-            expected = json.load(f)
-    except Exception as exc:
-        print(f"ERROR: Could not read checksum file: {exc}")
+        model_registry.verify_bundle(model_dir, names)
+    except model_registry.RegistryError as exc:
+        print(f"ERROR: {exc}")
         return False
-
-    for p in paths:
-        name = os.path.basename(p)
-        want = expected.get(name)
-        if not want:
-            print(f"ERROR: Missing checksum entry for {name}")
-            return False
-        h = hashlib.sha256()
-        with open(p, "rb") as f:
-            for chunk in iter(lambda: f.read(8192), b""):
-                h.update(chunk)
-        got = h.hexdigest()
-        if not hmac.compare_digest(got, want):
-            print(f"ERROR: Checksum mismatch for {name}")
-            return False
     return True
 
 
@@ -112,36 +268,99 @@ def _parse_bounded_float(data, key, default, min_value=MIN_THRESHOLD, max_value=
     return value
 
 
+class TrainingDataError(ValueError):
+    """An uploaded training dataset failed validation (reported as 400, not a training failure)."""
+
+
+def _validate_training_entry(entry, where):
+    if not isinstance(entry, dict):
+        raise TrainingDataError(f"{where} must be an object")
+
+    desc = (entry.get("businessDescription") or "").strip()
+    if len(desc) < 10:
+        raise TrainingDataError(f"{where}.businessDescription must be at least 10 characters")
+    if len(desc) > MAX_DESCRIPTION_LENGTH:
+        raise TrainingDataError(
+            f"{where}.businessDescription must be <= {MAX_DESCRIPTION_LENGTH} characters"
+        )
+
+    recs = entry.get("recommendations")
+    if not isinstance(recs, list) or not recs:
+        raise TrainingDataError(f"{where}.recommendations must be a non-empty array")
+    for j, rec in enumerate(recs):
+        if not isinstance(rec, dict):
+            raise TrainingDataError(f"{where}.recommendations[{j}] must be an object")
+        tax = (rec.get("taxCode") or "").strip()
+        detailed = (rec.get("detailedLine") or "").strip()
+        if not tax or not detailed:
+            raise TrainingDataError(
+                f"{where}.recommendations[{j}] must include taxCode and detailedLine"
+            )
+
+
 def _validate_training_dataset(dataset):
     if not isinstance(dataset, list) or not dataset:
-        raise ValueError("dataset must be a non-empty array")
+        raise TrainingDataError("dataset must be a non-empty array")
     if len(dataset) > MAX_TRAIN_EXAMPLES:
-        raise ValueError(f"dataset too large (max {MAX_TRAIN_EXAMPLES} entries)")
+        raise TrainingDataError(f"dataset too large (max {MAX_TRAIN_EXAMPLES} entries)")
 
     for i, entry in enumerate(dataset):
-        if not isinstance(entry, dict):
-            raise ValueError(f"dataset[{i}] must be an object")
-
-        desc = (entry.get("businessDescription") or "").strip()
-        if len(desc) < 10:
-            raise ValueError(f"dataset[{i}].businessDescription must be at least 10 characters")
-        if len(desc) > MAX_DESCRIPTION_LENGTH:
-            raise ValueError(
-                f"dataset[{i}].businessDescription must be <= {MAX_DESCRIPTION_LENGTH} characters"
-            )
+        _validate_training_entry(entry, f"dataset[{i}]")
+
+
+def _iter_training_ndjson(stream, gzipped):
+    """Yield validated entries from an NDJSON (optionally gzip) body as it is read.
+
+    Raises TrainingDataError at the first bad line, so training stops before
+    anything is published.
+    """
+    count = 0
+    try:
+        for n, raw in enumerate(_iter_ndjson_lines(_decompressed_chunks(stream, gzipped)), start=1):
+            if raw is None:
+                raise TrainingDataError(f"line {n}: exceeds {MAX_BULK_LINE_BYTES} bytes")
+            if not raw.strip():
+                continue
+            try:
+                entry = json.loads(raw)
+            except ValueError:
+                raise TrainingDataError(f"line {n}: not valid JSON") from None
+            _validate_training_entry(entry, f"line {n}")
+            count += 1
+            if count > MAX_TRAIN_STREAM_EXAMPLES:
+                raise TrainingDataError(f"dataset too large (max {MAX_TRAIN_STREAM_EXAMPLES} entries)")
+            yield entry
+    except zlib.error as exc:
+        raise TrainingDataError(f"invalid gzip body: {exc}") from None
+    if not count:
+        raise TrainingDataError("dataset must be non-empty")
+
+
+def run_training(dataset, warm_start=False):
+    """Train via train_lob_model, imported here so serving never loads the training stack.
+
+    `dataset` is a dataset path or an iterable of entries (see train_lob_model.train).
+    warm_start=True starts the final fit from the promoted model's coefficients when compatible.
+    """
+    from train_lob_model import train
+
+    return train(dataset, warm_start=warm_start)
+
 
-        recs = entry.get("recommendations")
-        if not isinstance(recs, list) or not recs:
-            raise ValueError(f"dataset[{i}].recommendations must be a non-empty array")
-        for j, rec in enumerate(recs):
-            if not isinstance(rec, dict):
-                raise ValueError(f"dataset[{i}].recommendations[{j}] must be an object")
-            tax = (rec.get("taxCode") or "").strip()
-            detailed = (rec.get("detailedLine") or "").strip()
-            if not tax or not detailed:
-                raise ValueError(
-                    f"dataset[{i}].recommendations[{j}] must include taxCode and detailedLine"
-                )
+def run_incremental_update(dataset, base_version, epochs, append_classes=False, negatives=None):
+    """Fold entries into base_version, or append their new labels, via lob_incremental (imported on first use).
+
+    `negatives` are the entries base_version was trained on. Returns (version, summary).
+    """
+    from lob_incremental import IncrementalUpdateError, append_classes_update, incremental_update
+
+    try:
+        if append_classes:
+            return append_classes_update(dataset, base_version, negatives, promote=False, models_dir=MODELS_DIR)
+        return incremental_update(dataset, base_version, epochs=epochs, promote=False, models_dir=MODELS_DIR,
+                                  base_entries=negatives)
+    except IncrementalUpdateError as exc:
+        raise TrainingDataError(str(exc)) from None
 
 
 def load_taxonomy():
@@ -164,65 +383,191 @@ def build_label_to_taxonomy_map():
         return _label_to_taxonomy_cache
     
     # Build the mapping (only happens once)
-    mapping = {}
-    for entry in taxonomy:
-        tc = entry["taxCode"]
-        lob = entry["lineOfBusiness"]
-        for i, dl in enumerate(entry["detailedLines"]):
-            psic = entry["psicCodes"][i] if i < len(entry["psicCodes"]) else ""
-            mapping[f"{tc}|{dl}"] = {
-                "taxCode": tc,
-                "lineOfBusiness": lob,
-                "detailedLine": dl,
-                "psicCode": psic,
-            }
+    mapping = lob_scoring.label_map_from_taxonomy(taxonomy)
     
     # Cache for future calls
     _label_to_taxonomy_cache = mapping
     return mapping
 
 
-def _label_to_recs(pred_labels):
-    """Convert label strings to recommendation payload objects."""
-    label_map = build_label_to_taxonomy_map()
-    recs = []
-    for label in pred_labels:
-        info = label_map.get(str(label))
-        if not info:
-            continue
-        rec = dict(info)
-        rec["confidence"] = 1.0
-        recs.append(rec)
-    return recs
+def _build_featurizer(vec):
+    """Wrap the vectorizer with the per-token cached featurizer used on the /predict hot path."""
+    try:
+        return CachedTfidfFeaturizer(vec, cache_size=FEATURIZER_CACHE_SIZE)
+    except ValueError as exc:
+        print(f"WARNING: Cached featurizer unavailable ({exc}); using vectorizer.transform")
+        return vec
 
 
-def load_model():
-    global model, vectorizer, labels, training_meta
-    vec_path = os.path.join(MODELS_DIR, "lob_vectorizer.joblib")
-    mod_path = os.path.join(MODELS_DIR, "lob_model.joblib")
-    lab_path = os.path.join(MODELS_DIR, "lob_labels.json")
+def _load_cascade(full_model, meta, model_dir):
+    """Build the confidence cascade from the saved first stage, or None if unavailable."""
+    threshold = ((meta or {}).get("cascade") or {}).get("threshold")
+    stage1_path = os.path.join(model_dir, STAGE1_FILENAME)
+    if threshold is None or not os.path.exists(stage1_path):
+        print("WARNING: LOB_CASCADE_ENABLED is set but no cascade first stage was trained; serving the full model only.")
+        return None
+    if not _verify_model_artifacts(model_dir, [STAGE1_FILENAME]):
+        return None
+    try:
+        return CascadeClassifier(joblib.load(stage1_path), full_model, threshold)
+    except ValueError as exc:
+        print(f"WARNING: Cascade disabled: {exc}")
+        return None
+
+
+class ModelBundle:
+    """One loaded model version: everything /predict needs, swapped in as a unit."""
+
+    def __init__(self, version, model_dir, vectorizer, model, labels, training_meta, checksums=None):
+        self.version = version
+        self.model_dir = model_dir
+        self.checksums = checksums
+        self.vectorizer = vectorizer
+        self.featurizer = _build_featurizer(vectorizer)
+        self.model = model
+        self.labels = labels
+        self.fragments = RecommendationFragments(labels, build_label_to_taxonomy_map(), app.json.ensure_ascii)
+        self.training_meta = training_meta
+        self.cascade = _load_cascade(model, training_meta, model_dir) if CASCADE_ENABLED else None
+        self.warmed_seconds = None  # set by _warm_bundle()
+
+
+def _read_bundle(model_dir, version=None):
+    """Verify and load the artifacts in model_dir (no globals touched); None if missing or corrupt."""
+    vec_path = os.path.join(model_dir, "lob_vectorizer.joblib")
+    mod_path = os.path.join(model_dir, "lob_model.joblib")
+    lab_path = os.path.join(model_dir, "lob_labels.json")
 
     if not all(os.path.exists(p) for p in [vec_path, mod_path, lab_path]):
         print("WARNING: Model artifacts not found. /predict will return an error until the model is trained.")
-        return False
+        return None
+
+    if not _verify_model_artifacts(model_dir, model_registry.BUNDLE_FILENAMES):
+        return None
+    with open(os.path.join(model_dir, model_registry.CHECKSUMS_FILENAME), "r", encoding="utf-8") as f:
+        checksums = json.load(f)
+
+    vec = joblib.load(vec_path)
+    mod = joblib.load(mod_path)
+    with open(lab_path, "r", encoding="utf-8") as f:
+        label_list = json.load(f)
+    meta = None
+    meta_path = os.path.join(model_dir, model_registry.META_FILENAME)
+    if os.path.exists(meta_path):
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        except Exception:
+            pass
+    return ModelBundle(version, model_dir, vec, mod, label_list, meta, checksums)
+
+
+def _warm_bundle(bundle):
+    """Run representative predictions through a freshly loaded bundle so its first live request isn't cold."""
+    started = time.perf_counter()
+    for text in WARMUP_DESCRIPTIONS:
+        X = bundle.featurizer.transform([normalize_text(text)])
+        proba = lob_scoring.score(bundle.model, X, bundle.labels, bundle.cascade)[0]
+        bundle.fragments.render(lob_scoring.top_indices(proba, 3), proba, 0.0)
+    bundle.warmed_seconds = time.perf_counter() - started
+
+
+def _watched_artifact_paths():
+    model_dir = model_registry.active_model_dir(MODELS_DIR)
+    names = ["lob_vectorizer.joblib", "lob_model.joblib", "lob_labels.json", STAGE1_FILENAME,
+             model_registry.CHECKSUMS_FILENAME, model_registry.META_FILENAME]
+    return [model_registry.pointer_path(MODELS_DIR)] + [os.path.join(model_dir, n) for n in names]
+
+
+def reload_model_if_changed():
+    """Load, verify and warm the on-disk model off the request path, then swap it in.
+
+    Called by the artifact watcher. If the artifacts fail to load or verify, the
+    current model keeps serving. Returns the outcome string that is logged.
+    """
+    started = time.perf_counter()
+    with registry_lock:
+        try:
+            version = model_registry.current_version(MODELS_DIR)
+            model_dir = model_registry.active_model_dir(MODELS_DIR)
+            checksums_path = os.path.join(model_dir, model_registry.CHECKSUMS_FILENAME)
+            with open(checksums_path, "r", encoding="utf-8") as f:
+                checksums = json.load(f)
+        except (OSError, ValueError, model_registry.RegistryError) as exc:
+            outcome = "failed"
+            print(f"WARNING: Hot reload skipped, could not read artifacts: {exc}; keeping the current model")
+            bundle = None
+        else:
+            bundle = None
+            if (
+                current_bundle is not None
+                and current_bundle.version == version
+                and current_bundle.model_dir == model_dir
+                and current_bundle.checksums == checksums
+            ):
+                outcome = "unchanged"
+            else:
+                try:
+                    bundle = _read_bundle(model_dir, version)
+                    if bundle is not None:
+                        _warm_bundle(bundle)
+                except Exception:
+                    traceback.print_exc()
+                    bundle = None
+                outcome = "reloaded" if bundle is not None else "failed"
+        if bundle is not None:
+            _activate(bundle)
+    elapsed = time.perf_counter() - started
+    _model_reloads.labels(outcome=outcome).inc()
+    if outcome != "unchanged":
+        _model_reload_seconds.observe(elapsed)
+        served = current_bundle.version if current_bundle is not None else None
+        if outcome == "reloaded":
+            print(f"Hot reload: now serving {version or '(unversioned)'} ({elapsed:.2f}s)")
+        else:
+            print(f"WARNING: Hot reload of {version or '(unversioned)'} failed after {elapsed:.2f}s; still serving {served or 'no model'}")
+    return outcome
+
+
+def start_artifact_watcher(interval=HOT_RELOAD_INTERVAL):
+    return ArtifactWatcher(_watched_artifact_paths, reload_model_if_changed, interval).start()
 
-    if not _verify_model_artifacts([vec_path, mod_path, lab_path]):
-        return False
 
+def _activate(bundle):
+    """Swap the serving globals to `bundle`; the bundle it replaces is kept for rollback."""
+    global model, vectorizer, featurizer, labels, fragments, training_meta, cascade
+    global current_bundle, previous_bundle, _ready_after
     with model_lock:
-        vectorizer = joblib.load(vec_path)
-        model = joblib.load(mod_path)
-        with open(lab_path, "r", encoding="utf-8") as f:
-            labels = json.load(f)
-        training_meta = None
-        meta_path = os.path.join(MODELS_DIR, "training_meta.json")
-        if os.path.exists(meta_path):
-            try:
-                with open(meta_path, "r", encoding="utf-8") as f:
-                    training_meta = json.load(f)
-            except Exception:
-                pass
-    print(f"Loaded model with {len(labels)} labels")
+        if current_bundle is not None and current_bundle is not bundle:
+            previous_bundle = current_bundle
+        current_bundle = bundle
+        vectorizer = bundle.vectorizer
+        featurizer = bundle.featurizer
+        model = bundle.model
+        labels = bundle.labels
+        fragments = bundle.fragments
+        training_meta = bundle.training_meta
+        cascade = bundle.cascade
+        if _ready_after is None and bundle.warmed_seconds is not None:
+            _ready_after = time.perf_counter() - _PROCESS_STARTED
+
+
+def load_model():
+    """Load the current registry version (or the legacy flat artifacts) and start serving it."""
+    try:
+        version = model_registry.current_version(MODELS_DIR)
+        model_dir = model_registry.active_model_dir(MODELS_DIR)
+    except (OSError, ValueError, model_registry.RegistryError) as exc:
+        print(f"ERROR: Could not read model registry pointer: {exc}")
+        return False
+    bundle = _read_bundle(model_dir, version)
+    if bundle is None:
+        return False
+    _warm_bundle(bundle)
+    _activate(bundle)
+    print(f"Loaded model {version or '(unversioned)'} with {len(bundle.labels)} labels (warm-up {bundle.warmed_seconds:.2f}s)")
+    if bundle.cascade is not None:
+        print(f"Confidence cascade enabled (first-stage threshold {bundle.cascade.threshold:.4f})")
     return True
 
 
@@ -232,124 +577,404 @@ def health():
         "status": "ok",
         "model_loaded": model is not None,
         "num_labels": len(labels) if labels else 0,
+        "model_version": current_bundle.version if current_bundle is not None else None,
     }
     if training_meta:
         payload["algorithm"] = training_meta.get("algorithm")
         payload["last_trained"] = training_meta.get("trainedAt")
+    if cascade is not None:
+        payload["cascade"] = cascade.stats()
+    if admission is not None:
+        payload["admission"] = admission.stats()
+    if single_flight is not None:
+        payload["singleFlight"] = single_flight.stats()
+    payload["resourceBudgets"] = resource_governor.summary()
     return jsonify(payload)
 
 
+@app.route("/ready", methods=["GET"])
+def ready():
+    """Readiness: 200 only once a model is loaded and warmed. /health stays a cheap liveness check."""
+    bundle = current_bundle
+    if bundle is None:
+        return jsonify({"ready": False, "reason": "model not loaded"}), 503
+    if bundle.warmed_seconds is None:
+        return jsonify({"ready": False, "reason": "warming up"}), 503
+    return jsonify({
+        "ready": True,
+        "model_version": bundle.version,
+        "warmupSeconds": round(bundle.warmed_seconds, 4),
+        "startupSeconds": round(_ready_after, 4) if _ready_after is not None else None,
+    })
+
+
 @app.route("/api/health", methods=["GET"])
 def api_health():
     """Compatibility endpoint for monitoring service that expects /api/health"""
     return health()
 
 
-@app.route("/predict", methods=["POST"])
-def predict():
-    if model is None or vectorizer is None or labels is None:
-        return jsonify({"error": "Model not loaded. Train the model first."}), 503
+@app.route("/metrics", methods=["GET"])
+def metrics_endpoint():
+    return Response(metrics.render(), mimetype=None, content_type=METRICS_CONTENT_TYPE)
 
-    data = request.get_json(silent=True)
-    if not data or not data.get("businessDescription"):
-        return jsonify({"error": "businessDescription is required"}), 400
+
+@app.before_request
+def _admit_predict():
+    """Start the /predict StageTimer and apply admission control before the handler runs."""
+    if request.endpoint != "predict":
+        return None
+    timer = g.stage_timer = StageTimer()
+    g.deadline = None
+    raw_deadline = request.headers.get(DEADLINE_HEADER)
+    if raw_deadline is not None:
+        try:
+            budget_ms = float(raw_deadline)
+        except ValueError:
+            budget_ms = float("nan")
+        if not budget_ms > 0:
+            return jsonify({"error": f"{DEADLINE_HEADER} must be a positive number of milliseconds"}), 400
+        g.deadline = timer.start + budget_ms / 1000.0
+    if admission is None:
+        return None
+    try:
+        g.admitted_at = admission.acquire(g.deadline)
+    except AdmissionRejected as exc:
+        timer.mark("queue")
+        response = jsonify({"error": "Service overloaded, please retry later", "reason": exc.reason})
+        response.status_code = 503
+        response.headers["Retry-After"] = str(exc.retry_after)
+        return response
+    timer.mark("queue")
+    return None
+
+
+@app.teardown_request
+def _release_predict_slot(exc=None):
+    admitted_at = g.pop("admitted_at", None)
+    if admitted_at is not None:
+        admission.release(admitted_at)
+
+
+@app.after_request
+def _record_predict_timing(response):
+    """Feed the per-request StageTimer into the histograms and the Server-Timing header."""
+    timer = g.pop("stage_timer", None)
+    if timer is None:
+        return response
+    durations = timer.durations()
+    total = time.perf_counter() - timer.start
+    _stage_seconds.observe_many([(_stage_children[s], v) for s, v in durations.items()])
+    _predict_seconds.observe(total)
+    _predict_responses.labels(status=response.status_code).inc()
+    if SERVER_TIMING_ENABLED:
+        response.headers["Server-Timing"] = StageTimer.server_timing(durations, total)
+    return response
+
+
+def _parse_predict_request(data, timer=None):
+    """Validate a /predict body.
+
+    Returns (normalized description, top_k, threshold, min_confidence); raises
+    ValueError with the client-facing message on invalid input.
+    """
+    if not isinstance(data, dict) or not data.get("businessDescription"):
+        raise ValueError("businessDescription is required")
 
     desc = normalize_text(data["businessDescription"])
+    if timer is not None:
+        timer.mark("normalize")
     if len(desc) < 10:
-        return jsonify({"error": "businessDescription must be at least 10 characters"}), 400
+        raise ValueError("businessDescription must be at least 10 characters")
     if len(desc) > MAX_DESCRIPTION_LENGTH:
-        return jsonify({"error": f"businessDescription must be <= {MAX_DESCRIPTION_LENGTH} characters"}), 400
+        raise ValueError(f"businessDescription must be <= {MAX_DESCRIPTION_LENGTH} characters")
 
     try:
         top_k = int(data.get("topK", 5))
     except (TypeError, ValueError):
-        return jsonify({"error": "topK must be an integer"}), 400
+        raise ValueError("topK must be an integer")
     if top_k < 1 or top_k > MAX_TOP_K:
-        return jsonify({"error": f"topK must be between 1 and {MAX_TOP_K}"}), 400
+        raise ValueError(f"topK must be between 1 and {MAX_TOP_K}")
+
+    threshold = _parse_bounded_float(data, "threshold", 0.01)
+    # If the model's best prediction is below this, return no recommendations
+    min_confidence = _parse_bounded_float(data, "minConfidence", 0.50)
+    return desc, top_k, threshold, min_confidence
+
+
+def _score(X):
+    """Class probabilities (rows aligned with X, columns with `labels`). Caller holds model_lock."""
+    return lob_scoring.score(model, X, labels, cascade)
+
+
+def _build_prediction(proba, top_k, threshold, min_confidence):
+    """Turn one row of class probabilities into the /predict response payload."""
+    return lob_scoring.build_prediction(proba, labels, build_label_to_taxonomy_map(), top_k, threshold, min_confidence)
+
 
+@app.route("/predict", methods=["POST"])
+def predict():
+    timer = g.stage_timer
+    if model is None or vectorizer is None or labels is None:
+        return jsonify({"error": "Model not loaded. Train the model first."}), 503
+
+    data = request.get_json(silent=True)
+    timer.mark("parse")
     try:
-        threshold = _parse_bounded_float(data, "threshold", 0.01)
-        # If the model's best prediction is below this, return no recommendations
-        min_confidence = _parse_bounded_float(data, "minConfidence", 0.50)
+        desc, top_k, threshold, min_confidence = _parse_predict_request(data, timer)
     except ValueError as exc:
         return jsonify({"error": str(exc)}), 400
+    timer.mark("parse")
 
-    try:
+    def compute():
+        """Score and encode the response body, or return None if the deadline passed before scoring."""
+        deadline = g.deadline
         with model_lock:
-            X = vectorizer.transform([desc])
-            if hasattr(model, "predict_proba"):
-                proba = model.predict_proba(X)[0]
-            elif hasattr(model, "decision_function"):
-                decision = model.decision_function(X)[0]
-                exp_d = np.exp(decision - np.max(decision))
-                proba = exp_d / exp_d.sum()
-            else:
-                pred = model.predict(X)
-                return jsonify({"recommendations": _label_to_recs([pred[0]])})
-
-        top_indices = np.argsort(proba)[::-1][: min(top_k, len(labels))]
-        best_prob = float(proba[top_indices[0]]) if len(top_indices) else 0
-        if best_prob < min_confidence:
-            return jsonify({
-                "recommendations": [],
-                "noConfidentMatch": True,
-                "message": "Your description doesn't clearly match any of our current lines of business. Please add your line(s) manually below.",
-            })
-
-        label_map = build_label_to_taxonomy_map()
-        recommendations = []
-        seen = set()
-
-        for idx in top_indices:
-            if proba[idx] < threshold:
-                continue
-            label = labels[idx]
-            if label in seen:
-                continue
-            seen.add(label)
-            info = label_map.get(label)
-            if info:
-                rec = dict(info)
-                rec["confidence"] = round(float(proba[idx]), 4)
-                recommendations.append(rec)
+            timer.mark("lock_wait")
+            if deadline is not None and time.perf_counter() >= deadline:
+                return None
+            scoring_started = time.perf_counter()
+            X = featurizer.transform([desc])
+            timer.mark("vectorize")
+            proba = _score(X)[0]
+            label_fragments = fragments
+            label_list = labels
+            timer.mark("score")
+
+        top_indices = lob_scoring.top_indices(proba, top_k)
+        timer.mark("topk")
+        shadow_scorer = shadow
+        if shadow_scorer is not None and len(top_indices):
+            best = top_indices[0]
+            shadow_scorer.submit(desc, label_list[best], float(proba[best]), time.perf_counter() - scoring_started)
+        if not len(top_indices) or proba[top_indices[0]] < min_confidence:
+            return _NO_CONFIDENT_MATCH_BODY
+        return label_fragments.render(top_indices, proba, threshold)
 
-        return jsonify({"recommendations": recommendations})
+    try:
+        if single_flight is None:
+            body = compute()
+        else:
+            body, shared = single_flight.do((desc, top_k, threshold, min_confidence), compute)
+            if shared:
+                timer.mark("coalesced")
+                if body is None:
+                    # The leader's deadline expired before it scored; compute for this request instead
+                    body = compute()
+        if body is None:
+            # The client has given up; don't spend scoring time on it
+            if admission is not None:
+                admission.expire()
+            return jsonify({"error": "Request deadline expired before scoring", "reason": "deadline_expired"}), 503
+        response = app.response_class(body + "\n", mimetype="application/json")
+        timer.mark("serialize")
+        return response
 
     except Exception as e:
         traceback.print_exc()
         return jsonify({"error": f"Prediction failed: {str(e)}"}), 500
 
 
+def _decompressed_chunks(stream, gzipped):
+    """Read the raw request body in bounded chunks, gunzipping incrementally if needed."""
+    decomp = zlib.decompressobj(16 + zlib.MAX_WBITS) if gzipped else None
+    while True:
+        chunk = stream.read(BULK_READ_CHUNK_BYTES)
+        if not chunk:
+            break
+        if decomp is None:
+            yield chunk
+            continue
+        # max_length bounds the inflated size per step (no unbounded gzip bombs in memory)
+        while chunk:
+            out = decomp.decompress(chunk, BULK_READ_CHUNK_BYTES)
+            if out:
+                yield out
+            chunk = decomp.unconsumed_tail
+    if decomp is not None:
+        tail = decomp.flush()
+        if tail:
+            yield tail
+
+
+def _iter_ndjson_lines(chunks):
+    """Split a byte-chunk stream into lines without holding more than one partial line.
+
+    A line longer than MAX_BULK_LINE_BYTES is yielded as None; its bytes are dropped
+    up to the next newline instead of being buffered.
+    """
+    partial = b""
+    oversized = False
+    for chunk in chunks:
+        *complete, rest = chunk.split(b"\n")
+        for piece in complete:
+            if oversized:
+                oversized = False
+                yield None
+            else:
+                line = partial + piece
+                yield line if len(line) <= MAX_BULK_LINE_BYTES else None
+            partial = b""
+        if oversized:
+            continue
+        partial += rest
+        if len(partial) > MAX_BULK_LINE_BYTES:
+            partial, oversized = b"", True
+    if oversized:
+        yield None
+    elif partial:
+        yield partial
+
+
+@app.route("/predict/bulk", methods=["POST"])
+def predict_bulk():
+    """Stream-score an NDJSON body of descriptions and stream NDJSON results back.
+
+    Each input line is a /predict body, optionally with an "id" that is echoed
+    back; query parameters topK, threshold and minConfidence set per-line
+    defaults. Lines are scored in batches of LOB_BULK_BATCH_SIZE as they
+    arrive, and each output line is {"line": n, "id": ..., <predict payload>}
+    or {"line": n, "error": "..."}. Request bodies with Content-Encoding: gzip
+    are inflated incrementally; responses are gzipped when the client accepts it.
+    """
+    auth_error = _require_admin_token()
+    if auth_error:
+        return auth_error
+    if model is None or vectorizer is None or labels is None:
+        return jsonify({"error": "Model not loaded. Train the model first."}), 503
+
+    defaults = {k: request.args[k] for k in ("topK", "threshold", "minConfidence") if k in request.args}
+    try:
+        _parse_predict_request(dict(defaults, businessDescription="x" * 10))
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
+
+    gzipped_in = request.headers.get("Content-Encoding", "").lower() == "gzip"
+    gzip_out = "gzip" in request.accept_encodings
+    stream = request.stream
+
+    def score_batch(pending):
+        valid = [item for item in pending if "params" in item]
+        if valid:
+            try:
+                with model_lock:
+                    proba = _score(featurizer.transform([item["params"][0] for item in valid]))
+                for item, row in zip(valid, proba):
+                    item["result"] = _build_prediction(row, *item["params"][1:])
+            except Exception as exc:
+                traceback.print_exc()
+                for item in valid:
+                    item["result"] = {"error": f"Prediction failed: {exc}"}
+        out = []
+        for item in pending:
+            record = {"line": item["line"]}
+            if item.get("id") is not None:
+                record["id"] = item["id"]
+            record.update(item["result"])
+            _bulk_rows.labels(result="error" if "error" in item["result"] else "ok").inc()
+            out.append(app.json.dumps(record))
+        return ("\n".join(out) + "\n").encode("utf-8")
+
+    def generate():
+        comp = zlib.compressobj(wbits=16 + zlib.MAX_WBITS) if gzip_out else None
+
+        def emit(data):
+            if comp is None:
+                return data
+            return comp.compress(data) + comp.flush(zlib.Z_SYNC_FLUSH)
+
+        pending = []
+        n_valid = 0
+        line_no = 0
+        try:
+            for raw in _iter_ndjson_lines(_decompressed_chunks(stream, gzipped_in)):
+                line_no += 1
+                if raw is not None and not raw.strip():
+                    continue
+                item = {"line": line_no}
+                try:
+                    if raw is None:
+                        raise ValueError(f"line exceeds {MAX_BULK_LINE_BYTES} bytes")
+                    try:
+                        data = json.loads(raw)
+                    except ValueError:
+                        raise ValueError("line is not valid JSON")
+                    if isinstance(data, dict):
+                        item["id"] = data.get("id")
+                        data = dict(defaults, **data)
+                    item["params"] = _parse_predict_request(data)
+                    n_valid += 1
+                except ValueError as exc:
+                    item["result"] = {"error": str(exc)}
+                pending.append(item)
+                if n_valid >= BULK_BATCH_SIZE:
+                    yield emit(score_batch(pending))
+                    pending = []
+                    n_valid = 0
+            if pending:
+                yield emit(score_batch(pending))
+        except (ValueError, zlib.error) as exc:
+            if pending:
+                yield emit(score_batch(pending))
+            yield emit((app.json.dumps({"line": line_no + 1, "error": f"Aborted: {exc}"}) + "\n").encode("utf-8"))
+        if comp is not None:
+            yield comp.flush()
+
+    response = Response(stream_with_context(generate()), content_type="application/x-ndjson")
+    if gzip_out:
+        response.headers["Content-Encoding"] = "gzip"
+    return response
+
+
 @app.route("/train", methods=["POST"])
 def train_endpoint():
     """Accept a dataset and retrain the model.
 
-    Body:
+    Body (JSON, optionally with Content-Encoding: gzip):
       { "dataset": [ { "businessDescription": "...", "recommendations": [...] } ] }
+    or NDJSON (Content-Type: application/x-ndjson, optionally gzip), one entry per
+    line, validated and fed to training while the upload streams in (up to
+    LOB_MAX_TRAIN_STREAM_EXAMPLES entries). Invalid data is a 400.
+    ?warmStart=1 initializes the solver from the promoted model's coefficients when the
+    label set and features are compatible (cold start otherwise; see training_meta.json "finalFit").
     """
     auth_error = _require_admin_token()
     if auth_error:
         return auth_error
 
-    data = request.get_json(silent=True)
-    if not data:
-        return jsonify({"error": "Request body required"}), 400
-
-    dataset = data.get("dataset")
-    if data.get("datasetPath"):
-        return jsonify({"error": "datasetPath is disabled for security; provide 'dataset' array"}), 400
-    if dataset is None:
-        return jsonify({"error": "Provide 'dataset' (array)"}), 400
+    gzipped = request.headers.get("Content-Encoding", "").lower() == "gzip"
+    streamed = request.mimetype in NDJSON_MIMETYPES
+    if streamed:
+        dataset = _iter_training_ndjson(request.stream, gzipped)
+    else:
+        if gzipped:
+            chunks, size = [], 0
+            try:
+                for chunk in _decompressed_chunks(request.stream, True):
+                    chunks.append(chunk)
+                    size += len(chunk)
+                    if size > MAX_TRAIN_JSON_BYTES:
+                        return jsonify({"error": f"Decompressed body exceeds {MAX_TRAIN_JSON_BYTES} bytes; use NDJSON"}), 413
+                data = json.loads(b"".join(chunks))
+            except (zlib.error, ValueError):
+                return jsonify({"error": "Body must be gzip-compressed JSON"}), 400
+        else:
+            data = request.get_json(silent=True)
+        if not data or not isinstance(data, dict):
+            return jsonify({"error": "Request body required"}), 400
 
-    tmp_path = os.path.join(AI_ROOT, "datasets", "_train_temp.json")
+        dataset = data.get("dataset")
+        if data.get("datasetPath"):
+            return jsonify({"error": "datasetPath is disabled for security; provide 'dataset' array"}), 400
+        if dataset is None:
+            return jsonify({"error": "Provide 'dataset' (array)"}), 400
 
     try:
-        _validate_training_dataset(dataset)
+        if not streamed:
+            _validate_training_dataset(dataset)
 
-        with open(tmp_path, "w", encoding="utf-8") as f:
-            json.dump(dataset, f, ensure_ascii=False)
-
-        success = run_training(tmp_path)
+        # Entries go to train() in memory (NDJSON as a generator); nothing is written to disk
+        success = run_training(dataset, warm_start=request.args.get("warmStart") in ("1", "true"))
         if not success:
             return jsonify({"error": "Training failed (not enough data?)"}), 500
 
@@ -357,12 +982,248 @@ def train_endpoint():
 
         return jsonify({"ok": True, "message": "Model retrained and reloaded successfully"})
 
+    except TrainingDataError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         traceback.print_exc()
         return jsonify({"error": f"Training failed: {str(e)}"}), 500
-    finally:
-        if os.path.exists(tmp_path):
-            os.remove(tmp_path)
+
+
+@app.route("/admin/profile", methods=["GET"])
+def profile_endpoint():
+    """Sample the stacks of in-flight request threads and return collapsed stacks + top functions."""
+    auth_error = _require_admin_token()
+    if auth_error:
+        return auth_error
+    if profiler is None:
+        return jsonify({"error": "Profiler is disabled (set LOB_PROFILER_ENABLED=1)"}), 404
+
+    try:
+        seconds = float(request.args.get("seconds", 5))
+        hz = float(request.args.get("hz", 100))
+    except (TypeError, ValueError):
+        return jsonify({"error": "seconds and hz must be numbers"}), 400
+    if not (math.isfinite(seconds) and math.isfinite(hz)):
+        return jsonify({"error": "seconds and hz must be finite numbers"}), 400
+    threads = request.args.get("threads", "request")
+    if threads not in ("request", "all"):
+        return jsonify({"error": "threads must be 'request' or 'all'"}), 400
+
+    try:
+        report = profiler.profile(seconds, hz, request_threads_only=(threads == "request"))
+    except ProfilerBusyError as exc:
+        return jsonify({"error": str(exc)}), 409
+
+    if request.args.get("format") == "collapsed":
+        return Response(report["collapsed"] + "\n", content_type="text/plain; charset=utf-8")
+    return jsonify(report)
+
+
+def _models_payload():
+    return {
+        "current": model_registry.current_version(MODELS_DIR),
+        "loaded": current_bundle.version if current_bundle is not None else None,
+        "previousLoaded": previous_bundle.version if previous_bundle is not None else None,
+        "versions": model_registry.list_versions(MODELS_DIR),
+    }
+
+
+@app.route("/admin/models", methods=["GET"])
+def list_models_endpoint():
+    auth_error = _require_admin_token()
+    if auth_error:
+        return auth_error
+    return jsonify(_models_payload())
+
+
+@app.route("/admin/models/promote", methods=["POST"])
+def promote_model_endpoint():
+    """Load and verify a registry version off the request path, point CURRENT.json at it and serve it."""
+    auth_error = _require_admin_token()
+    if auth_error:
+        return auth_error
+    data = request.get_json(silent=True) or {}
+    version = data.get("version")
+    if not isinstance(version, str) or not version:
+        return jsonify({"error": "version is required"}), 400
+
+    with registry_lock:
+        if current_bundle is not None and current_bundle.version == version:
+            return jsonify(dict(_models_payload(), ok=True, message=f"{version} is already being served"))
+        if previous_bundle is not None and previous_bundle.version == version:
+            bundle = previous_bundle
+        else:
+            try:
+                model_dir = model_registry.version_dir(version, MODELS_DIR)
+            except model_registry.RegistryError as exc:
+                return jsonify({"error": str(exc)}), 400
+            if not os.path.isdir(model_dir):
+                return jsonify({"error": f"Unknown version: {version}"}), 404
+            bundle = _read_bundle(model_dir, version)
+            if bundle is None:
+                return jsonify({"error": f"Version {version} failed to load or verify"}), 422
+            _warm_bundle(bundle)
+        try:
+            model_registry.promote(version, MODELS_DIR)
+        except model_registry.RegistryError as exc:
+            return jsonify({"error": str(exc)}), 404
+        _activate(bundle)
+    print(f"Promoted model version {version}")
+    return jsonify(dict(_models_payload(), ok=True))
+
+
+@app.route("/admin/models/rollback", methods=["POST"])
+def rollback_model_endpoint():
+    """Serve the previously loaded version again (in-memory swap) and point CURRENT.json back at it."""
+    auth_error = _require_admin_token()
+    if auth_error:
+        return auth_error
+    with registry_lock:
+        bundle = previous_bundle
+        if bundle is None:
+            return jsonify({"error": "No previous model version is loaded"}), 409
+        try:
+            if bundle.version is not None:
+                model_registry.promote(bundle.version, MODELS_DIR)
+            else:
+                # Back to the pre-registry flat artifacts
+                model_registry.clear_current(MODELS_DIR)
+        except model_registry.RegistryError as exc:
+            return jsonify({"error": str(exc)}), 409
+        _activate(bundle)
+    print(f"Rolled back to model version {bundle.version or '(unversioned)'}")
+    return jsonify(dict(_models_payload(), ok=True))
+
+
+@app.route("/admin/models/update", methods=["POST"])
+def incremental_update_endpoint():
+    """Fold new labeled rows into the served model without a full retrain and publish the result.
+
+    Body: {"dataset": [ entries as for /train ], "epochs": 5 (optional, 1-50)}. Labels
+    must already be known to the model, unless "appendClasses": true, which adds the
+    dataset's new labels as new classes without touching the existing ones. "negatives"
+    (entries as for /train) are the rows the served model was trained on, needed
+    unless it was trained on the service's own dataset. The new
+    version is only published: shadow it (POST /admin/shadow) and promote it with
+    /admin/models/promote, or send "promote": true to serve it right away. The
+    periodic full /train consolidates.
+    """
+    auth_error = _require_admin_token()
+    if auth_error:
+        return auth_error
+    data = request.get_json(silent=True)
+    if not data or not isinstance(data, dict):
+        return jsonify({"error": "Request body required"}), 400
+    epochs = data.get("epochs", 5)
+    if not isinstance(epochs, int) or isinstance(epochs, bool) or not 1 <= epochs <= 50:
+        return jsonify({"error": "epochs must be an integer between 1 and 50"}), 400
+    promote = data.get("promote", False)
+    if not isinstance(promote, bool):
+        return jsonify({"error": "promote must be true or false"}), 400
+
+    started = time.perf_counter()
+    with registry_lock:
+        base_version = current_bundle.version if current_bundle is not None else None
+        if base_version is None:
+            return jsonify({"error": "No registry version is being served; train one first"}), 409
+        try:
+            _validate_training_dataset(data.get("dataset"))
+            if data.get("negatives") is not None:
+                _validate_training_dataset(data["negatives"])
+            version, summary = run_incremental_update(data["dataset"], base_version, epochs,
+                                                      data.get("appendClasses") is True, data.get("negatives"))
+        except TrainingDataError as exc:
+            return jsonify({"error": str(exc)}), 400
+        except Exception as exc:
+            traceback.print_exc()
+            return jsonify({"error": f"Incremental update failed: {exc}"}), 500
+        if promote:
+            bundle = _read_bundle(model_registry.version_dir(version, MODELS_DIR), version)
+            if bundle is None:
+                return jsonify({"error": f"Version {version} failed to load or verify"}), 500
+            _warm_bundle(bundle)
+            model_registry.promote(version, MODELS_DIR)
+            _activate(bundle)
+    elapsed = time.perf_counter() - started
+    print(f"Incremental update: {base_version} -> {version}{' (promoted)' if promote else ''} ({elapsed:.2f}s)")
+    return jsonify(dict(_models_payload(), ok=True, version=version, promoted=promote,
+                        incremental=dict(summary, totalSeconds=round(elapsed, 3))))
+
+
+def _bundle_top1(bundle):
+    """Candidate scorer for the shadow worker; the worker is the only user of the bundle's featurizer."""
+    def score_top1(desc):
+        proba = lob_scoring.score(bundle.model, bundle.featurizer.transform([desc]), bundle.labels, bundle.cascade)[0]
+        best = int(np.argmax(proba))
+        return bundle.labels[best], float(proba[best])
+    return score_top1
+
+
+@app.route("/admin/shadow", methods=["GET", "POST", "DELETE"])
+def shadow_endpoint():
+    """GET: shadow comparison stats. POST {"version", "sampleRate"?, "queueSize"?}: start shadowing a
+    registry version (replacing any running shadow). DELETE: stop shadowing."""
+    global shadow
+    auth_error = _require_admin_token()
+    if auth_error:
+        return auth_error
+
+    if request.method == "GET":
+        running = shadow
+        if running is None:
+            return jsonify({"error": "No shadow model is running"}), 404
+        return jsonify(running.stats())
+
+    if request.method == "DELETE":
+        with registry_lock:
+            stopped, shadow = shadow, None
+        if stopped is None:
+            return jsonify({"error": "No shadow model is running"}), 404
+        stopped.stop()
+        model_registry.unprotect(stopped.candidate_version)
+        return jsonify(dict(stopped.stats(), ok=True))
+
+    data = request.get_json(silent=True) or {}
+    version = data.get("version")
+    if not isinstance(version, str) or not version:
+        return jsonify({"error": "version is required"}), 400
+    try:
+        sample_rate = _parse_bounded_float(data, "sampleRate", SHADOW_SAMPLE_RATE)
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
+    try:
+        queue_size = int(data.get("queueSize", SHADOW_QUEUE_SIZE))
+    except (TypeError, ValueError):
+        queue_size = 0
+    if queue_size < 1:
+        return jsonify({"error": "queueSize must be a positive integer"}), 400
+    try:
+        model_dir = model_registry.version_dir(version, MODELS_DIR)
+    except model_registry.RegistryError as exc:
+        return jsonify({"error": str(exc)}), 400
+    if not os.path.isdir(model_dir):
+        return jsonify({"error": f"Unknown version: {version}"}), 404
+
+    with registry_lock:
+        # Protected before loading, so retention on a concurrent publish cannot remove it mid-read
+        model_registry.protect(version)
+        bundle = _read_bundle(model_dir, version)
+        if bundle is None:
+            model_registry.unprotect(version)
+            return jsonify({"error": f"Version {version} failed to load or verify"}), 422
+        started = ShadowScorer(
+            version,
+            _bundle_top1(bundle),
+            sample_rate,
+            queue_size,
+            primary_version=current_bundle.version if current_bundle is not None else None,
+        )
+        replaced, shadow = shadow, started
+    if replaced is not None:
+        replaced.stop()
+        model_registry.unprotect(replaced.candidate_version)
+    print(f"Shadow scoring {version} on {sample_rate:.1%} of /predict traffic")
+    return jsonify(dict(started.stats(), ok=True))
 
 
 def _flatten_for_eval(dataset):
@@ -382,6 +1243,13 @@ def _flatten_for_eval(dataset):
 
 def run_evaluation():
     """Run model evaluation on test set. Returns dict with metrics or None on failure."""
+    with resource_governor.limit("evaluation"):
+        return _run_evaluation()
+
+
+def _run_evaluation():
+    from sklearn.metrics import accuracy_score, f1_score, precision_score, recall_score
+
     if model is None or vectorizer is None or labels is None:
         return None
     label_list = labels
@@ -507,6 +1375,47 @@ def evaluate_endpoint():
     return jsonify(result)
 
 
+def _apply_serving_budget():
+    # After the model load, so the BLAS/OpenMP libraries scikit-learn pulls in are loaded and get capped too
+    budget = resource_governor.apply("serving")
+    in_flight = budget.workers or "unlimited"
+    print(f"Serving budget: {budget.threads} BLAS/OpenMP thread(s), {in_flight} concurrent /predict")
+
+
+def _load_or_train_on_start():
+    if not load_model():
+        # Reuse a bundle built for the current inputs (see lob_artifact_cache.py); train only if none matches
+        if os.path.exists(DEFAULT_DATASET):
+            try:
+                key, _ = lob_artifact_cache.inputs_manifest(DEFAULT_DATASET)
+                version = lob_artifact_cache.install(key, MODELS_DIR)
+                if version and load_model():
+                    print(f"Installed cached model {version} built for the current inputs ({key[:12]})")
+                else:
+                    print(
+                        f"Model not found and no cached artifact matches the current datasets, taxonomy and training code "
+                        f"({key[:12]} not in {lob_artifact_cache.CACHE_DIR}). Training from {DEFAULT_DATASET}..."
+                    )
+                    key, version = lob_artifact_cache.build(DEFAULT_DATASET)
+                    if version:
+                        model_registry.promote(version, MODELS_DIR)
+                    if load_model():
+                        print("Auto-training complete. Model is ready.")
+                    else:
+                        print("WARNING: Auto-training failed. /predict will return 503 until the model is trained via POST /train.")
+            except Exception as e:
+                traceback.print_exc()
+                print(f"WARNING: Auto-training failed: {e}. /predict will return 503 until the model is trained via POST /train.")
+        else:
+            print(f"WARNING: No model and no dataset at {DEFAULT_DATASET}. Train via POST /train or add the dataset.")
+    _apply_serving_budget()
+    if _ready_after is not None:
+        print(f"Ready: first model serving {_ready_after:.2f}s after start")
+    if HOT_RELOAD_ENABLED:
+        start_artifact_watcher()
+        print(f"Watching model artifacts for changes every {HOT_RELOAD_INTERVAL:g}s")
+
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="LOB prediction service")
     parser.add_argument("--retrain", action="store_true", help="Retrain the model from the default dataset before starting the server")
@@ -533,21 +1442,12 @@ if __name__ == "__main__":
         else:
             print(f"ERROR: --retrain requested but dataset not found at {DEFAULT_DATASET}")
             sys.exit(1)
-    elif not load_model():
-        # Auto-train on first run so other devs / Docker get a working model without manual steps
-        if os.path.exists(DEFAULT_DATASET):
-            print("Model not found. Training from default dataset (first run or fresh clone)...")
-            try:
-                if run_training(DEFAULT_DATASET):
-                    load_model()
-                    print("Auto-training complete. Model is ready.")
-                else:
-                    print("WARNING: Auto-training failed. /predict will return 503 until the model is trained via POST /train.")
-            except Exception as e:
-                traceback.print_exc()
-                print(f"WARNING: Auto-training failed: {e}. /predict will return 503 until the model is trained via POST /train.")
-        else:
-            print(f"WARNING: No model and no dataset at {DEFAULT_DATASET}. Train via POST /train or add the dataset.")
+        _apply_serving_budget()
+        if HOT_RELOAD_ENABLED:
+            start_artifact_watcher()
+    else:
+        # Load (or auto-train) in the background so /health answers immediately; /ready reports when done
+        Thread(target=_load_or_train_on_start, name="lob-model-startup", daemon=True).start()
     port = int(os.environ.get("LOB_MODEL_PORT", 5050))
     print(f"Starting LOB prediction service on port {port}")
     app.run(host="0.0.0.0", port=port, debug=False)
@@ -0,0 +1,136 @@
+"""
+In-process stack sampling profiler for the live prediction service.
+
+Samples sys._current_frames() at a fixed rate for a bounded window from the
+calling thread and aggregates the stacks into:
+  - collapsed stacks ("root;...;leaf count" lines) for flamegraph.pl / speedscope
+  - a top-functions table with self and inclusive sample counts
+
+Nothing runs unless profile() is called, so an idle or disabled profiler has
+no per-request cost.
+"""
+
+import math
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+MAX_SECONDS = 60.0
+MAX_HZ = 1000.0
+# A thread is a request thread if its stack passes through Flask's WSGI entry point.
+REQUEST_FRAME = ("app.py", "wsgi_app")
+
+
+class ProfilerBusyError(RuntimeError):
+    """Raised when a profile is requested while another one is running."""
+
+
+class SamplingProfiler:
+    def __init__(self):
+        self._busy = threading.Lock()
+        self._labels = {}
+
+    def _label(self, code):
+        label = self._labels.get(code)
+        if label is None:
+            label = f"{os.path.basename(code.co_filename)}:{code.co_name}".replace(";", ":")
+            self._labels[code] = label
+        return label
+
+    def _stack(self, frame):
+        """Return the stack as a tuple of code objects, root first."""
+        codes = []
+        while frame is not None:
+            codes.append(frame.f_code)
+            frame = frame.f_back
+        codes.reverse()
+        return tuple(codes)
+
+    @staticmethod
+    def _is_request_stack(codes):
+        return any(
+            c.co_name == REQUEST_FRAME[1] and os.path.basename(c.co_filename) == REQUEST_FRAME[0]
+            for c in codes
+        )
+
+    def profile(self, seconds, hz, request_threads_only=True):
+        """Sample all other threads for `seconds` at `hz`; returns an aggregated report dict.
+
+        Both are clamped to [0.01, MAX_SECONDS] and [1, MAX_HZ]; NaN or infinity raises ValueError.
+        """
+        seconds, hz = float(seconds), float(hz)
+        if not (math.isfinite(seconds) and math.isfinite(hz)):
+            raise ValueError("seconds and hz must be finite numbers")
+        seconds = min(max(seconds, 0.01), MAX_SECONDS)
+        hz = min(max(hz, 1.0), MAX_HZ)
+        if not self._busy.acquire(blocking=False):
+            raise ProfilerBusyError("a profile is already running")
+        try:
+            return self._run(seconds, hz, request_threads_only)
+        finally:
+            self._busy.release()
+
+    def _run(self, seconds, hz, request_threads_only):
+        own_ident = threading.get_ident()
+        interval = 1.0 / hz
+        stacks = Counter()
+        ticks = 0
+        started = time.perf_counter()
+        deadline = started + seconds
+        next_tick = started
+        while True:
+            now = time.perf_counter()
+            if now >= deadline:
+                break
+            ticks += 1
+            for ident, frame in sys._current_frames().items():
+                if ident == own_ident:
+                    continue
+                codes = self._stack(frame)
+                if request_threads_only and not self._is_request_stack(codes):
+                    continue
+                stacks[codes] += 1
+            next_tick += interval
+            delay = next_tick - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                next_tick = time.perf_counter()
+        elapsed = time.perf_counter() - started
+        return self._report(stacks, ticks, elapsed, hz, request_threads_only)
+
+    def _report(self, stacks, ticks, elapsed, hz, request_threads_only):
+        collapsed = []
+        self_counts = Counter()
+        inclusive = Counter()
+        total = 0
+        for codes, count in stacks.most_common():
+            labels = [self._label(c) for c in codes]
+            collapsed.append(f"{';'.join(labels)} {count}")
+            total += count
+            if labels:
+                self_counts[labels[-1]] += count
+            for label in set(labels):
+                inclusive[label] += count
+
+        top = [
+            {
+                "function": label,
+                "selfSamples": self_counts[label],
+                "inclusiveSamples": inclusive[label],
+                "selfPct": round(100.0 * self_counts[label] / total, 2) if total else 0.0,
+                "inclusivePct": round(100.0 * inclusive[label] / total, 2) if total else 0.0,
+            }
+            for label in sorted(inclusive, key=lambda l: (-self_counts[l], -inclusive[l]))[:30]
+        ]
+        return {
+            "seconds": round(elapsed, 3),
+            "hz": hz,
+            "ticks": ticks,
+            "samples": total,
+            "requestThreadsOnly": request_threads_only,
+            "collapsed": "\n".join(collapsed),
+            "topFunctions": top,
+        }
@@ -0,0 +1,139 @@
+"""
+Shadow scoring: replay a sample of live /predict traffic against a candidate
+model off the request path and aggregate how it compares with the primary.
+
+    shadow = ShadowScorer("20261019T090815Z", candidate_top1, sample_rate=0.1)
+    shadow.submit(description, primary_label, primary_confidence, primary_seconds)  # request thread
+    shadow.stats()
+    shadow.stop()
+
+submit() costs one random() call for unsampled requests and a non-blocking
+put for sampled ones; when the bounded queue is full the sample is dropped
+(and counted) rather than slowing the request down. A single daemon worker
+scores the queue with the candidate and records top-1 agreement, confidence
+deltas (candidate top-1 confidence minus primary) and latency histograms for
+both models' featurize+score time.
+"""
+
+import queue
+import random
+import threading
+import time
+from collections import Counter
+
+from latency_metrics import DEFAULT_BUCKETS, Histogram
+
+DEFAULT_QUEUE_SIZE = 1000
+# Candidate top-1 confidence minus primary, bucketed for the confidence-delta histogram
+DELTA_BUCKETS = (-0.5, -0.2, -0.1, -0.05, -0.01, 0.01, 0.05, 0.1, 0.2, 0.5)
+
+
+def _histogram_summary(child, bounds):
+    cumulative, total = child.snapshot()
+    count = cumulative[-1]
+    les = [str(b) for b in bounds] + ["+Inf"]
+    summary = {"count": count, "buckets": dict(zip(les, cumulative))}
+    if count:
+        summary["mean"] = total / count
+        for q in (0.5, 0.95, 0.99):
+            rank = q * count
+            summary[f"p{int(q * 100)}"] = next(
+                (float(b) for b, c in zip(bounds, cumulative) if c >= rank), None
+            )  # bucket upper bound; None means above the last bucket
+    return summary
+
+
+class ShadowScorer:
+    def __init__(self, candidate_version, score_top1, sample_rate, queue_size=DEFAULT_QUEUE_SIZE, primary_version=None):
+        """score_top1(description) -> (label, confidence) using the candidate model."""
+        if not 0.0 <= sample_rate <= 1.0:
+            raise ValueError("sample_rate must be between 0 and 1")
+        self.candidate_version = candidate_version
+        self.primary_version = primary_version
+        self.sample_rate = sample_rate
+        self._score_top1 = score_top1
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._random = random.Random()
+        self._lock = threading.Lock()
+        self.counts = Counter({"submitted": 0, "dropped": 0, "scored": 0, "errors": 0, "agreed": 0})
+        self._delta_sum = 0.0
+        self._abs_delta_sum = 0.0
+        self.latency = Histogram("lob_shadow_score_seconds", "Featurize+score seconds by model.", ["model"])
+        self._primary_latency = self.latency.labels(model="primary")
+        self._candidate_latency = self.latency.labels(model="candidate")
+        self.delta = Histogram("lob_shadow_confidence_delta", "Candidate minus primary top-1 confidence.", buckets=DELTA_BUCKETS)
+        self.started_at = time.time()
+        self._worker = threading.Thread(target=self._run, name="lob-shadow-scorer", daemon=True)
+        self._worker.start()
+
+    def submit(self, description, primary_label, primary_confidence, primary_seconds):
+        """Queue a sampled request for the candidate; never blocks."""
+        if self._random.random() >= self.sample_rate:
+            return False
+        try:
+            self._queue.put_nowait((description, primary_label, primary_confidence, primary_seconds))
+        except queue.Full:
+            with self._lock:
+                self.counts["dropped"] += 1
+            return False
+        with self._lock:
+            self.counts["submitted"] += 1
+        return True
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            description, primary_label, primary_confidence, primary_seconds = item
+            try:
+                t0 = time.perf_counter()
+                label, confidence = self._score_top1(description)
+                seconds = time.perf_counter() - t0
+            except Exception:
+                with self._lock:
+                    self.counts["errors"] += 1
+                continue
+            delta = confidence - primary_confidence
+            self.latency.observe_many([(self._primary_latency, primary_seconds), (self._candidate_latency, seconds)])
+            self.delta.observe(delta)
+            with self._lock:
+                self.counts["scored"] += 1
+                self.counts["agreed"] += int(label == primary_label)
+                self._delta_sum += delta
+                self._abs_delta_sum += abs(delta)
+
+    def stop(self, timeout=5.0):
+        """Stop the worker; already-queued samples are discarded."""
+        while True:
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                break
+        self._queue.put(None)
+        self._worker.join(timeout)
+
+    def stats(self):
+        with self._lock:
+            counts = dict(self.counts)
+            delta_sum = self._delta_sum
+            abs_delta_sum = self._abs_delta_sum
+        scored = counts["scored"]
+        return {
+            "candidate": self.candidate_version,
+            "primary": self.primary_version,
+            "sampleRate": self.sample_rate,
+            "startedAt": self.started_at,
+            "queued": self._queue.qsize(),
+            "counts": counts,
+            "top1Agreement": counts["agreed"] / scored if scored else None,
+            "confidenceDelta": {
+                "mean": delta_sum / scored if scored else None,
+                "meanAbs": abs_delta_sum / scored if scored else None,
+                "histogram": _histogram_summary(self.delta.labels(), DELTA_BUCKETS),
+            },
+            "latencySeconds": {
+                "primary": _histogram_summary(self._primary_latency, DEFAULT_BUCKETS),
+                "candidate": _histogram_summary(self._candidate_latency, DEFAULT_BUCKETS),
+            },
+        }
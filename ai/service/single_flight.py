@@ -0,0 +1,68 @@
+"""
+Single-flight coalescing: concurrent calls with the same key share one computation.
+
+    flights = SingleFlight()
+    result, shared = flights.do(key, compute)
+
+The first caller for a key (the leader) runs compute(); callers that arrive
+while it is running wait for it and receive the same result, or the same
+exception. Nothing is cached: once the leader finishes, the next call for the
+key computes again.
+"""
+
+from threading import Event, Lock
+
+
+class _Call:
+    __slots__ = ("done", "result", "error", "waiters")
+
+    def __init__(self):
+        self.done = Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    def __init__(self):
+        self._lock = Lock()
+        self._calls = {}
+        self.computed = 0
+        self.shared = 0  # computations saved
+
+    def do(self, key, fn):
+        """Run fn() once per concurrent key; returns (result, shared) where shared is False for the leader."""
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self.shared += 1
+                leader = False
+            else:
+                call = self._calls[key] = _Call()
+                self.computed += 1
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+        except BaseException as exc:
+            call.error = exc
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result, False
+
+    def in_flight(self):
+        with self._lock:
+            return len(self._calls)
+
+    def stats(self):
+        return {"computed": self.computed, "shared": self.shared, "inFlight": self.in_flight()}
@@ -0,0 +1,82 @@
+"""
+Shared fixtures for the ai/ tests
+
+Fixtures:
+- admin_token: sets LOB_MODEL_ADMIN_TOKEN and returns it
+- corpus / corpus_entries: a mini corpus (sari-sari store, laundry, bakery; four descriptions each)
+- write_bundle: publishes a tiny LogisticRegression bundle trained on the corpus into a registry
+"""
+
+import json
+import os
+import sys
+
+import joblib
+import pytest
+from sklearn.linear_model import LogisticRegression
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'service'))
+
+import model_registry
+from train_lob_model import build_vectorizer
+
+ADMIN_TOKEN = "test-admin-token"
+CORPUS = {
+    "RET|Sari-sari store": ["sari-sari store selling softdrinks", "tindahan ng delata at bigas",
+                            "maliit na tindahan sa kanto", "sari-sari store with load and snacks"],
+    "SVC|Laundry services": ["laundry shop wash dry fold", "labahan at plantsa ng damit",
+                             "self-service laundromat", "laundry pickup and delivery"],
+    "FDS|Bakery / pastry shop": ["bakery selling pandesal", "panaderya ng tinapay at ensaymada",
+                                 "pastry shop cakes and cookies", "bakeshop with hopia and monay"],
+}
+
+
+@pytest.fixture
+def admin_token(monkeypatch):
+    monkeypatch.setenv("LOB_MODEL_ADMIN_TOKEN", ADMIN_TOKEN)
+    return ADMIN_TOKEN
+
+
+@pytest.fixture(scope="session")
+def corpus():
+    """(text, label) rows, grouped by label in CORPUS order."""
+    return [(text, label) for label, texts in CORPUS.items() for text in texts]
+
+
+@pytest.fixture(scope="session")
+def corpus_entries(corpus):
+    """The corpus as dataset entries (as for /train)."""
+    return [
+        {"businessDescription": text, "recommendations": [{"taxCode": label.split("|")[0],
+                                                           "detailedLine": label.split("|")[1]}]}
+        for text, label in corpus
+    ]
+
+
+@pytest.fixture(scope="session")
+def write_bundle(corpus):
+    """write_bundle(models_dir, algorithm="LogisticRegression", C=1.0) -> version.
+
+    Trains a tiny model on the corpus into a staging dir and publishes it (unpromoted).
+    """
+    texts = [text for text, _ in corpus]
+    y = [label for _, label in corpus]
+
+    def write(models_dir, algorithm="LogisticRegression", C=1.0):
+        staging = model_registry.create_staging_dir(str(models_dir))
+        vec = build_vectorizer().fit(texts)
+        clf = LogisticRegression(C=C, max_iter=1000).fit(vec.transform(texts), y)
+        joblib.dump(vec, os.path.join(staging, "lob_vectorizer.joblib"))
+        joblib.dump(clf, os.path.join(staging, "lob_model.joblib"))
+        with open(os.path.join(staging, "lob_labels.json"), "w", encoding="utf-8") as f:
+            json.dump([str(c) for c in clf.classes_], f)
+        checksums = {name: model_registry.file_sha256(os.path.join(staging, name))
+                     for name in ("lob_vectorizer.joblib", "lob_model.joblib", "lob_labels.json")}
+        with open(os.path.join(staging, model_registry.CHECKSUMS_FILENAME), "w", encoding="utf-8") as f:
+            json.dump(checksums, f)
+        with open(os.path.join(staging, model_registry.META_FILENAME), "w", encoding="utf-8") as f:
+            json.dump({"algorithm": algorithm, "n_labels": len(clf.classes_)}, f)
+        return model_registry.publish(staging, str(models_dir))
+
+    return write
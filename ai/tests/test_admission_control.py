@@ -0,0 +1,166 @@
+"""
+Tests for /predict admission control (admission_control.py)
+
+Tests cover:
+- In-flight slots, bounded queue and queue_full shedding
+- Shedding when the estimated wait exceeds the latency target or deadline
+- Outcome counters (never decreasing, also on /metrics) and Retry-After estimates
+- Admission control is off by default; /predict sheds with 503 and Retry-After
+"""
+
+import os
+import re
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'service'))
+
+from admission_control import AdmissionController, AdmissionRejected
+
+
+class TestAdmissionController:
+    """Test suite for the admission controller"""
+
+    def test_queue_full_is_shed(self):
+        ctl = AdmissionController(max_in_flight=1, max_queued=1)
+        token = ctl.acquire()
+        waiter_admitted = threading.Event()
+
+        def waiter():
+            ctl.release(ctl.acquire())
+            waiter_admitted.set()
+
+        t = threading.Thread(target=waiter)
+        t.start()
+        while ctl.queued == 0:
+            time.sleep(0.001)
+
+        with pytest.raises(AdmissionRejected) as exc:
+            ctl.acquire()
+        assert exc.value.reason == "queue_full"
+        assert exc.value.retry_after >= 1
+
+        ctl.release(token)
+        t.join(timeout=5)
+        assert waiter_admitted.is_set()
+        assert ctl.outcomes["accepted"] == 2
+        assert ctl.outcomes["queue_full"] == 1
+        assert ctl.in_flight == 0 and ctl.queued == 0
+
+    def test_latency_target_sheds_when_queue_is_slow(self):
+        ctl = AdmissionController(max_in_flight=1, max_queued=10, latency_target=0.5)
+        ctl.service_time = 1.0
+        token = ctl.acquire()
+        with pytest.raises(AdmissionRejected) as exc:
+            ctl.acquire()
+        assert exc.value.reason == "latency"
+        assert exc.value.retry_after == 1
+        ctl.release(token)
+
+    def test_deadline_expires_while_queued(self):
+        ctl = AdmissionController(max_in_flight=1, max_queued=10)
+        token = ctl.acquire()
+        with pytest.raises(AdmissionRejected) as exc:
+            ctl.acquire(deadline=time.perf_counter() + 0.05)
+        assert exc.value.reason == "deadline_expired"
+        assert ctl.queued == 0
+        ctl.release(token)
+
+        with pytest.raises(AdmissionRejected):
+            ctl.acquire(deadline=time.perf_counter() - 1)
+        assert ctl.in_flight == 0
+        ctl.release(ctl.acquire())
+        assert ctl.outcomes["deadline_expired"] == 2
+
+    def test_expired_after_admission_stays_accepted(self):
+        ctl = AdmissionController(max_in_flight=1, max_queued=0)
+        ctl.release(ctl.acquire())
+        token = ctl.acquire()
+        ctl.expire()
+        ctl.release(token)
+        assert ctl.outcomes["accepted"] == 2
+        assert ctl.outcomes["expired_after_admission"] == 1
+        assert ctl.outcomes["deadline_expired"] == 0
+
+    def test_service_time_is_smoothed(self):
+        ctl = AdmissionController(max_in_flight=2, max_queued=0, ewma_alpha=0.5)
+        ctl.release(ctl.acquire() - 1.0)
+        assert ctl.service_time == pytest.approx(1.0, abs=0.01)
+        ctl.release(ctl.acquire() - 3.0)
+        assert ctl.service_time == pytest.approx(2.0, abs=0.01)
+        assert ctl.estimated_wait(4) == pytest.approx(4.0, abs=0.05)
+
+
+class TestPredictAdmission:
+    """Test suite for admission control on /predict through the Flask app"""
+
+    @pytest.fixture
+    def predict_app(self, monkeypatch):
+        import predict_app
+
+        # Enough for /predict to reach request parsing; admission runs before the handler
+        for name in ("model", "vectorizer", "labels"):
+            monkeypatch.setattr(predict_app, name, object())
+        return predict_app
+
+    @pytest.mark.skipif("LOB_MAX_IN_FLIGHT" in os.environ, reason="admission configured by the environment")
+    def test_off_by_default(self):
+        import predict_app
+
+        assert predict_app.ADMISSION_MAX_IN_FLIGHT == 0
+        assert predict_app.admission is None
+
+    def test_overload_is_503_with_retry_after(self, predict_app, monkeypatch):
+        ctl = AdmissionController(max_in_flight=1, max_queued=0)
+        monkeypatch.setattr(predict_app, "admission", ctl)
+        token = ctl.acquire()
+        try:
+            resp = predict_app.app.test_client().post("/predict", json={"businessDescription": "sari-sari store"})
+        finally:
+            ctl.release(token)
+        assert resp.status_code == 503
+        assert int(resp.headers["Retry-After"]) >= 1
+        assert resp.get_json()["reason"] == "queue_full"
+        assert ctl.outcomes["queue_full"] == 1
+
+    def test_slot_is_released_after_the_request(self, predict_app, monkeypatch):
+        ctl = AdmissionController(max_in_flight=1, max_queued=0)
+        monkeypatch.setattr(predict_app, "admission", ctl)
+        client = predict_app.app.test_client()
+        # An invalid body is rejected by the handler after admission
+        assert client.post("/predict", json={}).status_code == 400
+        assert client.post("/predict", json={}).status_code == 400
+        assert ctl.in_flight == 0 and ctl.outcomes["accepted"] == 2
+
+    def test_admission_counters_never_decrease(self, predict_app, monkeypatch):
+        ctl = AdmissionController(max_in_flight=1, max_queued=0)
+        monkeypatch.setattr(predict_app, "admission", ctl)
+        parse = predict_app._parse_predict_request
+
+        def slow_parse(data, timer=None):
+            # The deadline passes after admission but before scoring
+            time.sleep(0.05)
+            return parse(data, timer)
+
+        monkeypatch.setattr(predict_app, "_parse_predict_request", slow_parse)
+        client = predict_app.app.test_client()
+
+        def scrape():
+            text = client.get("/metrics").get_data(as_text=True)
+            return {outcome: float(value) for outcome, value in
+                    re.findall(r'^lob_predict_admission_total\{outcome="(\w+)"\} (\S+)$', text, re.M)}
+
+        client.post("/predict", json={})
+        before = scrape()
+        resp = client.post("/predict", json={"businessDescription": "sari-sari store selling softdrinks"},
+                           headers={predict_app.DEADLINE_HEADER: "10"})
+        after = scrape()
+        assert resp.status_code == 503
+        assert resp.get_json()["reason"] == "deadline_expired"
+        assert set(before) == set(after)
+        assert all(after[outcome] >= before[outcome] for outcome in before)
+        assert after["accepted"] == before["accepted"] + 1
+        assert after["expired_after_admission"] == before["expired_after_admission"] + 1
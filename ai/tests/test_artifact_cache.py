@@ -0,0 +1,98 @@
+"""
+Tests for the build-time artifact cache (lob_artifact_cache.py)
+
+Tests cover:
+- The inputs key is stable, and changes with dataset contents and training options
+- The key changes with the TF-IDF feature dtype (LOB_FEATURE_DTYPE)
+- The hashed training code is train_lob_model.py and every ai/scripts module it imports
+- Storing a published bundle under its key and installing it as the current version
+"""
+
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'service'))
+
+import lob_artifact_cache
+import model_registry
+
+
+@pytest.fixture
+def inputs(tmp_path, monkeypatch):
+    dataset = tmp_path / "dataset.json"
+    dataset.write_text(json.dumps([{"businessDescription": "tindahan", "recommendations": []}]))
+    taxonomy = tmp_path / "taxonomy.json"
+    taxonomy.write_text("[]")
+    monkeypatch.setattr(lob_artifact_cache, "TAXONOMY_PATH", str(taxonomy))
+    monkeypatch.setattr(lob_artifact_cache, "LOW_RECALL_DATASET_GLOB", str(tmp_path / "generated_batch_*_low_recall.json"))
+    monkeypatch.setattr(lob_artifact_cache, "REALWORLD_HOLDOUT_DATASET", str(tmp_path / "holdout.json"))
+    return dataset
+
+
+class TestArtifactCache:
+    """Test suite for the artifact cache"""
+
+    def test_key_tracks_contents_and_options(self, tmp_path, inputs):
+        key, manifest = lob_artifact_cache.inputs_manifest(str(inputs))
+        assert lob_artifact_cache.inputs_manifest(str(inputs))[0] == key
+        assert set(manifest["inputs"]) >= {"dataset", "taxonomy", "scripts/train_lob_model.py"}
+        assert "scikit-learn" in manifest["libraries"]
+
+        # Same contents under another path: same key
+        copy = tmp_path / "copy.json"
+        copy.write_bytes(inputs.read_bytes())
+        assert lob_artifact_cache.inputs_manifest(str(copy))[0] == key
+
+        assert lob_artifact_cache.inputs_manifest(str(inputs), skip_tune=True)[0] != key
+        (tmp_path / "generated_batch_7_low_recall.json").write_text("[]")
+        assert lob_artifact_cache.inputs_manifest(str(inputs))[0] != key
+
+    def test_key_tracks_feature_dtype(self, inputs, monkeypatch):
+        import numpy as np
+        import train_lob_model
+
+        key, manifest = lob_artifact_cache.inputs_manifest(str(inputs))
+        assert manifest["options"]["feature_dtype"] == str(train_lob_model.FEATURE_DTYPE)
+        other = "float64" if train_lob_model.FEATURE_DTYPE == np.float32 else "float32"
+        monkeypatch.setattr(train_lob_model, "FEATURE_DTYPE", np.dtype(other))
+        other_key, other_manifest = lob_artifact_cache.inputs_manifest(str(inputs))
+        assert other_key != key and other_manifest["options"]["feature_dtype"] == other
+
+    def test_training_code_follows_imports(self, tmp_path, monkeypatch):
+        assert {"train_lob_model.py", "lob_text.py", "lob_cascade.py", "lob_near_dup.py", "model_registry.py",
+                "resource_governor.py"} <= set(lob_artifact_cache.training_code())
+
+        (tmp_path / "train_lob_model.py").write_text("import os\nimport helper\n")
+        (tmp_path / "helper.py").write_text("def f():\n    from nested import g\n")
+        (tmp_path / "nested.py").write_text("from train_lob_model import x\n")
+        (tmp_path / "unused.py").write_text("")
+        monkeypatch.setattr(lob_artifact_cache, "SCRIPT_DIR", str(tmp_path))
+        lob_artifact_cache.training_code.cache_clear()
+        try:
+            assert lob_artifact_cache.training_code() == ("helper.py", "nested.py", "train_lob_model.py")
+        finally:
+            lob_artifact_cache.training_code.cache_clear()
+
+    def test_store_and_install(self, tmp_path, inputs, write_bundle):
+        models_dir = tmp_path / "models"
+        cache_dir = str(tmp_path / "cache")
+        key, manifest = lob_artifact_cache.inputs_manifest(str(inputs))
+        assert lob_artifact_cache.cached_bundle_dir(key, cache_dir) is None
+        assert lob_artifact_cache.install(key, str(models_dir), cache_dir) is None
+
+        built = write_bundle(models_dir)
+        entry = lob_artifact_cache.store(model_registry.version_dir(built, str(models_dir)), key, manifest, cache_dir)
+        assert lob_artifact_cache.cached_bundle_dir(key, cache_dir) == entry
+        with open(os.path.join(entry, lob_artifact_cache.MANIFEST_FILENAME), encoding="utf-8") as f:
+            assert json.load(f)["key"] == key
+
+        version = lob_artifact_cache.install(key, str(models_dir), cache_dir)
+        assert version != built
+        assert model_registry.current_version(str(models_dir)) == version
+        installed = model_registry.version_dir(version, str(models_dir))
+        assert not os.path.exists(os.path.join(installed, lob_artifact_cache.MANIFEST_FILENAME))
+        assert sorted(os.listdir(installed)) == sorted(os.listdir(model_registry.version_dir(built, str(models_dir))))
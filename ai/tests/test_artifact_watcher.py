@@ -0,0 +1,103 @@
+"""
+Tests for hot reloading of model artifacts (artifact_watcher.py and
+predict_app.reload_model_if_changed)
+
+Tests cover:
+- Change detection waits for a stable signature before firing
+- A newly promoted version is loaded, warmed and swapped in
+- A bundle that fails verification leaves the old model serving
+"""
+
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'service'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+
+from artifact_watcher import ArtifactWatcher
+
+
+class TestArtifactWatcher:
+    """Test suite for ArtifactWatcher polling"""
+
+    def test_fires_once_after_change_settles(self, tmp_path):
+        target = tmp_path / "lob_artifact_checksums.json"
+        target.write_text("{}")
+        calls = []
+        watcher = ArtifactWatcher(lambda: [str(target), str(tmp_path / "missing")], lambda: calls.append(1))
+        watcher.start()
+        watcher.stop()
+
+        assert not watcher.poll()
+        target.write_text('{"lob_model.joblib": "abc"}')
+        assert not watcher.poll()  # first sighting: wait for it to settle
+        assert watcher.poll()
+        assert not watcher.poll()
+        assert calls == [1]
+
+        (tmp_path / "missing").write_text("x")
+        assert not watcher.poll()
+        assert watcher.poll()
+        assert calls == [1, 1]
+
+    def test_on_change_errors_do_not_stop_polling(self, tmp_path):
+        target = tmp_path / "CURRENT.json"
+
+        def boom():
+            raise RuntimeError("reload failed")
+
+        watcher = ArtifactWatcher(lambda: [str(target)], boom)
+        watcher.start()
+        watcher.stop()
+        target.write_text("{}")
+        watcher.poll()
+        assert watcher.poll()
+
+
+class TestHotReload:
+    """reload_model_if_changed against an on-disk registry"""
+
+    @pytest.fixture
+    def app(self, tmp_path, monkeypatch):
+        import predict_app
+
+        monkeypatch.setattr(predict_app, "MODELS_DIR", str(tmp_path))
+        monkeypatch.setattr(predict_app, "_label_to_taxonomy_cache", {})
+        for name in ("model", "vectorizer", "featurizer", "labels", "fragments", "training_meta", "cascade",
+                     "current_bundle", "previous_bundle"):
+            monkeypatch.setattr(predict_app, name, None)
+        return predict_app
+
+    def test_reloads_new_version_and_keeps_old_on_bad_checksum(self, tmp_path, app, write_bundle):
+        import model_registry
+
+        v1 = write_bundle(tmp_path, C=1.0)
+        model_registry.promote(v1, str(tmp_path))
+        assert app.load_model()
+        assert app.reload_model_if_changed() == "unchanged"
+
+        v2 = write_bundle(tmp_path, C=0.01)
+        model_registry.promote(v2, str(tmp_path))
+        assert app.reload_model_if_changed() == "reloaded"
+        assert app.current_bundle.version == v2
+        serving = app.model
+
+        v3 = write_bundle(tmp_path, C=0.5)
+        checksums_path = os.path.join(model_registry.version_dir(v3, str(tmp_path)), model_registry.CHECKSUMS_FILENAME)
+        with open(checksums_path, "r", encoding="utf-8") as f:
+            checksums = json.load(f)
+        checksums["lob_model.joblib"] = "0" * 64
+        with open(checksums_path, "w", encoding="utf-8") as f:
+            json.dump(checksums, f)
+        model_registry.promote(v3, str(tmp_path))
+        assert app.reload_model_if_changed() == "failed"
+        assert app.current_bundle.version == v2
+        assert app.model is serving
+
+        c = app.app.test_client()
+        resp = c.post("/predict", json={"businessDescription": "Laundry shop labahan", "minConfidence": 0})
+        assert resp.status_code == 200
+        assert 'lob_model_reloads_total{outcome="failed"} 1' in c.get("/metrics").get_data(as_text=True)
@@ -0,0 +1,47 @@
+"""
+Tests for noisy augmentation (train_lob_model.augment_rows)
+
+Tests cover:
+- Output is identical for any worker count, and repeatable for a seed
+- A row's variant does not depend on the other rows in the dataset
+- Multiple noise profiles per row
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+
+from train_lob_model import NOISE_PROFILES, augment_rows, flatten_dataset, row_seed
+
+@pytest.fixture(scope="module")
+def rows(corpus_entries):
+    return flatten_dataset(corpus_entries)
+
+
+class TestAugmentRows:
+    """Test suite for deterministic, parallel augmentation"""
+
+    def test_output_is_independent_of_workers(self, rows):
+        profiles = tuple(NOISE_PROFILES)
+        serial = augment_rows(rows * 3, per_label_limit=20, seed=7, profiles=profiles)
+        assert serial == augment_rows(rows * 3, per_label_limit=20, seed=7, profiles=profiles)
+        assert serial == augment_rows(rows * 3, per_label_limit=20, seed=7, profiles=profiles, workers=2,
+                                      min_parallel_tasks=0)
+        assert serial != augment_rows(rows * 3, per_label_limit=20, seed=8, profiles=profiles)
+
+    def test_variants_do_not_depend_on_other_labels(self, rows):
+        laundry = [r for r in rows if r["label"] == "SVC|Laundry services"]
+        alone = augment_rows(laundry, seed=3, profiles=("filler",))
+        mixed = augment_rows(rows, seed=3, profiles=("filler",))
+        assert [r for r in mixed if r["label"] == "SVC|Laundry services"] == alone
+        assert row_seed(3, "SVC|Laundry services", 0) != row_seed(3, "SVC|Laundry services", 1)
+
+    def test_multiple_profiles_per_row(self, rows):
+        n_labels = len({r["label"] for r in rows})
+        out = augment_rows(rows, per_label_limit=2, seed=1, profiles=("filler", "heavy_typo"))
+        # "filler" always appends a suffix, so each sampled row yields at least that variant
+        assert 2 * n_labels <= len(out) <= 4 * n_labels
+        assert all(r["text"] not in {row["text"] for row in rows} for r in out)
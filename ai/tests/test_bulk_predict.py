@@ -0,0 +1,117 @@
+"""
+Tests for the streaming bulk prediction endpoint (/predict/bulk)
+
+Tests cover:
+- Per-line results match /predict for the same description and params
+- Invalid lines are reported in order without aborting the stream, oversized lines included
+- Gzip request and response bodies
+- Admin token and default-parameter validation
+"""
+
+import gzip
+import json
+import os
+import sys
+
+import pytest
+from sklearn.linear_model import LogisticRegression
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'service'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+
+import predict_app
+from train_lob_model import build_vectorizer, normalize_text
+
+
+
+@pytest.fixture
+def client(monkeypatch, corpus, admin_token):
+    texts = [normalize_text(t) for t, _ in corpus]
+    y = [label for _, label in corpus]
+    vec = build_vectorizer().fit(texts)
+    clf = LogisticRegression(max_iter=1000).fit(vec.transform(texts), y)
+    taxonomy = {
+        label: {"taxCode": label.split("|")[0], "lineOfBusiness": "test", "detailedLine": label.split("|")[1], "psicCode": ""}
+        for label in set(y)
+    }
+    monkeypatch.setattr(predict_app, "vectorizer", vec)
+    monkeypatch.setattr(predict_app, "featurizer", vec)
+    monkeypatch.setattr(predict_app, "model", clf)
+    monkeypatch.setattr(predict_app, "labels", [str(c) for c in clf.classes_])
+    monkeypatch.setattr(predict_app, "cascade", None)
+    monkeypatch.setattr(predict_app, "_label_to_taxonomy_cache", taxonomy)
+    monkeypatch.setattr(
+        predict_app, "fragments", predict_app.RecommendationFragments([str(c) for c in clf.classes_], taxonomy)
+    )
+    monkeypatch.setattr(predict_app, "BULK_BATCH_SIZE", 2)
+    return predict_app.app.test_client()
+
+
+def _ndjson(rows):
+    return ("\n".join(json.dumps(r) for r in rows) + "\n").encode("utf-8")
+
+
+class TestBulkPredict:
+    """Test suite for /predict/bulk"""
+
+    ROWS = [
+        {"id": "a", "businessDescription": "Tindahan ng softdrinks at de-lata"},
+        {"id": "b", "businessDescription": "short"},
+        {"id": "c", "businessDescription": "Labahan at plantsa sa laundry shop", "topK": 1},
+        {"businessDescription": "Bakery with pandesal and ensaymada", "minConfidence": 0.01},
+    ]
+
+    def test_matches_single_predict(self, client, admin_token):
+        resp = client.post("/predict/bulk?minConfidence=0.2", data=_ndjson(self.ROWS), headers={"X-LOB-Admin-Token": admin_token})
+        assert resp.status_code == 200
+        assert resp.content_type.startswith("application/x-ndjson")
+        out = [json.loads(line) for line in resp.get_data(as_text=True).splitlines()]
+
+        assert [o["line"] for o in out] == [1, 2, 3, 4]
+        assert out[0]["id"] == "a" and "id" not in out[3]
+        assert "error" in out[1]
+        for row, result in zip(self.ROWS, out):
+            if "error" in result:
+                continue
+            body = dict({"minConfidence": 0.2}, **{k: v for k, v in row.items() if k != "id"})
+            expected = client.post("/predict", json=body).get_json()
+            assert {k: v for k, v in result.items() if k not in ("line", "id")} == expected
+
+    def test_invalid_lines_do_not_abort(self, client, admin_token):
+        body = b"not json\n\n[1, 2]\n" + _ndjson(self.ROWS[:1])
+        resp = client.post("/predict/bulk", data=body, headers={"X-LOB-Admin-Token": admin_token})
+        out = [json.loads(line) for line in resp.get_data(as_text=True).splitlines()]
+        assert [o["line"] for o in out] == [1, 3, 4]
+        assert out[0]["error"] == "line is not valid JSON"
+        assert out[1]["error"] == "businessDescription is required"
+        assert "recommendations" in out[2]
+
+    @pytest.mark.parametrize("chunk_bytes", [None, 1000])
+    def test_oversized_line_does_not_abort(self, client, admin_token, monkeypatch, chunk_bytes):
+        if chunk_bytes:
+            # The oversized line then arrives over many reads and is skipped up to its newline
+            monkeypatch.setattr(predict_app, "BULK_READ_CHUNK_BYTES", chunk_bytes)
+        oversized = {"businessDescription": "sari-sari store " * (predict_app.MAX_BULK_LINE_BYTES // 16)}
+        body = _ndjson([self.ROWS[0], oversized, self.ROWS[2]])
+        resp = client.post("/predict/bulk", data=body, headers={"X-LOB-Admin-Token": admin_token})
+        out = [json.loads(line) for line in resp.get_data(as_text=True).splitlines()]
+        assert [o["line"] for o in out] == [1, 2, 3]
+        assert out[1]["error"] == f"line exceeds {predict_app.MAX_BULK_LINE_BYTES} bytes"
+        assert out[2]["id"] == "c" and "recommendations" in out[2]
+
+    def test_gzip_in_and_out(self, client, admin_token):
+        plain = client.post("/predict/bulk", data=_ndjson(self.ROWS), headers={"X-LOB-Admin-Token": admin_token})
+        resp = client.post(
+            "/predict/bulk",
+            data=gzip.compress(_ndjson(self.ROWS)),
+            headers={"X-LOB-Admin-Token": admin_token, "Content-Encoding": "gzip", "Accept-Encoding": "gzip"},
+        )
+        assert resp.headers["Content-Encoding"] == "gzip"
+        assert gzip.decompress(resp.get_data()) == plain.get_data()
+
+    def test_requires_admin_token(self, client):
+        assert client.post("/predict/bulk", data=_ndjson(self.ROWS)).status_code == 401
+
+    def test_invalid_default_params_rejected(self, client, admin_token):
+        resp = client.post("/predict/bulk?topK=0", data=_ndjson(self.ROWS), headers={"X-LOB-Admin-Token": admin_token})
+        assert resp.status_code == 400
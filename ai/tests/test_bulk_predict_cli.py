@@ -0,0 +1,97 @@
+"""
+Tests for the offline bulk prediction CLI (bulk_predict_lob.py)
+
+Tests cover:
+- JSON, JSONL and CSV input parsing
+- Output in input order, identical for 1 and N workers
+- Per-row validation errors and noConfidentMatch rows
+- Artifacts that fail checksum verification are never unpickled
+- The CLI (and so each pool worker) does not import the training stack
+"""
+
+import io
+import json
+import os
+import subprocess
+import sys
+
+import joblib
+import pytest
+from sklearn.linear_model import LogisticRegression
+
+SCRIPTS_DIR = os.path.join(os.path.dirname(__file__), '..', 'scripts')
+sys.path.insert(0, SCRIPTS_DIR)
+
+import model_registry
+from bulk_predict_lob import load_rows, run
+from train_lob_model import build_vectorizer, normalize_text
+
+
+TAXONOMY = [
+    {"taxCode": "RET", "lineOfBusiness": "retail", "detailedLines": ["Sari-sari store"], "psicCodes": ["4711"]},
+    {"taxCode": "SVC", "lineOfBusiness": "services", "detailedLines": ["Laundry services"], "psicCodes": ["9601"]},
+    {"taxCode": "FDS", "lineOfBusiness": "food", "detailedLines": ["Bakery / pastry shop"], "psicCodes": ["1071"]},
+]
+
+
+@pytest.fixture
+def init_args(tmp_path, corpus):
+    texts = [normalize_text(t) for t, _ in corpus]
+    y = [label for _, label in corpus]
+    vec = build_vectorizer().fit(texts)
+    clf = LogisticRegression(max_iter=1000).fit(vec.transform(texts), y)
+    joblib.dump(vec, tmp_path / "lob_vectorizer.joblib")
+    joblib.dump(clf, tmp_path / "lob_model.joblib")
+    (tmp_path / "lob_labels.json").write_text(json.dumps([str(c) for c in clf.classes_]))
+    checksums = {name: model_registry.file_sha256(str(tmp_path / name))
+                 for name in ("lob_vectorizer.joblib", "lob_model.joblib", "lob_labels.json")}
+    (tmp_path / model_registry.CHECKSUMS_FILENAME).write_text(json.dumps(checksums))
+    taxonomy_path = tmp_path / "line_of_business.json"
+    taxonomy_path.write_text(json.dumps(TAXONOMY))
+    return (str(tmp_path), str(taxonomy_path), 2, 0.01, 0.5)
+
+
+class TestBulkPredictCli:
+    """Test suite for offline bulk prediction"""
+
+    def test_load_rows_formats(self, tmp_path):
+        (tmp_path / "a.json").write_text(json.dumps([{"id": 1, "businessDescription": "x"}, "plain text"]))
+        (tmp_path / "a.jsonl").write_text('{"id": 1, "businessDescription": "x"}\n\n{"businessDescription": "y"}\n')
+        (tmp_path / "a.csv").write_text("id,businessDescription\n1,x\n2,\"y, z\"\n")
+        assert load_rows(str(tmp_path / "a.json")) == [(1, "x"), (None, "plain text")]
+        assert load_rows(str(tmp_path / "a.jsonl")) == [(1, "x"), (None, "y")]
+        assert load_rows(str(tmp_path / "a.csv")) == [("1", "x"), ("2", "y, z")]
+
+    def test_order_is_stable_across_workers(self, init_args, corpus):
+        rows = [(i, text if i % 5 else "short") for i, (text, _) in enumerate(corpus * 4)]
+        outputs = []
+        for workers in (1, 2):
+            out = io.StringIO()
+            run(rows, workers, 3, init_args, out)
+            outputs.append(out.getvalue())
+        assert outputs[0] == outputs[1]
+
+        results = [json.loads(line) for line in outputs[0].splitlines()]
+        assert [r["row"] for r in results] == list(range(len(rows)))
+        assert [r["id"] for r in results] == [i for i, _ in rows]
+        assert "error" in results[0]
+        for r in results[1:4]:
+            assert r.get("noConfidentMatch") or r["recommendations"][0]["confidence"] >= 0.5
+
+    def test_tampered_artifact_is_not_loaded(self, init_args, corpus, monkeypatch):
+        import bulk_predict_lob
+
+        with open(os.path.join(init_args[0], "lob_model.joblib"), "ab") as f:
+            f.write(b"tampered")
+        monkeypatch.setattr(joblib, "load", lambda *a, **k: pytest.fail("unverified artifact was unpickled"))
+        with pytest.raises(model_registry.RegistryError):
+            run([(0, corpus[0][0])], 1, 1, init_args, io.StringIO())
+
+        monkeypatch.setattr(sys, "argv", ["bulk_predict_lob.py", os.path.join(init_args[0], "lob_labels.json"),
+                                          "--models-dir", init_args[0]])
+        assert bulk_predict_lob.main() == 1
+
+    def test_import_does_not_load_training_stack(self):
+        code = "import sys; import bulk_predict_lob; print('train_lob_model' in sys.modules)"
+        out = subprocess.run([sys.executable, "-c", code], cwd=SCRIPTS_DIR, capture_output=True, text=True, check=True)
+        assert out.stdout.strip() == "False"
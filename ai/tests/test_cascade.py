@@ -0,0 +1,180 @@
+"""
+Tests for the confidence cascade (lob_cascade.py) and its use in training and serving
+
+Tests cover:
+- Threshold tuning: lowest threshold with precision parity, coverage floor, no-parity result
+- CascadeClassifier routing between the first stage and the full model, and its counters
+- Out-of-fold predictions of the served (tuned, calibrated) model used for tuning
+- The service falls back to the full model when the first stage is missing or corrupt
+"""
+
+import json
+import os
+import sys
+
+import joblib
+import numpy as np
+import pytest
+from sklearn.linear_model import LogisticRegression
+from sklearn.model_selection import StratifiedKFold
+from sklearn.naive_bayes import ComplementNB
+from sklearn.svm import LinearSVC
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'service'))
+
+import model_registry
+from lob_cascade import MIN_CASCADE_COVERAGE, STAGE1_FILENAME, CascadeClassifier, tune_cascade_threshold
+from train_lob_model import build_vectorizer, calibrate_linear_svc, served_oof_predictions
+
+
+@pytest.fixture(scope="module")
+def fitted(corpus):
+    texts = [text for text, _ in corpus]
+    vec = build_vectorizer().fit(texts)
+    X = vec.transform(texts)
+    y = np.array([label for _, label in corpus])
+    return vec, X, y, ComplementNB().fit(X, y), LogisticRegression(max_iter=1000).fit(X, y)
+
+
+class TestTuneCascadeThreshold:
+    """Test suite for tune_cascade_threshold"""
+
+    CLASSES = np.array(["a", "b"])
+
+    def test_lowest_threshold_with_parity(self):
+        # Rows sorted by first-stage confidence; the first stage is wrong on the two least confident
+        conf = np.array([0.55, 0.6, 0.7, 0.8, 0.9, 0.95])
+        proba = np.column_stack([conf, 1 - conf])
+        y = np.array(["b", "b", "a", "a", "a", "a"])
+        full_pred = y.copy()
+        result = tune_cascade_threshold(proba, self.CLASSES, full_pred, y)
+        # Candidates are quantiles of the confidences: any threshold in (0.6, 0.7] keeps the same rows
+        assert 0.6 < result["threshold"] <= 0.7
+        assert result["coverage"] == pytest.approx(4 / 6)
+        assert result["stage1_precision"] == result["full_precision_on_kept"] == 1.0
+
+    def test_parity_is_against_the_full_model_on_kept_rows(self):
+        conf = np.array([0.55, 0.6, 0.7, 0.8])
+        proba = np.column_stack([conf, 1 - conf])
+        y = np.array(["b", "a", "a", "a"])
+        # The full model is also wrong on the least confident row, so keeping every row is parity
+        full_pred = np.array(["a", "a", "a", "a"])
+        assert tune_cascade_threshold(proba, self.CLASSES, full_pred, y)["coverage"] == 1.0
+        # Tolerance trades first-stage precision for coverage
+        assert tune_cascade_threshold(proba, self.CLASSES, y, y)["coverage"] == 0.75
+        assert tune_cascade_threshold(proba, self.CLASSES, y, y, tolerance=0.25)["coverage"] == 1.0
+
+    def test_no_parity(self):
+        proba = np.column_stack([np.full(200, 0.9), np.full(200, 0.1)])
+        y = np.array(["b"] * 200)
+        result = tune_cascade_threshold(proba, self.CLASSES, y, y)
+        assert result["threshold"] is None and result["rows"] == 200
+
+    def test_coverage_floor(self):
+        # Only the single most confident row out of 200 is right: below MIN_CASCADE_COVERAGE
+        conf = np.linspace(0.5, 0.99, 200)
+        proba = np.column_stack([conf, 1 - conf])
+        y = np.array(["b"] * 199 + ["a"])
+        assert 1 / 200 < MIN_CASCADE_COVERAGE
+        assert tune_cascade_threshold(proba, self.CLASSES, y, y)["threshold"] is None
+
+
+class TestCascadeClassifier:
+    """Test suite for CascadeClassifier routing"""
+
+    def test_stage1_proba_matches_complement_nb(self, fitted):
+        _, X, _, stage1, full = fitted
+        cascade = CascadeClassifier(stage1, full, 0.5)
+        np.testing.assert_allclose(cascade.stage1_proba(X), stage1.predict_proba(X), rtol=1e-10)
+
+    def test_routing_by_threshold(self, fitted):
+        _, X, _, stage1, full = fitted
+        stage1_conf = stage1.predict_proba(X).max(axis=1)
+        threshold = float(np.median(stage1_conf))
+        cascade = CascadeClassifier(stage1, full, threshold)
+        proba, stages = cascade.predict_proba_with_stage(X)
+        answered = stage1_conf >= threshold
+        assert (stages == np.where(answered, 1, 2)).all()
+        np.testing.assert_allclose(proba[answered], stage1.predict_proba(X[np.flatnonzero(answered)]), rtol=1e-10)
+        np.testing.assert_allclose(proba[~answered], full.predict_proba(X[np.flatnonzero(~answered)]))
+        assert cascade.stats() == {
+            "threshold": threshold,
+            "answered": int(answered.sum()),
+            "escalated": int((~answered).sum()),
+            "escalationRate": float((~answered).mean()),
+        }
+
+    def test_extreme_thresholds(self, fitted):
+        _, X, _, stage1, full = fitted
+        assert (CascadeClassifier(stage1, full, 0.0).predict_proba_with_stage(X)[1] == 1).all()
+        np.testing.assert_allclose(CascadeClassifier(stage1, full, 1.01).predict_proba(X), full.predict_proba(X))
+
+    def test_label_sets_must_match(self, fitted):
+        _, X, y, stage1, _ = fitted
+        other = LogisticRegression(max_iter=1000).fit(X[y != y[0]], y[y != y[0]])
+        with pytest.raises(ValueError):
+            CascadeClassifier(stage1, other, 0.5)
+
+
+class TestServedOutOfFold:
+    """Test suite for the full-model predictions the threshold is tuned against"""
+
+    def test_linear_svc_is_scored_calibrated(self, fitted):
+        _, X, y, _, _ = fitted
+        cv = StratifiedKFold(n_splits=2, shuffle=True, random_state=42)
+        pred = served_oof_predictions("LinearSVC", LinearSVC(C=0.5, dual=False), X, y, cv)
+        expected = np.empty(len(y), dtype=y.dtype)
+        for train_idx, test_idx in cv.split(X, y):
+            served = calibrate_linear_svc(LinearSVC(C=0.5, dual=False), X[train_idx], y[train_idx])
+            assert served.estimator.C == 0.5
+            expected[test_idx] = served.predict(X[test_idx])
+        assert (pred == expected).all()
+
+    def test_calibration_with_singleton_classes_is_prefit(self, fitted):
+        _, X, y, _, _ = fitted
+        keep = np.r_[0:8, 8]  # one bakery row
+        served = calibrate_linear_svc(LinearSVC(dual=False), X[keep], y[keep])
+        assert served.cv == "prefit"
+        assert set(served.predict(X)) <= set(y)
+
+
+class TestServingFallback:
+    """Test suite for predict_app._load_cascade"""
+
+    @pytest.fixture
+    def bundle_dir(self, tmp_path, fitted):
+        _, _, _, stage1, _ = fitted
+        joblib.dump(stage1, tmp_path / STAGE1_FILENAME)
+        checksums = {STAGE1_FILENAME: model_registry.file_sha256(str(tmp_path / STAGE1_FILENAME))}
+        (tmp_path / model_registry.CHECKSUMS_FILENAME).write_text(json.dumps(checksums))
+        return tmp_path
+
+    def test_cascade_is_built_from_the_saved_stage(self, bundle_dir, fitted):
+        import predict_app
+
+        _, X, _, stage1, full = fitted
+        cascade = predict_app._load_cascade(full, {"cascade": {"threshold": 0.6}}, str(bundle_dir))
+        assert isinstance(cascade, CascadeClassifier) and cascade.threshold == 0.6
+        np.testing.assert_allclose(cascade.stage1_proba(X), stage1.predict_proba(X), rtol=1e-10)
+
+    def test_falls_back_to_the_full_model(self, bundle_dir, fitted):
+        import predict_app
+
+        _, _, _, _, full = fitted
+        assert predict_app._load_cascade(full, {"cascade": {"threshold": None}}, str(bundle_dir)) is None
+        assert predict_app._load_cascade(full, None, str(bundle_dir)) is None
+
+        with open(bundle_dir / STAGE1_FILENAME, "ab") as f:
+            f.write(b"tampered")
+        assert predict_app._load_cascade(full, {"cascade": {"threshold": 0.6}}, str(bundle_dir)) is None
+
+        os.remove(bundle_dir / STAGE1_FILENAME)
+        assert predict_app._load_cascade(full, {"cascade": {"threshold": 0.6}}, str(bundle_dir)) is None
+
+    def test_mismatched_stages_fall_back(self, bundle_dir, fitted):
+        import predict_app
+
+        _, X, y, _, _ = fitted
+        other = LogisticRegression(max_iter=1000).fit(X[y != y[0]], y[y != y[0]])
+        assert predict_app._load_cascade(other, {"cascade": {"threshold": 0.6}}, str(bundle_dir)) is None
@@ -0,0 +1,62 @@
+"""
+Tests for streaming dataset generation (generate_balanced_bilingual_dataset.iter_dataset)
+
+Tests cover:
+- Exact per-language counts, unique descriptions and even label coverage
+- Every prefix of the stream is balanced across languages and labels
+- write_entries output parses back as NDJSON or a JSON array
+"""
+
+import json
+import os
+import sys
+from collections import Counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+
+from generate_balanced_bilingual_dataset import iter_dataset, load_labels, summarize, write_entries
+
+LABELS = load_labels()[:5]
+
+
+class TestIterDataset:
+    """Test suite for the bounded-memory generator"""
+
+    def test_counts_and_unique_descriptions(self):
+        # 500 per label per language exceeds the 384 distinct unsuffixed descriptions
+        entries = list(iter_dataset(LABELS, 2500))
+        summary = summarize(entries)
+        assert summary["byLanguage"] == {"english": 2500, "filipino": 2500}
+        assert summary["labelCount"] == len(LABELS)
+        assert summary["minRowsPerLabel"] == summary["maxRowsPerLabel"] == 1000
+        for language in ("english", "filipino"):
+            descriptions = [e["businessDescription"] for e in entries if e["language"] == language]
+            assert len(set(descriptions)) == len(descriptions)
+
+    def test_prefix_is_balanced(self):
+        prefix = list(iter_dataset(LABELS, 1000))[:len(LABELS) * 2 * 7]
+        assert Counter(e["language"] for e in prefix) == {"english": len(LABELS) * 7, "filipino": len(LABELS) * 7}
+        assert set(Counter(e["recommendations"][0]["detailedLine"] for e in prefix).values()) == {14}
+
+    def test_repeatable_for_a_seed(self):
+        assert list(iter_dataset(LABELS, 50, seed=7)) == list(iter_dataset(LABELS, 50, seed=7))
+        assert list(iter_dataset(LABELS, 50, seed=7)) != list(iter_dataset(LABELS, 50, seed=8))
+
+
+class TestWriteEntries:
+    """Test suite for incremental dataset output"""
+
+    def test_ndjson_and_json_round_trip(self, tmp_path):
+        expected = list(iter_dataset(LABELS, 12))
+        for name in ("out.jsonl", "out.json"):
+            path = str(tmp_path / name)
+            assert list(write_entries(iter(expected), path)) == expected
+            with open(path, encoding="utf-8") as f:
+                loaded = [json.loads(line) for line in f] if name.endswith(".jsonl") else json.load(f)
+            assert loaded == expected
+
+    def test_empty_json_array(self, tmp_path):
+        path = str(tmp_path / "empty.json")
+        assert list(write_entries([], path)) == []
+        with open(path, encoding="utf-8") as f:
+            assert json.load(f) == []
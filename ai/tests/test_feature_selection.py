@@ -0,0 +1,141 @@
+"""
+Tests for the training-time feature selection stage in train_lob_model.py
+
+Tests cover:
+- Shrunk vectorizer output matches sliced + renormalized full features
+- Budget search picks the smallest budget within the accuracy delta, and rejects
+  budgets that lose more than delta (then the full vocabulary is kept)
+- Features are ranked inside each CV fold on its training rows, not on held-out labels
+"""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+from sklearn.model_selection import StratifiedKFold
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+
+from train_lob_model import (
+    build_vectorizer,
+    normalize_text,
+    select_feature_budget,
+    shrink_vectorizer,
+    slice_feature_blocks,
+    _vectorizer_block_sizes,
+)
+
+
+TEXTS = [
+    "sari-sari store selling canned goods and softdrinks",
+    "maliit na tindahan ng bigas at de-lata",
+    "convenience store open 24 hours near terminal",
+    "carinderia selling lutong bahay ulam",
+    "small restaurant serving grilled chicken and pork",
+    "kainan na may ihaw at prito",
+    "hardware store selling cement and hollow blocks",
+    "construction supplies buhangin gravel semento",
+    "barber shop and gupit services",
+    "salon offering haircut and hair color",
+] * 3
+
+LABELS = [
+    "RET|Sari-sari store",
+    "RET|Sari-sari store",
+    "RET|Convenience store",
+    "FOD|Carinderia",
+    "FOD|Restaurant",
+    "FOD|Restaurant",
+    "RET|Hardware",
+    "RET|Hardware",
+    "SRV|Barber",
+    "SRV|Salon",
+] * 3
+
+
+class TestFeatureSelection:
+    """Test suite for chi2 feature budgets and vocabulary shrinking"""
+
+    @pytest.fixture
+    def fitted(self):
+        texts = [normalize_text(t) for t in TEXTS]
+        vectorizer = build_vectorizer()
+        X = vectorizer.fit_transform(texts)
+        return vectorizer, X, texts
+
+    def test_shrunk_vectorizer_matches_sliced_features(self, fitted):
+        vectorizer, X, texts = fitted
+        kept = np.arange(0, X.shape[1], 3)
+
+        shrunk = shrink_vectorizer(vectorizer, kept)
+        expected = slice_feature_blocks(X, kept, _vectorizer_block_sizes(vectorizer))
+        actual = shrunk.transform(texts)
+
+        assert actual.shape == (len(texts), len(kept))
+        assert np.allclose(actual.toarray(), expected.toarray())
+        assert sum(_vectorizer_block_sizes(shrunk)) == len(kept)
+
+    def test_budget_search_reports_each_budget(self, fitted):
+        vectorizer, X, texts = fitted
+        y = np.array(LABELS)
+        cv_mask = np.ones(len(y), dtype=bool)
+        cv = StratifiedKFold(n_splits=3, shuffle=True, random_state=42)
+
+        kept, report = select_feature_budget(
+            vectorizer, X, y, texts, cv_mask, cv, delta=1.0, fractions=(0.5, 0.25)
+        )
+
+        # delta=1.0 accepts the first (smallest) budget tried
+        assert kept is not None
+        assert len(report["tried"]) == 1
+        assert report["tried"][0]["fraction"] == 0.25
+        assert report["selected_n_features"] == len(kept)
+        for key in ("cv_accuracy", "predict_latency_ms", "artifact_bytes"):
+            assert key in report["full"]
+            assert key in report["tried"][0]
+
+    def test_budget_beyond_delta_is_rejected(self, fitted):
+        vectorizer, X, texts = fitted
+        y = np.array(LABELS)
+        cv_mask = np.ones(len(y), dtype=bool)
+        cv = StratifiedKFold(n_splits=3, shuffle=True, random_state=42)
+
+        # 10% of the features loses more than delta on this data; 20% does not
+        kept, report = select_feature_budget(
+            vectorizer, X, y, texts, cv_mask, cv, delta=0.05, fractions=(0.1, 0.2)
+        )
+        assert [t["within_budget"] for t in report["tried"]] == [False, True]
+        assert report["tried"][0]["cv_accuracy"] < report["full"]["cv_accuracy"] - 0.05
+        assert len(kept) == report["tried"][1]["n_features"] == report["selected_n_features"]
+
+        kept, report = select_feature_budget(
+            vectorizer, X, y, texts, cv_mask, cv, delta=0.05, fractions=(0.1,)
+        )
+        assert kept is None
+        assert report["selected_n_features"] == X.shape[1]
+
+    def test_features_are_ranked_on_fold_training_rows(self, fitted, monkeypatch):
+        import train_lob_model
+
+        vectorizer, X, texts = fitted
+        y = np.array(LABELS)
+        cv_mask = np.ones(len(y), dtype=bool)
+        cv_mask[:2] = False
+        cv = StratifiedKFold(n_splits=3, shuffle=True, random_state=42)
+        ranked_on = []
+        real_chi2 = train_lob_model.chi2
+
+        def recording_chi2(X_rank, y_rank):
+            ranked_on.append(X_rank.shape[0])
+            return real_chi2(X_rank, y_rank)
+
+        monkeypatch.setattr(train_lob_model, "chi2", recording_chi2)
+        # In-process folds, so the recording chi2 sees them
+        monkeypatch.setenv("LOB_TRAINING_WORKERS", "1")
+        select_feature_budget(vectorizer, X, y, texts, cv_mask, cv, delta=1.0, fractions=(0.25,))
+
+        fold_sizes = sorted(len(train) for train, _ in cv.split(X[cv_mask], y[cv_mask]))
+        # All rows once for the final selection, then each fold's training rows only
+        assert ranked_on[0] == len(y)
+        assert sorted(ranked_on[1:]) == fold_sizes
@@ -0,0 +1,284 @@
+"""
+Tests for incremental model updates (lob_incremental.py) and POST /admin/models/update
+
+Tests cover:
+- New rows are folded into a copy of the base model and published as a new version
+- Lineage in training_meta.json (base version, updates since the last full train); the base
+  run's fields move under baseTraining and its inputsKey is dropped
+- Labels the base model does not know are rejected
+- Updates do not lose accuracy on a fixed test split: LogisticRegression is refitted on the
+  base rows plus the new ones (warm-started), LinearSVC gets SGD plus refitted calibrators
+- The base rows default to the service's dataset only if the base was trained on it
+- Appending a class leaves the existing classes' scores and predictions unchanged, for
+  cross-validated and prefit calibration; the new scorer reuses the model's parameters
+- Appended classes' negatives default to the service's dataset only if the base was trained on it
+- The admin endpoint only publishes the updated version, and serves it with "promote": true
+"""
+
+import collections
+import json
+import os
+import random
+import sys
+
+import joblib
+import numpy as np
+import pytest
+from sklearn.calibration import CalibratedClassifierCV
+from sklearn.linear_model import LogisticRegression
+from sklearn.svm import LinearSVC
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'service'))
+
+import lob_incremental
+import model_registry
+from train_lob_model import build_vectorizer, dedupe_rows, flatten_dataset, load_bundle, publish_bundle
+
+DATASET = os.path.join(os.path.dirname(__file__), '..', 'datasets', 'lob_recommendation_dataset.json')
+NEW_ENTRIES = [
+    {"businessDescription": "Tindahan ng bigas at delata sa kanto", "recommendations": [{"taxCode": "RET", "detailedLine": "Sari-sari store"}]},
+    {"businessDescription": "Labahan ng kumot at kurtina", "recommendations": [{"taxCode": "SVC", "detailedLine": "Laundry services"}]},
+]
+
+
+def _entries(label, descriptions):
+    tax, line = label.split("|")
+    return [{"businessDescription": d, "recommendations": [{"taxCode": tax, "detailedLine": line}]} for d in descriptions]
+
+
+PARKING = _entries("TRN|Parking lot operation", ["pay parking lot for cars", "paradahan ng sasakyan bayad kada oras",
+                                                 "parking area for motorcycles and cars", "covered parking lot operator"])
+
+
+def _calibrated_bundle(models_dir, entries, prefit=False, **meta):
+    rows = flatten_dataset(entries)
+    texts, y = [r["text"] for r in rows], [r["label"] for r in rows]
+    vec = build_vectorizer().fit(texts)
+    X = vec.transform(texts)
+    if prefit:
+        model = CalibratedClassifierCV(LinearSVC(C=0.3, dual=False).fit(X, y), cv="prefit").fit(X, y)
+    else:
+        model = CalibratedClassifierCV(LinearSVC(dual=False, class_weight="balanced"), cv=2).fit(X, y)
+    meta = dict(meta, algorithm="LinearSVC", n_train_samples=len(rows))
+    return publish_bundle(vec, model, sorted(set(y)), meta, models_dir=str(models_dir))
+
+
+def _meta(models_dir, version):
+    with open(os.path.join(model_registry.version_dir(version, str(models_dir)), model_registry.META_FILENAME), encoding="utf-8") as f:
+        return json.load(f)
+
+
+class TestIncrementalUpdate:
+    """Test suite for lob_incremental"""
+
+    def test_update_publishes_new_version(self, tmp_path, write_bundle, corpus_entries):
+        base = write_bundle(tmp_path)
+        model_registry.promote(base, str(tmp_path))
+        base_path = os.path.join(model_registry.version_dir(base, str(tmp_path)), "lob_model.joblib")
+        base_coef = joblib.load(base_path).coef_.copy()
+
+        version, summary = lob_incremental.incremental_update(NEW_ENTRIES, models_dir=str(tmp_path),
+                                                              base_entries=corpus_entries)
+        assert model_registry.current_version(str(tmp_path)) == version != base
+        assert summary["rows"] == 2 and summary["baseRows"] == 12 and summary["baseVersion"] == base
+        meta = _meta(tmp_path, version)
+        assert meta["incremental"]["updatesSinceFullTrain"] == 1
+        assert meta["algorithm"] == "LogisticRegression"
+
+        updated = joblib.load(os.path.join(model_registry.version_dir(version, str(tmp_path)), "lob_model.joblib"))
+        assert not np.allclose(updated.coef_, base_coef)
+        # The base version is left as it was
+        assert np.array_equal(joblib.load(base_path).coef_, base_coef)
+
+        again, _ = lob_incremental.incremental_update(NEW_ENTRIES, models_dir=str(tmp_path),
+                                                      base_entries=corpus_entries + NEW_ENTRIES)
+        assert _meta(tmp_path, again)["incremental"]["updatesSinceFullTrain"] == 2
+        assert _meta(tmp_path, again)["incremental"]["lastFullTrainVersion"] == base
+
+    def test_base_training_fields_are_not_carried_over(self):
+        base_meta = {"algorithm": "LinearSVC", "n_train_samples": 10, "cv_accuracy": 0.9, "inputsKey": "abc",
+                     "tuning": {"best_params": {"C": 0.5}}, "feature_selection": {"kept": 100},
+                     "resourceBudgets": {"cpuCount": 64}}
+        meta = lob_incremental.derived_meta(base_meta, n_train_samples=12)
+        assert "inputsKey" not in meta and "cv_accuracy" not in meta and "tuning" not in meta
+        assert "feature_selection" not in meta
+        assert meta["baseTraining"]["tuning"] == {"best_params": {"C": 0.5}}
+        assert meta["baseTraining"]["resourceBudgets"] == {"cpuCount": 64}
+        assert meta["resourceBudgets"]["cpuCount"] == os.cpu_count()
+        assert meta["n_train_samples"] == 12 and meta["algorithm"] == "LinearSVC"
+        # A later update keeps the last full train's fields
+        again = lob_incremental.derived_meta(dict(meta, cv_accuracy=0.1), n_train_samples=14)
+        assert again["baseTraining"] == meta["baseTraining"]
+
+    def test_base_rows_default_to_the_training_dataset(self, tmp_path, monkeypatch, corpus_entries):
+        dataset = tmp_path / "dataset.json"
+        dataset.write_text(json.dumps(corpus_entries))
+        monkeypatch.setattr(lob_incremental, "STARTUP_DATASET", str(dataset))
+        base = _calibrated_bundle(tmp_path, corpus_entries)
+        with pytest.raises(lob_incremental.IncrementalUpdateError, match="trained on"):
+            lob_incremental.incremental_update(NEW_ENTRIES, base, promote=False, models_dir=str(tmp_path))
+
+        base = _calibrated_bundle(tmp_path, corpus_entries, datasetSha256=model_registry.file_sha256(str(dataset)))
+        _, summary = lob_incremental.incremental_update(NEW_ENTRIES, base, promote=False, models_dir=str(tmp_path))
+        assert summary["baseRows"] == len(corpus_entries)
+
+    def test_unknown_labels_are_rejected(self, tmp_path, write_bundle):
+        base = write_bundle(tmp_path)
+        entry = {"businessDescription": "Computer repair and printing", "recommendations": [{"taxCode": "SVC", "detailedLine": "Computer shop"}]}
+        with pytest.raises(lob_incremental.IncrementalUpdateError, match="appendClasses"):
+            lob_incremental.incremental_update([entry], base, models_dir=str(tmp_path))
+        with pytest.raises(lob_incremental.IncrementalUpdateError):
+            lob_incremental.incremental_update([], base, models_dir=str(tmp_path))
+
+
+class TestUpdateAccuracy:
+    """Updated models must not lose accuracy on a fixed test split"""
+
+    @pytest.fixture(scope="class")
+    def split(self):
+        """(base, new, test) entries of the dataset's 20 most common labels, seeded."""
+        with open(DATASET, "r", encoding="utf-8") as f:
+            entries = json.load(f)
+        label = lambda e: flatten_dataset([e])[0]["label"]
+        common = {lbl for lbl, _ in collections.Counter(map(label, entries)).most_common(20)}
+        entries = [e for e in entries if label(e) in common]
+        random.Random(1).shuffle(entries)
+        n_test, n_new = len(entries) // 4, len(entries) // 5
+        return entries[n_test + n_new:], entries[n_test:n_test + n_new], entries[:n_test]
+
+    @pytest.mark.parametrize("algorithm", ["LogisticRegression", "LinearSVC"])
+    def test_update_does_not_lose_accuracy(self, split, algorithm):
+        base_entries, new_entries, test_entries = split
+        rows, test_rows = dedupe_rows(flatten_dataset(base_entries)), flatten_dataset(test_entries)
+        vec = build_vectorizer().fit([r["text"] for r in rows])
+        X, y = vec.transform([r["text"] for r in rows]), [r["label"] for r in rows]
+        if algorithm == "LogisticRegression":
+            model = LogisticRegression(max_iter=3000, C=2.0, random_state=42, class_weight="balanced").fit(X, y)
+        else:
+            model = CalibratedClassifierCV(LinearSVC(dual=False, class_weight="balanced"), cv=3).fit(X, y)
+        bundle = {"vectorizer": vec, "model": model, "labels": sorted(set(y)), "stage1": None,
+                  "meta": {"algorithm": algorithm, "n_train_samples": len(rows)}}
+
+        updated, n_rows, n_base_rows = lob_incremental.update_bundle(bundle, new_entries, base_entries=base_entries)
+        assert n_rows > 0 and n_base_rows == len(rows)
+        X_test, y_test = vec.transform([r["text"] for r in test_rows]), np.array([r["label"] for r in test_rows])
+        base_accuracy = np.mean(model.predict(X_test) == y_test)
+        assert np.mean(updated["model"].predict(X_test) == y_test) >= base_accuracy
+        if algorithm == "LogisticRegression":
+            assert updated["model"].C == 2.0 and updated["model"].class_weight == "balanced"
+            assert updated["model"].warm_start is False
+        else:
+            # Calibrators were refitted, not carried over from the base model
+            slopes = lambda m: [c.a_ for cc in m.calibrated_classifiers_ for c in cc.calibrators]
+            assert not np.allclose(slopes(updated["model"]), slopes(model))
+
+
+class TestAppendClasses:
+    """Test suite for appending new labels"""
+
+    @pytest.mark.parametrize("prefit", [False, True])
+    def test_existing_classes_are_unchanged(self, tmp_path, corpus_entries, prefit):
+        base = _calibrated_bundle(tmp_path, corpus_entries, prefit)
+        version, summary = lob_incremental.append_classes_update(
+            PARKING, base, negative_entries=corpus_entries, promote=False, models_dir=str(tmp_path)
+        )
+        assert [c["label"] for c in summary["classes"]] == ["TRN|Parking lot operation"]
+        before = load_bundle(model_registry.version_dir(base, str(tmp_path)))
+        after = load_bundle(model_registry.version_dir(version, str(tmp_path)))
+        assert after["labels"] == sorted(before["labels"] + ["TRN|Parking lot operation"])
+        assert list(after["model"].classes_) == after["labels"]
+        assert _meta(tmp_path, version)["appendedClasses"][0]["baseVersion"] == base
+
+        texts = [r["text"] for r in flatten_dataset(corpus_entries + PARKING)]
+        X = before["vectorizer"].transform(texts)
+        idx = after["labels"].index("TRN|Parking lot operation")
+        for old, new in zip(lob_incremental.linear_estimators(before["model"]), lob_incremental.linear_estimators(after["model"])):
+            assert np.array_equal(np.delete(new.decision_function(X), idx, axis=1), old.decision_function(X))
+        pred_before, pred_after = before["model"].predict(X), after["model"].predict(X)
+        kept = pred_after != "TRN|Parking lot operation"
+        assert np.array_equal(pred_after[kept], pred_before[kept])
+        assert pred_after[-1] == "TRN|Parking lot operation"
+
+    def test_scorer_reuses_the_model_parameters(self, tmp_path, corpus_entries):
+        base = _calibrated_bundle(tmp_path, corpus_entries, prefit=True)
+        bundle = load_bundle(model_registry.version_dir(base, str(tmp_path)))
+        X = bundle["vectorizer"].transform([r["text"] for r in flatten_dataset(corpus_entries)])
+        y_bin = np.array([1] * 4 + [0] * 8, dtype=np.int8)
+        scorer = lob_incremental._fit_binary_scorer(bundle["model"], X, y_bin)
+        assert scorer.cv == "prefit"
+        estimator = scorer.calibrated_classifiers_[0].estimator
+        assert estimator.C == 0.3 and estimator.class_weight is None
+
+    def test_negatives_default_to_the_training_dataset(self, tmp_path, monkeypatch, corpus_entries):
+        dataset = tmp_path / "dataset.json"
+        dataset.write_text(json.dumps(corpus_entries))
+        monkeypatch.setattr(lob_incremental, "STARTUP_DATASET", str(dataset))
+        base = _calibrated_bundle(tmp_path, corpus_entries)
+        with pytest.raises(lob_incremental.IncrementalUpdateError, match="negatives"):
+            lob_incremental.append_classes_update(PARKING, base, promote=False, models_dir=str(tmp_path))
+
+        base = _calibrated_bundle(tmp_path, corpus_entries, datasetSha256=model_registry.file_sha256(str(dataset)))
+        version, summary = lob_incremental.append_classes_update(PARKING, base, promote=False,
+                                                                 models_dir=str(tmp_path))
+        assert summary["classes"][0]["negatives"] == len(corpus_entries)
+
+    def test_unsupported_requests_are_rejected(self, tmp_path, corpus_entries, write_bundle):
+        base = _calibrated_bundle(tmp_path, corpus_entries)
+        with pytest.raises(lob_incremental.IncrementalUpdateError, match="at least"):
+            lob_incremental.append_classes_update(PARKING[:1], base, corpus_entries, models_dir=str(tmp_path))
+        with pytest.raises(lob_incremental.IncrementalUpdateError, match="No new labels"):
+            lob_incremental.append_classes_update(corpus_entries, base, corpus_entries, models_dir=str(tmp_path))
+        with pytest.raises(lob_incremental.IncrementalUpdateError, match="retrain instead"):
+            lob_incremental.append_classes_update(PARKING, write_bundle(tmp_path), corpus_entries,
+                                                  models_dir=str(tmp_path))
+
+
+class TestIncrementalUpdateEndpoint:
+    """POST /admin/models/update through the Flask app"""
+
+    @pytest.fixture
+    def client(self, tmp_path, monkeypatch, admin_token):
+        import predict_app
+
+        monkeypatch.setattr(predict_app, "MODELS_DIR", str(tmp_path))
+        monkeypatch.setattr(predict_app, "_label_to_taxonomy_cache", {})
+        for name in ("model", "vectorizer", "featurizer", "labels", "fragments", "training_meta", "cascade",
+                     "current_bundle", "previous_bundle"):
+            monkeypatch.setattr(predict_app, name, None)
+        return predict_app, predict_app.app.test_client()
+
+    def test_update_is_served(self, tmp_path, client, admin_token, write_bundle, corpus_entries):
+        predict_app, c = client
+        headers = {"X-LOB-Admin-Token": admin_token}
+        assert c.post("/admin/models/update", json={"dataset": NEW_ENTRIES}, headers=headers).status_code == 409
+
+        base = write_bundle(tmp_path)
+        model_registry.promote(base, str(tmp_path))
+        assert predict_app.load_model()
+
+        # Published only: the served model and the registry's current version are unchanged
+        resp = c.post("/admin/models/update", json={"dataset": NEW_ENTRIES, "negatives": corpus_entries},
+                      headers=headers)
+        assert resp.status_code == 200
+        body = resp.get_json()
+        assert body["incremental"]["baseVersion"] == base and body["promoted"] is False
+        assert body["loaded"] == body["current"] == base != body["version"]
+        assert body["version"] in [v["version"] for v in body["versions"]]
+
+        resp = c.post("/admin/models/update", json={"dataset": NEW_ENTRIES, "negatives": corpus_entries,
+                                                    "promote": True}, headers=headers)
+        assert resp.status_code == 200
+        body = resp.get_json()
+        assert body["promoted"] is True
+        assert body["loaded"] == body["current"] == body["version"] != base and body["previousLoaded"] == base
+        assert c.post("/admin/models/update", json={"dataset": NEW_ENTRIES, "promote": "yes"},
+                      headers=headers).status_code == 400
+
+        bad = [dict(NEW_ENTRIES[0], recommendations=[{"taxCode": "X", "detailedLine": "Unknown line"}])]
+        resp = c.post("/admin/models/update", json={"dataset": bad}, headers=headers)
+        assert resp.status_code == 400 and "appendClasses" in resp.get_json()["error"]
+        resp = c.post("/admin/models/update", json={"dataset": bad, "appendClasses": True}, headers=headers)
+        assert resp.status_code == 400 and "retrain instead" in resp.get_json()["error"]
+        assert c.post("/admin/models/update", json={"dataset": NEW_ENTRIES, "epochs": 0}, headers=headers).status_code == 400
+        assert c.post("/admin/models/update", json={"dataset": NEW_ENTRIES}).status_code == 401
@@ -0,0 +1,136 @@
+"""
+Tests for latency metrics (latency_metrics.py) and their exposure by the service
+
+Tests cover:
+- Histogram bucketing, cumulative counts, sums and observe_many
+- Prometheus text output for histograms, counters and callback gauges
+- StageTimer durations (repeated stages accumulate) and the Server-Timing value
+- GET /metrics, and the Server-Timing header being opt-in (LOB_SERVER_TIMING)
+"""
+
+import os
+import re
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'service'))
+
+from latency_metrics import CONTENT_TYPE, Histogram, MetricsRegistry, StageTimer
+
+
+class TestHistogram:
+    """Test suite for Histogram"""
+
+    def test_buckets_are_cumulative_and_inclusive(self):
+        hist = Histogram("h_seconds", "help", buckets=(0.1, 0.01, 1.0))
+        assert hist.bounds == (0.01, 0.1, 1.0)
+        for value in (0.005, 0.01, 0.05, 0.5, 5.0):
+            hist.observe(value)
+        cumulative, total = hist.labels().snapshot()
+        # A value equal to a bound falls in that bucket (le = less than or equal)
+        assert cumulative == [2, 3, 4, 5]
+        assert total == pytest.approx(5.565)
+
+    def test_observe_many_matches_observe(self):
+        one = Histogram("a", "help", ["stage"])
+        many = Histogram("b", "help", ["stage"])
+        values = [("parse", 0.00002), ("score", 0.003), ("parse", 0.2)]
+        for stage, value in values:
+            one.labels(stage=stage).observe(value)
+        many.observe_many([(many.labels(stage=stage), value) for stage, value in values])
+        for stage in ("parse", "score"):
+            assert one.labels(stage=stage).snapshot() == many.labels(stage=stage).snapshot()
+
+    def test_labels_reuse_children(self):
+        hist = Histogram("h", "help", ["stage"])
+        assert hist.labels(stage="parse") is hist.labels(stage="parse")
+        assert hist.labels(stage="parse") is not hist.labels(stage="score")
+
+
+class TestRender:
+    """Test suite for the Prometheus text exposition"""
+
+    def test_histogram_counter_and_gauge(self):
+        registry = MetricsRegistry()
+        hist = registry.histogram("lob_stage_seconds", "Stage time.", ["stage"], buckets=(0.001, 0.01))
+        counter = registry.counter("lob_responses_total", "Responses.", ["status"])
+        registry.gauge("lob_ratio", "A ratio.", lambda: 0.5)
+        registry.gauge("lob_events_total", "Events.", lambda: {("hit",): 3, "miss": 1}, ["result"], kind="counter")
+        registry.gauge("lob_absent", "Not reported.", lambda: None)
+        hist.labels(stage="score").observe(0.005)
+        counter.labels(status=200).inc()
+        counter.labels(status=200).inc(2)
+
+        lines = registry.render().splitlines()
+        assert lines[:2] == ["# HELP lob_stage_seconds Stage time.", "# TYPE lob_stage_seconds histogram"]
+        assert 'lob_stage_seconds_bucket{stage="score",le="0.001"} 0' in lines
+        assert 'lob_stage_seconds_bucket{stage="score",le="0.01"} 1' in lines
+        assert 'lob_stage_seconds_bucket{stage="score",le="+Inf"} 1' in lines
+        assert 'lob_stage_seconds_sum{stage="score"} 0.005' in lines
+        assert 'lob_stage_seconds_count{stage="score"} 1' in lines
+        assert "# TYPE lob_responses_total counter" in lines
+        assert 'lob_responses_total{status="200"} 3' in lines
+        assert "lob_ratio 0.5" in lines
+        assert "# TYPE lob_events_total counter" in lines
+        assert 'lob_events_total{result="hit"} 3' in lines and 'lob_events_total{result="miss"} 1' in lines
+        assert not any("lob_absent" in line for line in lines)
+
+    def test_label_values_are_escaped(self):
+        registry = MetricsRegistry()
+        registry.counter("c_total", "help", ["path"]).labels(path='a"b\\c').inc()
+        assert 'c_total{path="a\\"b\\\\c"} 1' in registry.render().splitlines()
+
+
+class TestStageTimer:
+    """Test suite for StageTimer"""
+
+    def test_repeated_stages_accumulate(self):
+        timer = StageTimer()
+        timer.start = 10.0
+        timer.marks = [("parse", 10.5), ("normalize", 10.75), ("parse", 11.0)]
+        assert timer.durations() == {"parse": 0.75, "normalize": 0.25}
+
+    def test_server_timing_value(self):
+        value = StageTimer.server_timing({"parse": 0.0012, "score": 0.0000256}, total=0.01)
+        assert value == "parse;dur=1.200, score;dur=0.026, total;dur=10.000"
+        assert StageTimer.server_timing({}) == ""
+
+
+class TestServiceMetrics:
+    """Test suite for /metrics and the Server-Timing header through the Flask app"""
+
+    @pytest.fixture
+    def client(self, monkeypatch):
+        import predict_app
+
+        # Enough for /predict to reach request parsing; an invalid body never touches the model
+        for name in ("model", "vectorizer", "labels"):
+            monkeypatch.setattr(predict_app, name, object())
+        monkeypatch.setattr(predict_app, "admission", None)
+        return predict_app, predict_app.app.test_client()
+
+    def test_server_timing_is_opt_in(self, client, monkeypatch):
+        predict_app, test_client = client
+        resp = test_client.post("/predict", json={})
+        assert resp.status_code == 400
+        assert "Server-Timing" not in resp.headers
+
+        monkeypatch.setattr(predict_app, "SERVER_TIMING_ENABLED", True)
+        header = test_client.post("/predict", json={}).headers["Server-Timing"]
+        assert re.fullmatch(r"parse;dur=\d+\.\d{3}, total;dur=\d+\.\d{3}", header)
+
+    def test_metrics_endpoint(self, client):
+        predict_app, test_client = client
+
+        def parse_count():
+            text = test_client.get("/metrics").get_data(as_text=True)
+            match = re.search(r'^lob_predict_stage_seconds_count\{stage="parse"\} (\d+)$', text, re.M)
+            return int(match.group(1)) if match else 0, text
+
+        before, _ = parse_count()
+        test_client.post("/predict", json={})
+        after, text = parse_count()
+        assert after == before + 1
+        assert re.search(r'^lob_predict_responses_total\{status="400"\} \d+$', text, re.M)
+        assert test_client.get("/metrics").content_type == CONTENT_TYPE
@@ -0,0 +1,176 @@
+"""
+Tests for the versioned model registry (model_registry.py) and the service's
+promote / rollback endpoints
+
+Tests cover:
+- Publishing complete bundles and refusing incomplete ones
+- Atomic promotion through CURRENT.json and the legacy flat-layout fallback
+- Version listing
+- Retention: off by default; when enabled, old versions and stale staging directories are
+  pruned, never the current/previous or a protected (e.g. shadow) version
+- Digests computed while writing and the (path, inode, size, mtime_ns) digest cache
+- Promote and in-memory rollback through the admin endpoints
+"""
+
+import json
+import os
+import sys
+
+import joblib
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'service'))
+
+import model_registry
+
+
+class TestModelRegistry:
+    """Test suite for the on-disk registry"""
+
+    def test_publish_promote_and_list(self, tmp_path, write_bundle):
+        assert model_registry.active_model_dir(str(tmp_path)) == str(tmp_path)
+        v1 = write_bundle(tmp_path)
+        v2 = write_bundle(tmp_path, algorithm="LinearSVC")
+        assert model_registry.current_version(str(tmp_path)) is None
+
+        model_registry.promote(v1, str(tmp_path))
+        pointer = model_registry.promote(v2, str(tmp_path))
+        assert pointer["version"] == v2 and pointer["previous"] == v1
+        assert model_registry.active_model_dir(str(tmp_path)) == model_registry.version_dir(v2, str(tmp_path))
+
+        versions = model_registry.list_versions(str(tmp_path))
+        assert [v["version"] for v in versions] == [v2, v1]
+        assert [v["current"] for v in versions] == [True, False]
+        assert versions[0]["algorithm"] == "LinearSVC"
+
+    def test_incomplete_bundles_are_rejected(self, tmp_path):
+        staging = model_registry.create_staging_dir(str(tmp_path))
+        with pytest.raises(model_registry.RegistryError):
+            model_registry.publish(staging, str(tmp_path))
+        with pytest.raises(model_registry.RegistryError):
+            model_registry.promote("does-not-exist", str(tmp_path))
+        with pytest.raises(model_registry.RegistryError):
+            model_registry.version_dir("../escape", str(tmp_path))
+        # Staging directories are never listed as versions
+        assert model_registry.list_versions(str(tmp_path)) == []
+
+    def test_prune_keeps_newest_current_and_previous(self, tmp_path, write_bundle, monkeypatch):
+        monkeypatch.setattr(model_registry, "KEEP_VERSIONS", 0)
+        versions = [write_bundle(tmp_path) for _ in range(5)]
+        model_registry.promote(versions[0], str(tmp_path))
+        model_registry.promote(versions[1], str(tmp_path))
+
+        removed = model_registry.prune(str(tmp_path), keep=2)
+        assert sorted(removed) == [versions[2]]
+        assert [v["version"] for v in model_registry.list_versions(str(tmp_path))] == versions[::-1][:2] + versions[1::-1]
+        assert model_registry.prune(str(tmp_path), keep=0) == []
+
+        # publish() prunes with KEEP_VERSIONS
+        monkeypatch.setattr(model_registry, "KEEP_VERSIONS", 1)
+        newest = write_bundle(tmp_path)
+        assert [v["version"] for v in model_registry.list_versions(str(tmp_path))] == [newest, versions[1], versions[0]]
+
+    @pytest.mark.skipif("LOB_REGISTRY_KEEP" in os.environ, reason="retention configured by the environment")
+    def test_publish_keeps_every_version_by_default(self, tmp_path, write_bundle):
+        assert model_registry.KEEP_VERSIONS == 0
+        versions = [write_bundle(tmp_path) for _ in range(3)]
+        assert [v["version"] for v in model_registry.list_versions(str(tmp_path))] == versions[::-1]
+
+    def test_prune_keeps_pinned_and_protected_versions(self, tmp_path, write_bundle, monkeypatch):
+        monkeypatch.setattr(model_registry, "KEEP_VERSIONS", 0)
+        versions = [write_bundle(tmp_path) for _ in range(5)]
+        # versions[0] is previous and versions[1] current; versions[2] is e.g. a shadow candidate
+        model_registry.promote(versions[0], str(tmp_path))
+        model_registry.promote(versions[1], str(tmp_path))
+        model_registry.protect(versions[2])
+        model_registry.protect(versions[2])
+        try:
+            assert sorted(model_registry.prune(str(tmp_path), keep=1)) == [versions[3]]
+            model_registry.unprotect(versions[2])
+            assert model_registry.prune(str(tmp_path), keep=1) == []
+        finally:
+            model_registry.unprotect(versions[2])
+        assert model_registry.prune(str(tmp_path), keep=1) == [versions[2]]
+        assert [v["version"] for v in model_registry.list_versions(str(tmp_path))] == [versions[4], versions[1],
+                                                                                      versions[0]]
+
+    def test_prune_removes_only_stale_staging_dirs(self, tmp_path):
+        stale = model_registry.create_staging_dir(str(tmp_path))
+        fresh = model_registry.create_staging_dir(str(tmp_path))
+        day_ago = os.path.getmtime(stale) - model_registry.STALE_STAGING_SECONDS - 1
+        os.utime(stale, (day_ago, day_ago))
+
+        assert model_registry.prune(str(tmp_path)) == [os.path.basename(stale)]
+        assert not os.path.exists(stale) and os.path.isdir(fresh)
+
+    def test_hashing_writer_and_digest_cache(self, tmp_path):
+        path = str(tmp_path / "artifact.joblib")
+        with model_registry.HashingWriter(path) as f:
+            joblib.dump({"weights": list(range(1000))}, f)
+        assert f.hexdigest() == model_registry.file_sha256(path)
+
+        other = str(tmp_path / "labels.json")
+        with open(other, "w", encoding="utf-8") as g:
+            json.dump(["RET|Sari-sari store"], g)
+        cache = model_registry.DigestCache()
+        first = cache.digests([path, other])
+        assert cache.misses == 2 and cache.hits == 0
+        assert cache.digests([path, other]) == first
+        assert cache.hits == 2 and cache.misses == 2
+
+        # A changed file is rehashed; the untouched one still comes from the cache
+        with open(other, "w", encoding="utf-8") as g:
+            json.dump(["SVC|Barbershop", "RET|Sari-sari store"], g)
+        again = cache.digests([path, other])
+        assert again[path] == first[path] and again[other] != first[other]
+        assert cache.hits == 3 and cache.misses == 3
+        with pytest.raises(OSError):
+            cache.digests([str(tmp_path / "missing")])
+
+
+class TestModelAdminEndpoints:
+    """Promote / rollback through the Flask app"""
+
+    @pytest.fixture
+    def client(self, tmp_path, monkeypatch, admin_token):
+        import predict_app
+
+        monkeypatch.setattr(predict_app, "MODELS_DIR", str(tmp_path))
+        monkeypatch.setattr(predict_app, "_label_to_taxonomy_cache", {})
+        for name in ("model", "vectorizer", "featurizer", "labels", "fragments", "training_meta", "cascade",
+                     "current_bundle", "previous_bundle"):
+            monkeypatch.setattr(predict_app, name, None)
+        return predict_app, predict_app.app.test_client()
+
+    def test_promote_and_rollback(self, tmp_path, client, admin_token, write_bundle):
+        predict_app, c = client
+        headers = {"X-LOB-Admin-Token": admin_token}
+        v1 = write_bundle(tmp_path, C=1.0)
+        v2 = write_bundle(tmp_path, C=0.01)
+        model_registry.promote(v1, str(tmp_path))
+        assert predict_app.load_model()
+        first_model = predict_app.model
+
+        resp = c.post("/admin/models/promote", json={"version": v2}, headers=headers)
+        assert resp.status_code == 200
+        assert resp.get_json()["loaded"] == v2 and resp.get_json()["previousLoaded"] == v1
+        assert model_registry.current_version(str(tmp_path)) == v2
+        assert predict_app.model is not first_model
+
+        resp = c.post("/admin/models/rollback", headers=headers)
+        assert resp.status_code == 200
+        # Rollback reuses the in-memory bundle rather than reloading from disk
+        assert predict_app.model is first_model
+        assert model_registry.current_version(str(tmp_path)) == v1
+
+        listing = c.get("/admin/models", headers=headers).get_json()
+        assert listing["current"] == v1 and {v["version"] for v in listing["versions"]} == {v1, v2}
+
+    def test_promote_errors(self, client, admin_token):
+        _, c = client
+        headers = {"X-LOB-Admin-Token": admin_token}
+        assert c.post("/admin/models/promote", json={"version": "missing"}, headers=headers).status_code == 404
+        assert c.post("/admin/models/promote", json={}, headers=headers).status_code == 400
+        assert c.post("/admin/models/rollback", headers=headers).status_code == 409
+        assert c.get("/admin/models").status_code == 401
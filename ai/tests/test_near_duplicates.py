@@ -0,0 +1,48 @@
+"""
+Tests for near-duplicate clustering (lob_near_dup.py)
+
+Tests cover:
+- Templated near-copies share a cluster; unrelated descriptions do not
+- Identical texts always share a cluster, and ids are stable
+- The per-(cluster, label) cap keeps the first rows in input order
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+
+from lob_near_dup import cap_cluster_rows, cluster_near_duplicates, shingles
+
+TEMPLATE = ("our retail operation focuses on sari-sari store offerings for nearby households the business provides "
+            "sari-sari store services and products with regular weekday and weekend operations {}")
+NEAR_COPIES = [TEMPLATE.format(place) for place in ("beside the school", "near the public market", "along the highway")]
+UNRELATED = ["laundry shop wash dry fold", "panaderya ng tinapay at ensaymada", "pay parking lot for cars"]
+
+
+class TestNearDuplicates:
+    """Test suite for MinHash/LSH clustering"""
+
+    def test_near_copies_cluster_together(self):
+        ids = cluster_near_duplicates(NEAR_COPIES + UNRELATED + [UNRELATED[0]])
+        assert ids[:3] == [0, 0, 0]
+        assert ids[3:6] == [3, 4, 5]
+        assert ids[6] == 3
+        assert ids == cluster_near_duplicates(NEAR_COPIES + UNRELATED + [UNRELATED[0]])
+
+    def test_threshold(self):
+        assert len(set(cluster_near_duplicates(NEAR_COPIES, threshold=1.0))) == 3
+        assert shingles("po") == {" po "}
+
+    def test_cap_per_cluster_and_label(self):
+        rows = [{"text": t, "label": "RET|Sari-sari store"} for t in NEAR_COPIES]
+        rows += [{"text": NEAR_COPIES[0], "label": "RET|Convenience store"}]
+        rows += [{"text": t, "label": "SVC|Laundry services"} for t in UNRELATED]
+        kept, info = cap_cluster_rows(rows, 1)
+        assert kept == [rows[0], rows[3]] + rows[4:]
+        assert info["rowsDropped"] == 2 and info["rowsBefore"] == len(rows)
+        assert cap_cluster_rows(rows, 5)[0] == rows
+        with pytest.raises(ValueError):
+            cap_cluster_rows(rows, 0)
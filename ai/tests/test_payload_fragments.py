@@ -0,0 +1,67 @@
+"""
+Tests for pre-serialized recommendation fragments (payload_fragments.py)
+
+Tests cover:
+- Byte-identical output to Flask jsonify() of the equivalent dict
+- Threshold filtering and labels missing from the taxonomy
+- The optional orjson provider
+"""
+
+import json
+import os
+import sys
+
+import numpy as np
+import pytest
+from flask import Flask, jsonify
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'service'))
+
+from payload_fragments import OrjsonProvider, RecommendationFragments, orjson
+
+
+LABELS = ["RET|Sari-sari store", "FOOD|Carinderia / kainan", "SVC|Salón", "UNKNOWN|Not in taxonomy"]
+LABEL_MAP = {
+    "RET|Sari-sari store": {"taxCode": "RET", "lineOfBusiness": "retail", "detailedLine": "Sari-sari store", "psicCode": "4711"},
+    "FOOD|Carinderia / kainan": {"taxCode": "FOOD", "lineOfBusiness": "food \"eatery\"", "detailedLine": "Carinderia / kainan", "psicCode": "5610"},
+    "SVC|Salón": {"taxCode": "SVC", "lineOfBusiness": "services", "detailedLine": "Salón", "psicCode": ""},
+}
+
+
+def _expected(app, top, proba, threshold):
+    recs = []
+    for idx in top:
+        info = LABEL_MAP.get(LABELS[idx])
+        if proba[idx] >= threshold and info:
+            rec = dict(info)
+            rec["confidence"] = round(float(proba[idx]), 4)
+            recs.append(rec)
+    with app.app_context():
+        return jsonify({"recommendations": recs}).get_data(as_text=True)
+
+
+class TestRecommendationFragments:
+    """Test suite for response fragment assembly"""
+
+    @pytest.mark.parametrize("threshold", [0.0, 0.1, 0.9])
+    def test_matches_jsonify(self, threshold):
+        app = Flask(__name__)
+        fragments = RecommendationFragments(LABELS, LABEL_MAP, app.json.ensure_ascii)
+        rng = np.random.default_rng(0)
+        for proba in rng.dirichlet(np.ones(len(LABELS)), size=50):
+            top = np.argsort(proba)[::-1][:3]
+            assert fragments.render(top, proba, threshold) + "\n" == _expected(app, top, proba, threshold)
+
+    def test_empty_and_unknown_labels(self):
+        fragments = RecommendationFragments(LABELS, LABEL_MAP)
+        proba = np.array([0.0, 0.0, 0.0, 1.0])
+        assert fragments.render([3], proba, 0.01) == '{"recommendations":[]}'
+
+    @pytest.mark.skipif(orjson is None, reason="orjson not installed")
+    def test_orjson_provider_round_trips(self):
+        app = Flask(__name__)
+        app.json = OrjsonProvider(app)
+        fragments = RecommendationFragments(LABELS, LABEL_MAP, app.json.ensure_ascii)
+        proba = np.array([0.5, 0.3, 0.15, 0.05])
+        top = np.argsort(proba)[::-1]
+        assert json.loads(fragments.render(top, proba, 0.0)) == json.loads(_expected(app, top, proba, 0.0))
@@ -0,0 +1,59 @@
+"""
+Tests for service startup: lazy imports, warm-up and /ready vs /health
+
+Tests cover:
+- Importing the service does not load scikit-learn or the training module
+- /ready is 503 until a model is loaded and warmed, while /health always answers
+- Loading a model warms it before it is served
+"""
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+SERVICE_DIR = os.path.join(os.path.dirname(__file__), '..', 'service')
+sys.path.insert(0, SERVICE_DIR)
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+
+
+def test_import_does_not_load_training_stack():
+    code = (
+        "import sys; import predict_app; "
+        "print(','.join(m for m in ('train_lob_model', 'sklearn', 'sklearn.metrics') if m in sys.modules))"
+    )
+    out = subprocess.run([sys.executable, "-c", code], cwd=SERVICE_DIR, capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == ""
+
+
+class TestReadiness:
+    """/ready and /health through the Flask app"""
+
+    @pytest.fixture
+    def app(self, tmp_path, monkeypatch):
+        import predict_app
+
+        monkeypatch.setattr(predict_app, "MODELS_DIR", str(tmp_path))
+        monkeypatch.setattr(predict_app, "_label_to_taxonomy_cache", {})
+        for name in ("model", "vectorizer", "featurizer", "labels", "fragments", "training_meta", "cascade",
+                     "current_bundle", "previous_bundle"):
+            monkeypatch.setattr(predict_app, name, None)
+        return predict_app
+
+    def test_ready_after_load_and_warm(self, tmp_path, app, write_bundle):
+        import model_registry
+
+        c = app.app.test_client()
+        assert c.get("/health").status_code == 200
+        resp = c.get("/ready")
+        assert resp.status_code == 503
+        assert resp.get_json() == {"ready": False, "reason": "model not loaded"}
+
+        model_registry.promote(write_bundle(tmp_path), str(tmp_path))
+        assert app.load_model()
+        assert app.current_bundle.warmed_seconds is not None
+        body = c.get("/ready").get_json()
+        assert body["ready"] is True
+        assert body["model_version"] == app.current_bundle.version
+        assert body["warmupSeconds"] >= 0
@@ -0,0 +1,80 @@
+"""
+Tests for per-stage thread/worker budgets (resource_governor.py)
+
+Tests cover:
+- Defaults and environment overrides for each stage
+- Invalid thread and worker overrides raise a clear ValueError (serving allows 0 workers)
+- limit() caps BLAS/OpenMP threads only inside the block
+- Budgets are reported on /health
+"""
+
+import os
+import sys
+
+import pytest
+from threadpoolctl import threadpool_info
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'service'))
+
+import resource_governor
+
+
+@pytest.fixture(autouse=True)
+def clean_env(monkeypatch):
+    for threads_var, workers_var in resource_governor._ENV.values():
+        monkeypatch.delenv(threads_var, raising=False)
+        monkeypatch.delenv(workers_var, raising=False)
+
+
+class TestResourceGovernor:
+    """Test suite for stage budgets"""
+
+    def test_defaults_and_overrides(self, monkeypatch):
+        monkeypatch.setattr(resource_governor.os, "cpu_count", lambda: 8)
+        assert resource_governor.budget("serving") == (1, 0)
+        assert resource_governor.budget("training") == (1, 7)
+        assert resource_governor.budget("evaluation") == (1, 1)
+
+        monkeypatch.setenv("LOB_TRAINING_WORKERS", "2")
+        monkeypatch.setenv("LOB_EVAL_THREADS", "3")
+        assert resource_governor.budget("training").workers == 2
+        assert resource_governor.summary()["evaluation"] == {"threads": 3, "workers": 1}
+        assert resource_governor.summary()["cpuCount"] == 8
+
+        monkeypatch.setenv("LOB_SERVING_THREADS", "0")
+        with pytest.raises(ValueError):
+            resource_governor.budget("serving")
+
+    @pytest.mark.parametrize("value", ["0", "-2", "two"])
+    def test_invalid_workers_are_rejected(self, monkeypatch, value):
+        monkeypatch.setenv("LOB_TRAINING_WORKERS", value)
+        with pytest.raises(ValueError, match="LOB_TRAINING_WORKERS"):
+            resource_governor.budget("training")
+
+    def test_worker_overrides_that_joblib_accepts(self, monkeypatch):
+        monkeypatch.setenv("LOB_EVAL_WORKERS", "-1")
+        assert resource_governor.budget("evaluation").workers == -1
+        # Serving workers are the admission limit, where 0 means unlimited
+        monkeypatch.setenv("LOB_MAX_IN_FLIGHT", "0")
+        assert resource_governor.budget("serving").workers == 0
+        monkeypatch.setenv("LOB_MAX_IN_FLIGHT", "-1")
+        with pytest.raises(ValueError, match="LOB_MAX_IN_FLIGHT"):
+            resource_governor.budget("serving")
+
+    def test_limit_is_scoped_to_the_block(self, monkeypatch):
+        # Make sure a BLAS is loaded for threadpoolctl to control
+        import scipy.linalg
+
+        before = [pool["num_threads"] for pool in threadpool_info()]
+        monkeypatch.setenv("LOB_TRAINING_THREADS", "2")
+        with resource_governor.limit("training") as budget:
+            assert budget.threads == 2
+            assert all(pool["num_threads"] == 2 for pool in threadpool_info())
+        assert [pool["num_threads"] for pool in threadpool_info()] == before
+
+    def test_health_reports_budgets(self):
+        import predict_app
+
+        body = predict_app.app.test_client().get("/health").get_json()
+        assert set(body["resourceBudgets"]) == {"cpuCount", "serving", "training", "evaluation"}
@@ -0,0 +1,116 @@
+"""
+Tests for the sampling profiler (sampling_profiler.SamplingProfiler, GET /admin/profile)
+
+Tests cover:
+- Stacks of other threads are sampled and aggregated
+- seconds/hz are clamped; NaN and infinity are rejected
+- Only one profile runs at a time
+- The endpoint's auth, validation and collapsed output
+"""
+
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'service'))
+
+from sampling_profiler import MAX_HZ, ProfilerBusyError, SamplingProfiler
+
+
+def _busy_loop(stop):
+    while not stop.is_set():
+        sum(range(1000))
+
+
+@pytest.fixture
+def busy_thread():
+    stop = threading.Event()
+    thread = threading.Thread(target=_busy_loop, args=(stop,), daemon=True)
+    thread.start()
+    yield
+    stop.set()
+    thread.join()
+
+
+class TestSamplingProfiler:
+    """Test suite for SamplingProfiler.profile"""
+
+    def test_samples_other_threads(self, busy_thread):
+        report = SamplingProfiler().profile(0.2, 200, request_threads_only=False)
+        assert report["ticks"] > 0 and report["samples"] > 0
+        assert "test_sampling_profiler.py:_busy_loop" in report["collapsed"]
+        assert any(f["function"] == "test_sampling_profiler.py:_busy_loop" for f in report["topFunctions"])
+
+    def test_request_threads_only_skips_non_request_threads(self, busy_thread):
+        report = SamplingProfiler().profile(0.05, 200)
+        assert report["samples"] == 0 and report["collapsed"] == ""
+
+    def test_bounds_are_clamped(self):
+        started = time.perf_counter()
+        report = SamplingProfiler().profile(0, MAX_HZ * 10, request_threads_only=False)
+        assert time.perf_counter() - started < 1.0
+        assert report["hz"] == MAX_HZ
+
+    @pytest.mark.parametrize("seconds,hz", [("nan", 100), (1, "nan"), ("inf", 100), (1, "-inf")])
+    def test_non_finite_is_rejected(self, seconds, hz):
+        profiler = SamplingProfiler()
+        started = time.perf_counter()
+        with pytest.raises(ValueError):
+            profiler.profile(seconds, hz)
+        assert time.perf_counter() - started < 0.5
+        # The busy lock was never taken
+        assert profiler.profile(0.01, 100)["seconds"] < 1.0
+
+    def test_concurrent_profile_is_busy(self):
+        profiler = SamplingProfiler()
+        thread = threading.Thread(target=profiler.profile, args=(0.3, 50))
+        thread.start()
+        time.sleep(0.05)
+        with pytest.raises(ProfilerBusyError):
+            profiler.profile(0.01, 50)
+        thread.join()
+
+
+class TestProfileEndpoint:
+    """Test suite for GET /admin/profile"""
+
+    @pytest.fixture
+    def client(self, monkeypatch, admin_token):
+        import predict_app
+
+        monkeypatch.setattr(predict_app, "profiler", SamplingProfiler())
+        return predict_app, predict_app.app.test_client()
+
+    def test_requires_admin_token(self, client):
+        _, test_client = client
+        assert test_client.get("/admin/profile?seconds=0.01").status_code == 401
+
+    def test_disabled_profiler_is_404(self, client, monkeypatch, admin_token):
+        predict_app, test_client = client
+        monkeypatch.setattr(predict_app, "profiler", None)
+        resp = test_client.get("/admin/profile?seconds=0.01", headers={"X-LOB-Admin-Token": admin_token})
+        assert resp.status_code == 404
+
+    @pytest.mark.parametrize("query", ["seconds=nan", "seconds=inf", "hz=nan", "hz=-inf", "seconds=abc",
+                                       "threads=some"])
+    def test_invalid_parameters_are_400(self, client, admin_token, query):
+        _, test_client = client
+        started = time.perf_counter()
+        resp = test_client.get(f"/admin/profile?{query}", headers={"X-LOB-Admin-Token": admin_token})
+        assert resp.status_code == 400
+        assert time.perf_counter() - started < 1.0
+
+    def test_json_and_collapsed_output(self, client, admin_token, busy_thread):
+        _, test_client = client
+        headers = {"X-LOB-Admin-Token": admin_token}
+        resp = test_client.get("/admin/profile?seconds=0.1&hz=200&threads=all", headers=headers)
+        assert resp.status_code == 200
+        assert resp.get_json()["samples"] > 0
+
+        resp = test_client.get("/admin/profile?seconds=0.1&hz=200&threads=all&format=collapsed", headers=headers)
+        assert resp.status_code == 200
+        assert resp.content_type.startswith("text/plain")
+        assert "_busy_loop" in resp.get_data(as_text=True)
@@ -0,0 +1,98 @@
+"""
+Tests for the cached serving featurizer (serving_featurizer.py)
+
+Tests cover:
+- Identical output to the fitted vectorizer.transform
+- float32 features, bit-identical to vectorizer.transform
+- Bounded per-token LRU cache
+- Rejection of vectorizer options the featurizer cannot reproduce
+"""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+
+from serving_featurizer import CachedTfidfFeaturizer
+from train_lob_model import build_vectorizer, normalize_text
+
+
+TRAIN_TEXTS = [
+    "Sari-sari store selling canned goods, softdrinks at bigas",
+    "Maliit na tindahan ng de-lata malapit sa palengke",
+    "Carinderia selling lutong-bahay ulam and rice",
+    "Small restaurant serving grilled chicken & pork",
+    "Hardware store selling cement, gravel and hollow blocks",
+    "Barber shop offering gupit and shave",
+    "Café and bakery selling pandesal and coffee",
+    "Laundry shop — wash, dry and fold services",
+]
+
+QUERY_TEXTS = TRAIN_TEXTS + [
+    "",
+    "a b c",
+    "store store store selling selling",
+    "unknownword zzzz qwerty",
+    "Nagtitinda ako ng mga de-lata, softdrinks sa maliit kong tindahan po",
+    "café crème résumé naïve",
+    "x" * 300,
+]
+
+
+class TestCachedTfidfFeaturizer:
+    """Test suite for the token-level n-gram cache featurizer"""
+
+    @pytest.fixture
+    def vectorizer(self):
+        vec = build_vectorizer()
+        vec.fit([normalize_text(t) for t in TRAIN_TEXTS])
+        return vec
+
+    @pytest.mark.parametrize("normalize", [True, False])
+    def test_matches_vectorizer_transform(self, vectorizer, normalize):
+        texts = [normalize_text(t) if normalize else t for t in QUERY_TEXTS]
+        featurizer = CachedTfidfFeaturizer(vectorizer)
+
+        expected = vectorizer.transform(texts).tocsr()
+        expected.sort_indices()
+        # Run twice so the second pass is served from the token cache
+        for _ in range(2):
+            actual = featurizer.transform(texts)
+            assert actual.shape == expected.shape
+            assert actual.dtype == expected.dtype
+            assert np.array_equal(actual.indptr, expected.indptr)
+            assert np.array_equal(actual.indices, expected.indices)
+            np.testing.assert_allclose(actual.data, expected.data, rtol=1e-12, atol=0)
+
+        assert featurizer.cache_info()["hits"] > 0
+
+    def test_single_request_matches(self, vectorizer):
+        featurizer = CachedTfidfFeaturizer(vectorizer)
+        text = normalize_text("tindahan selling bigas at softdrinks")
+        np.testing.assert_allclose(
+            featurizer.transform([text]).toarray(), vectorizer.transform([text]).toarray(), rtol=1e-12
+        )
+
+    def test_float32_features_are_exact(self, vectorizer):
+        texts = [normalize_text(t) for t in QUERY_TEXTS]
+        expected = vectorizer.transform(texts).tocsr()
+        expected.sort_indices()
+        actual = CachedTfidfFeaturizer(vectorizer).transform(texts)
+        assert expected.dtype == actual.dtype == np.float32
+        assert np.array_equal(actual.data, expected.data)
+
+    def test_cache_is_bounded(self, vectorizer):
+        featurizer = CachedTfidfFeaturizer(vectorizer, cache_size=2)
+        featurizer.transform(QUERY_TEXTS)
+        info = featurizer.cache_info()
+        assert info["size"] <= 2
+        assert info["maxsize"] == 2
+
+    def test_unsupported_analyzer_rejected(self):
+        vec = TfidfVectorizer(analyzer="char", ngram_range=(2, 3)).fit(TRAIN_TEXTS)
+        with pytest.raises(ValueError):
+            CachedTfidfFeaturizer(vec)
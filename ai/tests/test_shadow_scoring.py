@@ -0,0 +1,175 @@
+"""
+Tests for shadow scoring of a candidate model (shadow_scoring.py)
+
+Tests cover:
+- Agreement, confidence-delta and latency aggregation
+- Sampling and bounded-queue drops that never block the caller
+- Starting, reading and stopping a shadow through /admin/shadow, under the registry lock;
+  registry retention keeps its candidate
+"""
+
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'service'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+
+from shadow_scoring import ShadowScorer
+
+
+def _wait_for(predicate, timeout=5.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.005)
+    return False
+
+
+class TestShadowScorer:
+    """Test suite for ShadowScorer"""
+
+    def test_aggregates_agreement_and_deltas(self):
+        answers = {"tindahan": ("RET", 0.9), "gupit": ("SVC", 0.6)}
+        shadow = ShadowScorer("v2", lambda desc: answers[desc], sample_rate=1.0)
+        try:
+            assert shadow.submit("tindahan", "RET", 0.8, 0.004)
+            assert shadow.submit("gupit", "FOOD", 0.7, 0.004)
+            assert _wait_for(lambda: shadow.stats()["counts"]["scored"] == 2)
+            stats = shadow.stats()
+        finally:
+            shadow.stop()
+
+        assert stats["top1Agreement"] == 0.5
+        assert stats["confidenceDelta"]["mean"] == pytest.approx(0.0)
+        assert stats["confidenceDelta"]["meanAbs"] == pytest.approx(0.1)
+        assert stats["confidenceDelta"]["histogram"]["count"] == 2
+        assert stats["latencySeconds"]["primary"]["count"] == 2
+        assert stats["latencySeconds"]["primary"]["p50"] == 0.005
+        assert stats["latencySeconds"]["candidate"]["count"] == 2
+
+    def test_sampling_and_full_queue_never_block(self):
+        release = threading.Event()
+
+        def slow(desc):
+            release.wait(5)
+            return "RET", 0.9
+
+        shadow = ShadowScorer("v2", slow, sample_rate=1.0, queue_size=1)
+        try:
+            t0 = time.perf_counter()
+            results = [shadow.submit("tindahan", "RET", 0.9, 0.001) for _ in range(20)]
+            assert time.perf_counter() - t0 < 0.5
+            counts = shadow.stats()["counts"]
+            assert counts["dropped"] > 0
+            assert counts["submitted"] + counts["dropped"] == 20
+            assert sum(results) == counts["submitted"]
+        finally:
+            release.set()
+            shadow.stop()
+
+        never = ShadowScorer("v2", slow, sample_rate=0.0)
+        assert not any(never.submit("tindahan", "RET", 0.9, 0.001) for _ in range(100))
+        never.stop()
+
+    def test_scorer_errors_are_counted(self):
+        def broken(desc):
+            raise RuntimeError("boom")
+
+        shadow = ShadowScorer("v2", broken, sample_rate=1.0)
+        shadow.submit("tindahan", "RET", 0.9, 0.001)
+        assert _wait_for(lambda: shadow.stats()["counts"]["errors"] == 1)
+        shadow.stop()
+
+
+class TestShadowEndpoint:
+    """/admin/shadow through the Flask app"""
+
+    def test_start_read_stop(self, tmp_path, monkeypatch, admin_token, write_bundle):
+        import model_registry
+        import predict_app
+
+        monkeypatch.setattr(predict_app, "MODELS_DIR", str(tmp_path))
+        monkeypatch.setattr(predict_app, "_label_to_taxonomy_cache", {})
+        monkeypatch.setattr(predict_app, "admission", None)
+        for name in ("current_bundle", "previous_bundle", "shadow"):
+            monkeypatch.setattr(predict_app, name, None)
+        primary = write_bundle(tmp_path, C=1.0)
+        candidate = write_bundle(tmp_path, C=0.01)
+        model_registry.promote(primary, str(tmp_path))
+        assert predict_app.load_model()
+        c = predict_app.app.test_client()
+        headers = {"X-LOB-Admin-Token": admin_token}
+
+        assert c.get("/admin/shadow", headers=headers).status_code == 404
+        resp = c.post("/admin/shadow", json={"version": candidate, "sampleRate": 1.0}, headers=headers)
+        assert resp.status_code == 200
+        assert resp.get_json()["primary"] == primary
+
+        for _ in range(3):
+            c.post("/predict", json={"businessDescription": "Sari-sari store selling softdrinks", "minConfidence": 0})
+        assert _wait_for(lambda: c.get("/admin/shadow", headers=headers).get_json()["counts"]["scored"] == 3)
+        stats = c.get("/admin/shadow", headers=headers).get_json()
+        assert stats["candidate"] == candidate
+        assert stats["top1Agreement"] == 1.0
+
+        assert c.delete("/admin/shadow", headers=headers).status_code == 200
+        assert predict_app.shadow is None
+        assert c.post("/admin/shadow", json={"version": "missing"}, headers=headers).status_code == 404
+
+    def test_candidate_is_kept_by_retention(self, tmp_path, monkeypatch, admin_token, write_bundle):
+        import model_registry
+        import predict_app
+
+        monkeypatch.setattr(predict_app, "MODELS_DIR", str(tmp_path))
+        monkeypatch.setattr(predict_app, "_label_to_taxonomy_cache", {})
+        for name in ("current_bundle", "previous_bundle", "shadow"):
+            monkeypatch.setattr(predict_app, name, None)
+        candidate = write_bundle(tmp_path, C=0.01)
+        model_registry.promote(write_bundle(tmp_path), str(tmp_path))
+        monkeypatch.setattr(model_registry, "KEEP_VERSIONS", 1)
+        c = predict_app.app.test_client()
+        headers = {"X-LOB-Admin-Token": admin_token}
+
+        assert c.post("/admin/shadow", json={"version": candidate}, headers=headers).status_code == 200
+        write_bundle(tmp_path)
+        write_bundle(tmp_path)
+        assert candidate in [v["version"] for v in model_registry.list_versions(str(tmp_path))]
+
+        assert c.delete("/admin/shadow", headers=headers).status_code == 200
+        write_bundle(tmp_path)
+        assert candidate not in [v["version"] for v in model_registry.list_versions(str(tmp_path))]
+
+    def test_swaps_hold_the_registry_lock(self, tmp_path, monkeypatch, admin_token, write_bundle):
+        import predict_app
+
+        monkeypatch.setattr(predict_app, "MODELS_DIR", str(tmp_path))
+        monkeypatch.setattr(predict_app, "_label_to_taxonomy_cache", {})
+        for name in ("current_bundle", "previous_bundle", "shadow"):
+            monkeypatch.setattr(predict_app, name, None)
+        read_bundle = predict_app._read_bundle
+        locked = []
+
+        def checked_read(*args):
+            locked.append(predict_app.registry_lock.locked())
+            return read_bundle(*args)
+
+        monkeypatch.setattr(predict_app, "_read_bundle", checked_read)
+        candidate = write_bundle(tmp_path)
+        c = predict_app.app.test_client()
+        headers = {"X-LOB-Admin-Token": admin_token}
+
+        assert c.post("/admin/shadow", json={"version": candidate}, headers=headers).status_code == 200
+        assert locked == [True]
+        # A promote or rollback in progress holds the lock; the swap waits for it
+        with predict_app.registry_lock:
+            stopper = threading.Thread(target=lambda: c.delete("/admin/shadow", headers=headers))
+            stopper.start()
+            time.sleep(0.1)
+            assert predict_app.shadow is not None
+        stopper.join(timeout=5)
+        assert predict_app.shadow is None
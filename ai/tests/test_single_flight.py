@@ -0,0 +1,144 @@
+"""
+Tests for single-flight coalescing of identical /predict requests (single_flight.py)
+
+Tests cover:
+- Concurrent calls with one key share a single computation
+- Leader exceptions propagate to waiting callers
+- Sequential calls are not cached
+- Concurrent identical /predict requests are scored once
+"""
+
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'service'))
+
+from single_flight import SingleFlight
+
+
+def _run_concurrently(n, target):
+    results = [None] * n
+    errors = [None] * n
+
+    def worker(i):
+        try:
+            results[i] = target()
+        except Exception as exc:
+            errors[i] = exc
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(n)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(timeout=10)
+    return results, errors
+
+
+class TestSingleFlight:
+    """Test suite for SingleFlight"""
+
+    def test_concurrent_calls_share_one_computation(self):
+        flights = SingleFlight()
+        n = 8
+        calls = []
+        release = threading.Event()
+
+        def compute():
+            calls.append(1)
+            release.wait(5)
+            return {"answer": 42}
+
+        # Hold the leader until every other caller has joined its flight
+        threading.Thread(target=_release_when_joined, args=(flights, n - 1, release)).start()
+        results, errors = _run_concurrently(n, lambda: flights.do("key", compute))
+
+        assert errors == [None] * n
+        assert len(calls) == 1
+        assert all(r[0] is results[0][0] for r in results)
+        assert sorted(r[1] for r in results) == [False] + [True] * (n - 1)
+        assert flights.computed == 1 and flights.shared == n - 1
+        assert flights.in_flight() == 0
+
+    def test_exception_is_shared(self):
+        flights = SingleFlight()
+        release = threading.Event()
+
+        def compute():
+            release.wait(5)
+            raise RuntimeError("boom")
+
+        threading.Thread(target=_release_when_joined, args=(flights, 2, release)).start()
+        _, errors = _run_concurrently(3, lambda: flights.do("key", compute))
+        assert all(isinstance(e, RuntimeError) for e in errors)
+        assert flights.in_flight() == 0
+
+    def test_sequential_calls_recompute(self):
+        flights = SingleFlight()
+        assert flights.do("a", lambda: 1) == (1, False)
+        assert flights.do("a", lambda: 2) == (2, False)
+        assert flights.computed == 2 and flights.shared == 0
+
+
+def _release_when_joined(flights, waiters, release, timeout=5.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        with flights._lock:
+            if any(call.waiters >= waiters for call in flights._calls.values()):
+                break
+        time.sleep(0.001)
+    release.set()
+
+
+class TestPredictCoalescing:
+    """Identical concurrent /predict requests through the Flask app"""
+
+    @pytest.fixture
+    def app_client(self, monkeypatch):
+        import predict_app
+
+        labels = ["RET|Sari-sari store", "SVC|Barbershop"]
+        label_map = {
+            "RET|Sari-sari store": {"taxCode": "RET", "lineOfBusiness": "retail", "detailedLine": "Sari-sari store", "psicCode": "4711"},
+            "SVC|Barbershop": {"taxCode": "SVC", "lineOfBusiness": "services", "detailedLine": "Barbershop", "psicCode": "9602"},
+        }
+        flights = SingleFlight()
+        scored = []
+        release = threading.Event()
+
+        class Featurizer:
+            def transform(self, texts):
+                return texts
+
+        def slow_score(X):
+            scored.append(X)
+            release.wait(5)
+            return np.array([[0.9, 0.1]])
+
+        monkeypatch.setattr(predict_app, "model", object())
+        monkeypatch.setattr(predict_app, "vectorizer", object())
+        monkeypatch.setattr(predict_app, "featurizer", Featurizer())
+        monkeypatch.setattr(predict_app, "labels", labels)
+        monkeypatch.setattr(predict_app, "fragments", predict_app.RecommendationFragments(labels, label_map))
+        monkeypatch.setattr(predict_app, "_score", slow_score)
+        monkeypatch.setattr(predict_app, "single_flight", flights)
+        monkeypatch.setattr(predict_app, "admission", None)
+        return predict_app.app, flights, scored, release
+
+    def test_duplicates_are_scored_once(self, app_client):
+        app, flights, scored, release = app_client
+        n = 6
+        body = {"businessDescription": "Sari-sari store selling softdrinks at de-lata"}
+        threading.Thread(target=_release_when_joined, args=(flights, n - 1, release)).start()
+        results, errors = _run_concurrently(n, lambda: app.test_client().post("/predict", json=body))
+
+        assert errors == [None] * n
+        assert [r.status_code for r in results] == [200] * n
+        assert len({r.get_data() for r in results}) == 1
+        assert results[0].get_json()["recommendations"][0]["taxCode"] == "RET"
+        assert len(scored) == 1
+        assert flights.shared == n - 1
@@ -0,0 +1,88 @@
+"""
+Tests for POST /train uploads (predict_app.train_endpoint)
+
+Tests cover:
+- JSON bodies are validated and handed to training in memory (no temp file)
+- gzip JSON and gzip NDJSON uploads
+- NDJSON lines are validated while streaming; bad data is a 400
+"""
+
+import gzip
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'service'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+
+
+@pytest.fixture
+def entries(corpus_entries):
+    return corpus_entries[:2]
+
+
+@pytest.fixture
+def upload(monkeypatch, admin_token):
+    import predict_app
+
+    seen = []
+
+    def fake_training(dataset, warm_start=False):
+        # Consume like train() does: a single pass over a list or iterator
+        seen.append((type(dataset).__name__, [entry for entry in dataset]))
+        return "v-test"
+
+    monkeypatch.setattr(predict_app, "run_training", fake_training)
+    monkeypatch.setattr(predict_app, "load_model", lambda: True)
+    client = predict_app.app.test_client()
+
+    def post(body, content_type="application/json", gzipped=False):
+        headers = {"X-LOB-Admin-Token": admin_token, "Content-Type": content_type}
+        if gzipped:
+            body = gzip.compress(body)
+            headers["Content-Encoding"] = "gzip"
+        return client.post("/train", data=body, headers=headers)
+
+    return predict_app, post, seen
+
+
+def _ndjson(entries):
+    return "".join(json.dumps(e) + "\n" for e in entries).encode("utf-8")
+
+
+class TestTrainUpload:
+    """Test suite for /train upload formats"""
+
+    def test_json_body_trains_in_memory(self, upload, entries):
+        predict_app, post, seen = upload
+        resp = post(json.dumps({"dataset": entries}).encode("utf-8"))
+        assert resp.status_code == 200
+        assert seen == [("list", entries)]
+        assert not os.path.exists(os.path.join(predict_app.AI_ROOT, "datasets", "_train_temp.json"))
+
+        assert post(json.dumps({"dataset": entries}).encode("utf-8"), gzipped=True).status_code == 200
+        assert seen[-1] == ("list", entries)
+
+    def test_ndjson_streams_as_iterator(self, upload, entries):
+        _, post, seen = upload
+        resp = post(b"\n" + _ndjson(entries), content_type="application/x-ndjson", gzipped=True)
+        assert resp.status_code == 200
+        assert seen == [("generator", entries)]
+
+    def test_invalid_data_is_rejected(self, upload, entries):
+        _, post, _ = upload
+        bad = dict(entries[1], businessDescription="short")
+        resp = post(_ndjson([entries[0], bad]), content_type="application/x-ndjson")
+        assert resp.status_code == 400
+        assert resp.get_json()["error"] == "line 2.businessDescription must be at least 10 characters"
+
+        resp = post(_ndjson(entries) + b"{not json\n", content_type="application/x-ndjson")
+        assert resp.get_json()["error"] == "line 3: not valid JSON"
+        assert post(b"", content_type="application/x-ndjson").status_code == 400
+        assert post(b"not json").status_code == 400
+
+        resp = post(json.dumps({"dataset": [bad]}).encode("utf-8"))
+        assert resp.status_code == 400
+        assert resp.get_json()["error"].startswith("dataset[0].businessDescription")
@@ -0,0 +1,110 @@
+"""
+Tests for warm-started retraining (train_lob_model.warm_start_init)
+
+Tests cover:
+- Coefficients are re-indexed by (TF-IDF block, term) onto a new vocabulary
+- Incompatible promoted models fall back to a cold start, with the reason
+- A warm start from a converged solution needs fewer lbfgs iterations
+- train(..., warm_start=True) records a cold then a warm final fit in training_meta.json
+"""
+
+import json
+import os
+import sys
+
+import pytest
+from sklearn.linear_model import LogisticRegression
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+
+import model_registry
+import train_lob_model
+from train_lob_model import build_vectorizer, project_coefficients, train, warm_start_init
+
+
+@pytest.fixture(scope="module")
+def split(corpus):
+    """Corpus texts and labels without each label's last description, then those held-out descriptions."""
+    held_out = {label: text for text, label in corpus}.values()
+    base = [(t, l) for t, l in corpus if t not in held_out]
+    more = [(t, l) for t, l in corpus if t in held_out]
+    return [t for t, _ in base], [l for _, l in base], [t for t, _ in more], [l for _, l in more]
+
+
+def _bundle(texts, labels):
+    vec = build_vectorizer().fit(texts)
+    model = LogisticRegression(max_iter=3000, C=2.0, solver="lbfgs", random_state=42).fit(vec.transform(texts), labels)
+    return {"vectorizer": vec, "model": model, "labels": sorted(set(labels))}
+
+
+class TestWarmStart:
+    """Test suite for warm-start initialization"""
+
+    def test_projection_matches_terms(self, split):
+        base_texts, base_labels, more, more_labels = split
+        old = _bundle(base_texts, base_labels)
+        new_vec = build_vectorizer().fit(base_texts + more)
+        coef, overlap = project_coefficients(old["model"].coef_, old["vectorizer"], new_vec)
+        assert coef.shape == (3, sum(len(v.vocabulary_) for _, v in new_vec.transformer_list))
+        assert 0.5 < overlap < 1.0
+        (_, old_word), (_, new_word) = old["vectorizer"].transformer_list[0], new_vec.transformer_list[0]
+        term = "laundry"
+        assert coef[:, new_word.vocabulary_[term]].tolist() == old["model"].coef_[:, old_word.vocabulary_[term]].tolist()
+        unseen = next(t for t in new_word.vocabulary_ if t not in old_word.vocabulary_)
+        assert not coef[:, new_word.vocabulary_[unseen]].any()
+
+    def test_incompatible_models_start_cold(self, split):
+        base_texts, base_labels, more, more_labels = split
+        old = _bundle(base_texts, base_labels)
+        vec = build_vectorizer().fit(base_texts + more)
+        labels = sorted(set(base_labels))
+        assert warm_start_init(None, "LogisticRegression", vec, labels) == (None, "no promoted model")
+        assert warm_start_init(old, "LinearSVC", vec, labels)[1] == "LinearSVC does not support warm starts"
+        assert warm_start_init(old, "LogisticRegression", vec, labels[:2])[1] == "label set changed"
+        other = build_vectorizer()
+        other.transformer_list[0][1].set_params(ngram_range=(1, 3))
+        other.fit(base_texts)
+        assert warm_start_init(old, "LogisticRegression", other, labels)[1] == "feature extractor changed"
+        unrelated = build_vectorizer().fit(["motorcycle parts and tires", "hardware tools and nails", "gasoline station"])
+        assert "overlap" in warm_start_init(old, "LogisticRegression", unrelated, labels)[1]
+        init, reason = warm_start_init(old, "LogisticRegression", vec, labels)
+        assert reason is None and init[0].shape[1] == vec.transform(more).shape[1]
+
+    def test_warm_start_converges_faster(self, split):
+        base_texts, base_labels, more, more_labels = split
+        texts, labels = base_texts + more, base_labels + more_labels
+        previous = _bundle(texts, labels)
+        vec = previous["vectorizer"]
+        X = vec.transform(texts)
+        cold = LogisticRegression(max_iter=3000, C=2.0, solver="lbfgs", random_state=42).fit(X, labels)
+        (coef, intercept, overlap), _ = warm_start_init(previous, "LogisticRegression", vec, sorted(set(labels)))
+        warm = LogisticRegression(max_iter=3000, C=2.0, solver="lbfgs", random_state=42, warm_start=True)
+        warm.coef_, warm.intercept_ = coef, intercept
+        warm.fit(X, labels)
+        assert overlap == 1.0
+        assert warm.n_iter_.max() < cold.n_iter_.max()
+        assert (warm.predict(X) == cold.predict(X)).all()
+
+    def test_train_records_final_fit(self, tmp_path, monkeypatch, corpus_entries):
+        # Only the mini corpus, and LogisticRegression so the second run can warm-start
+        monkeypatch.setattr(train_lob_model, "LOW_RECALL_DATASET_GLOB", str(tmp_path / "none_*.json"))
+        monkeypatch.setattr(train_lob_model, "get_models", lambda: {
+            "LogisticRegression": LogisticRegression(max_iter=3000, C=2.0, random_state=42, solver="lbfgs",
+                                                     class_weight="balanced"),
+        })
+        models_dir = str(tmp_path / "models")
+
+        def final_fit(version):
+            with open(os.path.join(model_registry.version_dir(version, models_dir), model_registry.META_FILENAME),
+                      encoding="utf-8") as f:
+                return json.load(f)["finalFit"]
+
+        first = train(corpus_entries, skip_tune=True, build_cascade=False, models_dir=models_dir, warm_start=True)
+        second = train(corpus_entries, skip_tune=True, build_cascade=False, models_dir=models_dir, warm_start=True)
+        cold, warm = final_fit(first), final_fit(second)
+        assert cold["start"] == "cold" and cold["warmStartSkipped"] == "no promoted model"
+        assert "fromVersion" not in cold
+        assert warm["start"] == "warm" and "warmStartSkipped" not in warm
+        assert warm["fromVersion"] == first and warm["featureOverlap"] == 1.0
+        assert warm["iterations"] <= cold["iterations"]
+        assert cold["seconds"] > 0 and warm["seconds"] > 0